@@ -127,7 +127,8 @@ Structure as:
 Be concise but comprehensive. Use actual data from customer records.""",
 
         "temperature": 0.05,
-        "max_tokens": 1200
+        "max_tokens": 1200,
+        "fast_path": True  # Structured questions (status, scores, ...) answered from templates
     },
 
     "client_chat_agent": {
@@ -243,7 +244,8 @@ Always start with a friendly greeting using their first name.
 Be educational, supportive, and comprehensive. Connect data across multiple sources to provide meaningful insights.""",
 
         "temperature": 0.7,
-        "max_tokens": 1200
+        "max_tokens": 1200,
+        "fast_path": False  # Clients get the LLM's explanations, even for simple lookups
     }
 }
 
@@ -300,6 +302,9 @@ class LangfusePromptManager:
                         "config": config,
                         "temperature": config.get('temperature', 0.7),
                         "max_tokens": config.get('max_tokens', 1200),
+                        "fast_path": config.get(
+                            'fast_path', FALLBACK_PROMPTS.get(prompt_name, {}).get('fast_path', False)
+                        ),
                         "version": getattr(prompt, 'version', None),
                         "source": "langfuse"
                     }
@@ -344,7 +349,8 @@ class LangfusePromptManager:
             system_prompt = prompt_data.get("system_prompt", "")
             config = {
                 "temperature": prompt_data.get("temperature", 0.7),
-                "max_tokens": prompt_data.get("max_tokens", 1200)
+                "max_tokens": prompt_data.get("max_tokens", 1200),
+                "fast_path": prompt_data.get("fast_path", False)
             }
 
             # Create prompt in Langfuse
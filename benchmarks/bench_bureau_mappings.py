@@ -0,0 +1,166 @@
+"""
+Bureau Mapping Benchmark for Tilores_X
+Revolving-utilization matching over large CREDIT_SUMMARY/CREDIT_ATTRIBUTES payloads:
+per-item pattern lambdas (legacy), inline if/elif checks (previous extractor) and the
+compiled dispatch tables, plus bureau identification by if/elif vs. the alias table
+
+Usage:
+    python benchmarks/bench_bureau_mappings.py [items_per_report] [reports]
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.bureau_mappings import BureauMappings  # noqa: E402
+
+BUREAUS = ("Experian", "TransUnion", "Equifax")
+
+
+def make_reports(items: int, reports: int, seed: int = 11) -> list:
+    """(bureau, CREDIT_SUMMARY, CREDIT_ATTRIBUTES) per report; one utilization item among `items` each"""
+    rng = random.Random(seed)
+    payloads = []
+    for index in range(reports):
+        bureau = BUREAUS[index % 3]
+        summary = [{"ID": f"PT{n + 100:04d}", "Name": f"Summary attribute {n}", "Value": str(rng.randint(0, 99)),
+                    "Type": "creditSummary"} for n in range(items)]
+        attributes = [{"Name": f"Attribute {n}", "Value": str(rng.randint(0, 99)), "Type": "creditAttributes"}
+                      for n in range(items)]
+        if bureau == "Equifax":
+            attributes[items // 2] = {"Name": "Utilization on revolving trades", "Value": "37",
+                                      "Type": "creditAttributes"}
+        else:
+            summary[16] = {"ID": "PT016", "Name": "Utilization on revolving trades", "Value": "42",
+                           "Type": "creditSummary"}
+        payloads.append((bureau, {"DATA_SET": summary}, [{"DATA_SET": attributes}]))
+    return payloads
+
+
+def legacy_lambdas(payloads) -> list:
+    """Per-item pattern list with lambdas (the original comprehensive formatter, debug prints removed)"""
+    found = []
+    for bureau, credit_summary, credit_attributes in payloads:
+        for data_set in credit_summary.get("DATA_SET", []):
+            name = data_set.get("Name", "")
+            value = data_set.get("Value", "")
+            item_id = data_set.get("ID", "")
+            utilization_patterns = [
+                {"id": "PT016", "name_check": lambda n: "utilization" in n.lower() and "revolving" in n.lower()},
+                {"id": None, "name_check": lambda n: "utilization" in n.lower() and "revolving" in n.lower()},
+                {"id": None, "name_check": lambda n: "utilization" in n.lower() and "revolving" in n.lower()},
+            ]
+            for pattern in utilization_patterns:
+                if ((pattern["id"] is None and not item_id) or
+                        (pattern["id"] is not None and item_id == pattern["id"])) and pattern["name_check"](name):
+                    if value:
+                        found.append((bureau, value))
+                        break
+        for attribute in credit_attributes:
+            for data_set in attribute.get("DATA_SET", []):
+                name = data_set.get("Name", "")
+                value = data_set.get("Value", "")
+                item_id = data_set.get("ID", "")
+                data_type = data_set.get("Type", "")
+                if not item_id and "Utilization on revolving trades" in name and data_type == "creditAttributes":
+                    if value:
+                        found.append((bureau, value))
+    return found
+
+
+def inline_checks(payloads) -> list:
+    """Inline if/elif checks on every item (the single-pass extractor before the compiled tables)"""
+    found = []
+    for bureau, credit_summary, credit_attributes in payloads:
+        for data_set in credit_summary.get("DATA_SET", []):
+            item_id, name, value = data_set.get("ID"), data_set.get("Name") or "", data_set.get("Value")
+            if value and item_id in (None, "", "PT016"):
+                lowered = name.lower()
+                if "utilization" in lowered and "revolving" in lowered:
+                    found.append((bureau, value))
+        for attribute in credit_attributes:
+            for data_set in attribute.get("DATA_SET", []):
+                item_id, name, value = data_set.get("ID"), data_set.get("Name") or "", data_set.get("Value")
+                if (value and not item_id and "Utilization on revolving trades" in name
+                        and data_set.get("Type") == "creditAttributes"):
+                    found.append((bureau, value))
+    return found
+
+
+def compiled_tables(payloads, mappings: BureauMappings) -> list:
+    """One dict lookup per item; sources without mappings for the bureau are skipped"""
+    found = []
+    for bureau, credit_summary, credit_attributes in payloads:
+        for source, blocks in (("CREDIT_SUMMARY", [credit_summary]), ("CREDIT_ATTRIBUTES", credit_attributes)):
+            table = mappings.table(bureau, source)
+            if not table:
+                continue
+            for block in blocks:
+                for data_set in block.get("DATA_SET", []):
+                    mapping = table.match(data_set)
+                    if mapping is not None and data_set.get("Value"):
+                        found.append((bureau, data_set["Value"]))
+    return found
+
+
+def legacy_bureau(name: str) -> str:
+    """if/elif bureau identification (the original _standardize_bureau_identification fallback)"""
+    bureau_field = name.upper()
+    if "EXPERIAN" in bureau_field:
+        return "Experian"
+    elif "TRANSUNION" in bureau_field or "TRANS UNION" in bureau_field:
+        return "TransUnion"
+    elif "EQUIFAX" in bureau_field:
+        return "Equifax"
+    return "Unknown Bureau"
+
+
+def _median_ms(fn, iterations: int = 15) -> float:
+    samples = []
+    for _ in range(iterations):
+        start_time = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(samples)
+
+
+def main(items: int = 2000, reports: int = 12):
+    mappings = BureauMappings()
+    payloads = make_reports(items, reports)
+    total = 2 * items * reports
+
+    results = {
+        "legacy lambdas": legacy_lambdas(payloads),
+        "inline if/elif": inline_checks(payloads),
+        "compiled tables": compiled_tables(payloads, mappings),
+    }
+    expected = sorted(results["legacy lambdas"])
+    for label, found in results.items():
+        if sorted(found) != expected:
+            print(f"⚠️ {label} found {len(found)} values, legacy found {len(expected)}")
+
+    print(f"📏 Utilization matching over {reports} reports x {items} summary + {items} attribute items ({total} items)")
+    timings = {
+        "legacy lambdas": _median_ms(lambda: legacy_lambdas(payloads)),
+        "inline if/elif": _median_ms(lambda: inline_checks(payloads)),
+        "compiled tables": _median_ms(lambda: compiled_tables(payloads, mappings)),
+    }
+    baseline = timings["legacy lambdas"]
+    for label, ms in timings.items():
+        print(f"  {label:<16} {ms:9.3f}ms  {ms * 1e6 / total:8.1f}ns/item  {baseline / ms:6.1f}x")
+
+    names = ["Experian", "TransUnion", "Equifax", "TRANS UNION", "EXPERIAN", "Unknown Bureau"] * 5000
+    print(f"📏 Bureau identification ({len(names)} names)")
+    legacy_ms = _median_ms(lambda: [legacy_bureau(name) for name in names])
+    compiled_ms = _median_ms(lambda: [mappings.canonical_bureau(name) for name in names])
+    print(f"  {'if/elif chain':<16} {legacy_ms:9.3f}ms")
+    print(f"  {'alias table':<16} {compiled_ms:9.3f}ms  {legacy_ms / compiled_ms:6.1f}x")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
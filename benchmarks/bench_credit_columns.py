@@ -0,0 +1,107 @@
+"""
+Credit Columns Benchmark for Tilores_X
+Late-payment totals, revolving/installment utilization and month-over-month trends per
+customer, bureau and report: Python loops over typed CreditFiles vs. the NumPy kernels
+
+Usage:
+    python benchmarks/bench_credit_columns.py [iterations]
+
+Each customer comes from bench_credit_extraction.make_entity (20 liabilities per
+report), parsed once into a CreditFile. "columns" times building the columns plus
+the kernels; "kernels" times the kernels on columns that are already built.
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_credit_extraction import make_entity  # noqa: E402
+from utils.credit_columns import (  # noqa: E402
+    INSTALLMENT_TYPES,
+    REVOLVING_TYPES,
+    late_totals,
+    month_over_month,
+    portfolio_columns,
+    utilization_split,
+)
+from utils.credit_models import parse_credit_file  # noqa: E402
+
+
+def python_loops(credit_files: list) -> tuple:
+    """The same aggregates with dicts keyed by (customer, bureau, report date)"""
+    late, split = {}, {}
+    for owner, credit in enumerate(credit_files):
+        for item in credit.liabilities:
+            key = (owner, item.bureau, item.date)
+            totals = late.setdefault(key, [0, 0, 0, 0, 0])
+            totals[0] += item.late.days30
+            totals[1] += item.late.days60
+            totals[2] += item.late.days90
+            totals[3] += 1 if item.late else 0
+            totals[4] += 1
+            sums = split.setdefault(key, [0.0, 0.0, 0.0, 0.0])
+            if item.balance is not None and item.limit and item.limit > 0:
+                if item.account_type in REVOLVING_TYPES:
+                    sums[0] += item.balance
+                    sums[1] += item.limit
+                elif item.account_type in INSTALLMENT_TYPES:
+                    sums[2] += item.balance
+                    sums[3] += item.limit
+
+    # Month over month: latest report per customer, bureau and month, then the change since the previous month
+    latest = {}
+    for owner, bureau, day in sorted(late, key=lambda key: (key[0], key[1], key[2])):
+        latest[(owner, bureau, day.year, day.month)] = (owner, bureau, day)
+    trend, previous = [], {}
+    for month_key in sorted(latest):
+        key = latest[month_key]
+        revolving = split[key][0] / split[key][1] * 100 if split[key][1] else None
+        row = (late[key][0], revolving)
+        last = previous.get(month_key[:2])
+        trend.append((month_key, row, None if last is None else row[0] - last[0]))
+        previous[month_key[:2]] = row
+    return late, split, trend
+
+
+def kernels(columns) -> tuple:
+    return late_totals(columns), utilization_split(columns), month_over_month(columns)
+
+
+def _median_ms(fn, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        start_time = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(samples)
+
+
+def main(iterations: int = 10):
+    print(f"📏 Credit aggregation per customer, bureau and report (median of {iterations} runs)")
+    print(f"  {'customers':>9}  {'liabilities':>11}  {'loops ms':>9}  {'columns ms':>10}  {'kernels ms':>10}  "
+          f"{'speedup':>7}  {'kernels only':>12}")
+    customer = parse_credit_file(make_entity(12)["records"])
+    for customers in (1, 100, 1000):
+        credit_files = [customer] * customers
+        columns = portfolio_columns(credit_files)
+
+        late, _, trend = python_loops(credit_files)
+        table = late_totals(columns)
+        if sorted(tuple(totals[:3]) for totals in late.values()) != sorted(
+            zip(table["days30"].tolist(), table["days60"].tolist(), table["days90"].tolist())
+        ) or len(trend) != len(month_over_month(columns)["owner"]):
+            print(f"  ⚠️ loops and kernels disagree for {customers} customers")
+
+        loops_ms = _median_ms(lambda: python_loops(credit_files), iterations)
+        columns_ms = _median_ms(lambda: kernels(portfolio_columns(credit_files)), iterations)
+        kernels_ms = _median_ms(lambda: kernels(columns), iterations)
+        print(f"  {customers:>9}  {len(columns):>11}  {loops_ms:>9.3f}  {columns_ms:>10.3f}  {kernels_ms:>10.3f}  "
+              f"{loops_ms / columns_ms:>6.1f}x  {loops_ms / kernels_ms:>11.1f}x")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,153 @@
+"""
+Credit Domain Model Benchmark for Tilores_X
+Retained memory per cached entity and per-request parse time: nested dicts of strings
+(as the pipeline held them) vs. the slotted, parse-once CreditFile
+
+Usage:
+    python benchmarks/bench_credit_models.py [iterations]
+
+Entities come from bench_credit_extraction.make_entity (20 liabilities and 5
+inquiries per report). The per-request workload is what an analysis needs from
+the data: latest score per bureau, late-payment totals per bureau, overall
+revolving utilization and inquiries since 2024.
+"""
+
+import datetime as dt
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_credit_extraction import make_entity  # noqa: E402
+from utils.credit_models import AccountType, CreditFile, parse_credit_file  # noqa: E402
+
+SINCE = dt.date(2024, 1, 1)
+
+
+def _int(value) -> int:
+    try:
+        return int(value) if value else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+def _as_list(value) -> list:
+    if isinstance(value, list):
+        return value
+    return [value] if isinstance(value, dict) else []
+
+
+def credit_dicts(records: list) -> list:
+    """The same facts as a CreditFile, as nested dicts of strings (one dict per bureau report)"""
+    reports = []
+    for record in records:
+        for report in _as_list(record.get("CREDIT_RESPONSE")):
+            reports.append({
+                "bureau": report.get("CREDIT_BUREAU"),
+                "date": report.get("CreditReportFirstIssuedDate"),
+                "scores": [{"value": score.get("Value"), "model": score.get("ModelNameType"),
+                            "type": score.get("CreditScoreType")} for score in _as_list(report.get("CREDIT_SCORE"))],
+                "liabilities": [
+                    {"type": item.get("AccountType"), "creditor": (item.get("Creditor") or {}).get("Name"),
+                     "balance": item.get("CreditBalance"), "limit": item.get("CreditLimitAmount"),
+                     "late": dict(item.get("LateCount") or {})}
+                    for item in _as_list(report.get("CREDIT_LIABILITY"))
+                ],
+                "inquiries": [{"date": item.get("InquiryDate"), "subscriber": item.get("SubscriberName")}
+                              for item in _as_list(report.get("CREDIT_INQUIRY"))],
+            })
+    return reports
+
+
+def analyze_dicts(reports: list) -> tuple:
+    """Per-request analysis over string dicts (every value parsed again)"""
+    latest, late, balance, limit, inquiries = {}, {}, 0.0, 0.0, 0
+    for report in reports:
+        bureau, date = report["bureau"], dt.date.fromisoformat(report["date"])
+        for score in report["scores"]:
+            if _int(score["value"]) and (bureau not in latest or date >= latest[bureau][0]):
+                latest[bureau] = (date, _int(score["value"]))
+        totals = late.setdefault(bureau, [0, 0, 0])
+        for item in report["liabilities"]:
+            totals[0] += _int(item["late"].get("Days30"))
+            totals[1] += _int(item["late"].get("Days60"))
+            totals[2] += _int(item["late"].get("Days90"))
+            if item["type"] == "Revolving" and item["limit"]:
+                balance += float(str(item["balance"]).replace(",", ""))
+                limit += float(str(item["limit"]).replace(",", ""))
+        inquiries += sum(1 for item in report["inquiries"]
+                         if item["date"] and dt.date.fromisoformat(item["date"]) >= SINCE)
+    utilization = round(balance / limit * 100, 2) if limit else None
+    latest = {bureau: value for bureau, (_, value) in latest.items()}
+    return latest, {bureau: tuple(v) for bureau, v in late.items()}, utilization, inquiries
+
+
+def analyze_typed(credit: CreditFile) -> tuple:
+    """The same analysis over the typed model (values already parsed)"""
+    late, balance, limit = {}, 0.0, 0.0
+    for item in credit.liabilities:
+        totals = late.setdefault(str(item.bureau), [0, 0, 0])
+        totals[0] += item.late.days30
+        totals[1] += item.late.days60
+        totals[2] += item.late.days90
+        if item.account_type is AccountType.REVOLVING and item.limit:
+            balance += item.balance or 0.0
+            limit += item.limit
+    inquiries = sum(1 for item in credit.inquiries if item.date and item.date >= SINCE)
+    latest = {str(bureau): score.value for bureau, score in credit.latest_scores().items()}
+    utilization = round(balance / limit * 100, 2) if limit else None
+    return latest, {bureau: tuple(v) for bureau, v in late.items()}, utilization, inquiries
+
+
+def _retained_kib(build) -> float:
+    """Bytes still allocated by build()'s result once it returns"""
+    tracemalloc.start()
+    try:
+        result = build()  # noqa: F841 - held while measuring
+        return tracemalloc.get_traced_memory()[0] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def _median_ms(fn, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        start_time = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(samples)
+
+
+def main(iterations: int = 20):
+    print(f"📏 Credit domain objects (median of {iterations} runs; retained tracemalloc KiB after a JSON decode)")
+    print(f"  {'reports':>7}  {'dicts KiB':>9}  {'typed KiB':>9}  {'saved':>6}  {'dicts ms':>8}  {'typed ms':>8}  "
+          f"{'speedup':>7}  {'parse ms':>8}  {'decode ms':>9}")
+    for reports in (1, 10, 100):
+        records = make_entity(reports)["records"]
+        dict_payload = json.dumps(credit_dicts(records))
+        credit = parse_credit_file(records)
+        typed_payload = credit.to_json()
+
+        dicts = json.loads(dict_payload)
+        if CreditFile.from_json(typed_payload) != credit:
+            print(f"  ⚠️ JSON round trip changed the credit file for {reports} reports")
+        if analyze_dicts(dicts) != analyze_typed(credit):
+            print(f"  ⚠️ analyses differ for {reports} reports")
+
+        dicts_kib = _retained_kib(lambda: json.loads(dict_payload))
+        typed_kib = _retained_kib(lambda: CreditFile.from_json(typed_payload))
+        dicts_ms = _median_ms(lambda: analyze_dicts(dicts), iterations)
+        typed_ms = _median_ms(lambda: analyze_typed(credit), iterations)
+        parse_ms = _median_ms(lambda: parse_credit_file(records), iterations)
+        decode_ms = _median_ms(lambda: CreditFile.from_json(typed_payload), iterations)
+        print(f"  {reports:>7}  {dicts_kib:>9.1f}  {typed_kib:>9.1f}  {1 - typed_kib / dicts_kib:>6.0%}  "
+              f"{dicts_ms:>8.3f}  {typed_ms:>8.3f}  {dicts_ms / typed_ms:>6.1f}x  {parse_ms:>8.3f}  {decode_ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
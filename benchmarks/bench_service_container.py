@@ -0,0 +1,71 @@
+"""
+Service Container Benchmark for Tilores_X
+Per-request construction cost of the credit API and Tilores search tools,
+built fresh on every request (before) vs. resolved from the service container (after)
+
+Usage:
+    python benchmarks/bench_service_container.py [iterations]
+
+Tilores tool construction is only measured when TILORES_* credentials are configured.
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def _time_calls(fn, iterations):
+    """Per-call latencies in milliseconds"""
+    samples = []
+    for _ in range(iterations):
+        start_time = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start_time) * 1000)
+    return samples
+
+
+def _report(label, samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"  {label:<34} mean {statistics.mean(samples):9.3f}ms   p95 {p95:9.3f}ms")
+
+
+def main(iterations: int = 50):
+    from direct_credit_api_fixed import MultiProviderCreditAPI
+    from utils.service_container import get_service_container
+
+    container = get_service_container()
+
+    print(f"📏 Per-request construction cost ({iterations} iterations)")
+    print("🔴 Before (constructed per request):")
+    _report("MultiProviderCreditAPI()", _time_calls(MultiProviderCreditAPI, iterations))
+
+    print("🟢 After (service container):")
+    _report('container.get("credit_api")', _time_calls(lambda: container.get("credit_api"), iterations))
+
+    if not os.getenv("TILORES_API_URL"):
+        print("ℹ️ TILORES_API_URL not set - skipping Tilores tool construction")
+        return
+
+    engine = container.get("llm_engine")
+    if engine.tilores is None:
+        print("ℹ️ Tilores not initialized - skipping Tilores tool construction")
+        return
+
+    from tilores_langchain import TiloresTools
+
+    def build_tools():
+        engine._create_unified_search_tool(TiloresTools(engine.tilores))
+
+    print("🔴 Before (constructed per request):")
+    _report("TiloresTools + unified search tool", _time_calls(build_tools, iterations))
+    print("🟢 After (service container):")
+    _report('container.get("tilores_tools")', _time_calls(lambda: container.get("tilores_tools"), iterations))
+    print(f"📊 Container stats: {container.get_stats()}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,115 @@
+"""
+Streaming JSON Benchmark for Tilores_X
+Peak memory and time to decode a synthetic ~5 MB entity response: buffering the body and
+json.loads (the previous transport) vs. projecting the chunks while they arrive
+
+Usage:
+    python benchmarks/bench_streaming_json.py [megabytes] [iterations]
+
+Records come from bench_credit_extraction.make_entity, with liabilities padded to the
+width of real MISMO tradelines. "entity" keeps every record field (the projection
+entity fetches use); "credit" keeps only CREDIT_FILE_PATHS. Chunks are 64 KiB, as
+read from the socket, and exist before measuring.
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_credit_extraction import make_entity  # noqa: E402
+from utils.credit_models import CREDIT_FILE_PATHS, parse_credit_file  # noqa: E402
+from utils.field_projection import build_field_tree  # noqa: E402
+from utils.streaming_json import project_json, response_tree  # noqa: E402
+
+CHUNK_SIZE = 1 << 16
+RECORDS = "data.entity.entity.records"
+
+# Tradeline fields the credit analyses never read
+PADDING = {
+    "AccountIdentifier": "XXXXXXXX1234",
+    "AccountOpenedDate": "2019-04-01",
+    "AccountReportedDate": "2024-05-31",
+    "AccountStatusType": "Open",
+    "AccountOwnershipType": "Individual",
+    "CreditLoanType": "CreditCard",
+    "MonthlyPaymentAmount": "125",
+    "TermsMonthsCount": "0",
+    "LastActivityDate": "2024-05-12",
+    "HighBalanceAmount": "4200",
+    "PaymentPatternData": "C" * 24 + "1" * 6 + "C" * 18,
+    "CurrentRatingType": "AsAgreed",
+    "CREDIT_COMMENT": [{"Code": "AC", "Text": "Account closed at consumer request"}],
+}
+
+
+def make_response(megabytes: float) -> bytes:
+    """GraphQL entity response of about `megabytes` MB"""
+    records = make_entity(12)["records"]
+    for record in records:
+        for item in record["CREDIT_RESPONSE"]["CREDIT_LIABILITY"]:
+            item.update(PADDING)
+    body = {"data": {"entity": {"entity": {"id": "entity-1", "records": records}}}, "extensions": {"tracing": {}}}
+    copies = max(1, round(megabytes * 1e6 / len(json.dumps(body))))
+    body["data"]["entity"]["entity"]["records"] = records * copies
+    return json.dumps(body).encode()
+
+
+def _peak_kib(fn) -> float:
+    """Peak bytes allocated while fn runs"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def _median_ms(fn, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        start_time = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(samples)
+
+
+def main(megabytes: float = 5, iterations: int = 5):
+    payload = make_response(megabytes)
+    chunks = [payload[i:i + CHUNK_SIZE] for i in range(0, len(payload), CHUNK_SIZE)]
+    records = json.loads(payload)["data"]["entity"]["entity"]["records"]
+    record_fields = sorted({name for record in records for name in record})
+    trees = {
+        "entity": response_tree(RECORDS, record_fields, "data.entity.entity.id", "errors"),
+        "credit": response_tree(RECORDS, CREDIT_FILE_PATHS),
+    }
+
+    def buffered():
+        return json.loads(b"".join(chunks))
+
+    expected = parse_credit_file(records)
+    for name, tree in trees.items():
+        projected = project_json(chunks, tree)["data"]["entity"]["entity"]["records"]
+        if parse_credit_file(projected) != expected:
+            print(f"  ⚠️ {name} projection parses to a different CreditFile")
+    if project_json(chunks, build_field_tree([RECORDS]))["data"]["entity"]["entity"]["records"] != records:
+        print("  ⚠️ whole-records projection differs from json.loads")
+
+    print(f"📏 {len(payload) / 1e6:.1f} MB entity response, {len(records)} records, {len(chunks)} chunks "
+          f"(peak tracemalloc KiB, median of {iterations} runs)")
+    print(f"  {'decode':>16}  {'peak KiB':>9}  {'vs. buffered':>12}  {'ms':>8}")
+    base_kib = _peak_kib(buffered)
+    print(f"  {'buffered+loads':>16}  {base_kib:>9.0f}  {'':>12}  {_median_ms(buffered, iterations):>8.1f}")
+    for name, tree in trees.items():
+        peak_kib = _peak_kib(lambda: project_json(chunks, tree))
+        elapsed_ms = _median_ms(lambda: project_json(chunks, tree), iterations)
+        print(f"  {'stream ' + name:>16}  {peak_kib:>9.0f}  {1 - peak_kib / base_kib:>11.0%}  {elapsed_ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    args = [float(arg) for arg in sys.argv[1:2]] + [int(arg) for arg in sys.argv[2:]]
+    main(*args)
@@ -0,0 +1,133 @@
+"""
+Similarity Cache Evaluation for Tilores_X
+Precision and hit rate of the near-duplicate answer tier on a labelled query set,
+compared with exact-match caching, across similarity thresholds (fully offline)
+
+Usage:
+    python benchmarks/eval_similarity_cache.py [threshold ...]
+
+Each intent is answered once (its first phrasing); every other phrasing is then
+looked up. A hit is correct when it returns the answer of the same intent.
+Probes labelled None have no cached answer and should always miss.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.answer_cache import normalize_question  # noqa: E402
+from utils.similarity_cache import SimilarityIndex  # noqa: E402
+
+# intent -> phrasings; the first phrasing is the one that gets answered and cached
+LABELLED_INTENTS = {
+    "credit_score": [
+        "what is his credit score for john.smith@example.com",
+        "whats the credit score for this customer john.smith@example.com",
+        "What's the customer's credit score? john.smith@example.com",
+        "tell me the credit score for john.smith@example.com",
+        "credit scores for john.smith@example.com",
+    ],
+    "equifax_score": [
+        "what is the equifax score for client 1881899",
+        "equifax credit score for customer 1881899",
+        "whats their equifax score 1881899",
+    ],
+    "score_change": [
+        "why did the credit score drop for 1881899",
+        "why did their credit score drop 1881899",
+        "why did his credit scores drop for client 1881899",
+    ],
+    "utilization": [
+        "what is the credit utilization for 003Ux00000WCpVvIAL",
+        "show the customer's credit utilization 003Ux00000WCpVvIAL",
+        "credit utilization for this client 003Ux00000WCpVvIAL",
+    ],
+    "late_payments": [
+        "does the customer have any late payments 555-123-4567",
+        "any late payments for 555-123-4567",
+        "does he have late payments 555-123-4567",
+    ],
+    "account_status": [
+        "what is the account status for jane@example.com",
+        "whats the account status of jane@example.com",
+        "account status for the customer jane@example.com",
+    ],
+    "billing_history": [
+        "show the billing history for jane@example.com",
+        "billing history for this customer jane@example.com",
+    ],
+    "last_payment": [
+        "when was the last payment for jane@example.com",
+        "when was their last payment jane@example.com",
+    ],
+}
+
+# Related but different questions: none of these should be served a cached answer
+UNANSWERED_PROBES = [
+    "what is the experian score for client 1881899",
+    "what is the transunion credit score for john.smith@example.com",
+    "how many open accounts does john.smith@example.com have",
+    "what is the credit limit for 003Ux00000WCpVvIAL",
+    "how can the customer improve the credit score john.smith@example.com",
+    "what is the next payment date for jane@example.com",
+    "is the account cancelled for jane@example.com",
+    "what is the total amount owed 555-123-4567",
+    "list the collections accounts for 1881899",
+    "what is the billing address for jane@example.com",
+]
+
+SCOPE = "entity-1/data-v1"
+
+
+def evaluate(threshold: float) -> dict:
+    """Seed each intent's first phrasing, then look up all other phrasings and the unanswered probes"""
+    index = SimilarityIndex({"enabled": True, "threshold": threshold})
+    for intent, phrasings in LABELLED_INTENTS.items():
+        index.add(SCOPE, phrasings[0], intent)
+
+    probes = [(phrasing, intent) for intent, phrasings in LABELLED_INTENTS.items() for phrasing in phrasings[1:]]
+    probes += [(probe, None) for probe in UNANSWERED_PROBES]
+    seeded = {normalize_question(phrasings[0]): intent for intent, phrasings in LABELLED_INTENTS.items()}
+
+    hits = correct = exact_hits = 0
+    errors = []
+    for question, label in probes:
+        exact_hits += normalize_question(question) in seeded
+        match = index.find(SCOPE, question)
+        if match is None:
+            continue
+        hits += 1
+        if match[0] == label:
+            correct += 1
+        else:
+            errors.append((question, match[0], round(match[1], 2)))
+
+    answerable = sum(1 for _, label in probes if label is not None)
+    return {
+        "threshold": threshold,
+        "probes": len(probes),
+        "hits": hits,
+        "precision": correct / hits if hits else 1.0,
+        "hit_rate": hits / len(probes),
+        "recall": correct / answerable,
+        "exact_hit_rate": exact_hits / len(probes),
+        "errors": errors,
+    }
+
+
+def main(thresholds):
+    print(f"🧬 Similarity cache evaluation ({sum(len(p) for p in LABELLED_INTENTS.values())} labelled phrasings, "
+          f"{len(UNANSWERED_PROBES)} unanswered probes)")
+    print(f"  {'threshold':>9}  {'precision':>9}  {'hit rate':>8}  {'recall':>6}  {'exact-match hit rate':>20}")
+    results = [evaluate(threshold) for threshold in thresholds]
+    for result in results:
+        print(f"  {result['threshold']:>9.2f}  {result['precision']:>9.1%}  {result['hit_rate']:>8.1%}  "
+              f"{result['recall']:>6.1%}  {result['exact_hit_rate']:>20.1%}")
+    for result in results:
+        for question, matched, similarity in result["errors"]:
+            print(f"  ⚠️ @{result['threshold']:.2f} '{question}' matched {matched} ({similarity})")
+
+
+if __name__ == "__main__":
+    main([float(arg) for arg in sys.argv[1:]] or [0.6, 0.7, 0.8, 0.9])
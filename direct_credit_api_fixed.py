@@ -11,12 +11,14 @@ import uuid
 import hashlib
 import asyncio
 import time
+import weakref
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from datetime import datetime
+from typing import List, Optional, Dict, Any, AsyncIterator, Union
 
-import requests
+import aiohttp
 import redis
+from redis import asyncio as aioredis
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
@@ -24,6 +26,26 @@ from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
+from utils.answer_cache import AnswerKey, bypass_requested, get_answer_cache, is_bypassed, prompt_version, set_bypass
+from utils.async_bridge import run_sync
+from utils.http_clients import get_http_client_registry
+from utils.request_coalescing import SingleFlight, make_flight_key
+from utils.credit_columns import month_over_month, portfolio_columns, table_rows
+from utils.credit_context import get_credit_context_builder
+from utils.credit_extraction import extract_credit, format_comprehensive_data
+from utils.credit_models import CreditFile, parse_credit_file
+from utils.entity_cache import get_entity_cache
+from utils.fast_path import get_fast_path_engine
+from utils.entity_resolution import get_resolution_cache
+from utils.field_projection import CREDIT_INTENTS, get_field_projection_planner, record_selection_paths
+from utils.graphql_queries import get_query_catalog
+from utils.llm_hedging import get_llm_hedger
+from utils.model_router import get_model_router
+from utils.schema_registry import get_schema_registry
+from utils.service_container import get_service_container
+from utils.streaming_json import JsonProjector, Tree, response_tree
+from utils.tilores_token import get_token_manager
+
 # Agent Prompts Integration
 try:
     from agent_prompts import get_agent_prompt
@@ -71,10 +93,17 @@ load_dotenv()
 # Known entity ID for Esteban Price (from our previous testing)
 KNOWN_ENTITY_ID = "dc93a2cd-de0a-444f-ad47-3003ba998cd3"
 
+# Credit portfolio batches: entities per request and entity fetches in flight at once
+PORTFOLIO_MAX_ENTITIES = int(os.getenv("CREDIT_PORTFOLIO_MAX_ENTITIES", "200"))
+PORTFOLIO_CONCURRENCY = int(os.getenv("CREDIT_PORTFOLIO_CONCURRENCY", "8"))
+
 class ChatMessage(BaseModel):
     role: str
     content: str
 
+class CreditPortfolioRequest(BaseModel):
+    entity_ids: List[str]
+
 class ChatCompletionRequest(BaseModel):
     model: str = "gpt-4o-mini"
     messages: List[ChatMessage]
@@ -99,19 +128,26 @@ class ChatCompletionRequest(BaseModel):
 
 class MultiProviderCreditAPI:
     def __init__(self):
-        # OAuth token management
-        self.tilores_token = None
-        self.token_expires_at = None
-
-        # Performance optimization - simple in-memory cache for recent queries
-        # DISABLED for development to prevent cache interference
-        self.query_cache = {}
-        self.cache_ttl = 0  # Disabled - set to 0 to bypass caching
+        # Final answers keyed by question, agent, model, prompt version and entity data hash
+        self.answer_cache = get_answer_cache()
 
         # Redis caching for Tilores responses
-        # Redis caching DISABLED for development to prevent cache interference
-        print("🚫 Redis caching DISABLED for development")
+        # Redis caching DISABLED by default for development to prevent cache interference
+        # Set REDIS_CACHE_ENABLED=true (with REDIS_URL) to enable the sync and async clients
         self.redis_client = None
+        self.redis_url = None
+        self._async_redis_clients = weakref.WeakKeyDictionary()  # event loop -> async client
+        redis_url = os.getenv("REDIS_URL")
+        if os.getenv("REDIS_CACHE_ENABLED", "false").lower() == "true" and redis_url:
+            try:
+                self.redis_client = redis.from_url(redis_url, socket_connect_timeout=2, socket_timeout=2)
+                self.redis_url = redis_url
+                print("✅ Redis caching ENABLED (sync + async clients)")
+            except Exception as e:
+                print(f"⚠️ Redis connection setup failed: {e}")
+                self.redis_client = None
+        else:
+            print("🚫 Redis caching DISABLED for development")
 
         # Tilores API configuration
         self.tilores_api_url = os.getenv("TILORES_GRAPHQL_API_URL")
@@ -146,66 +182,163 @@ class MultiProviderCreditAPI:
             }
         }
 
+        # Live latency/health-based model selection for data analysis calls
+        self.model_router = get_model_router()
+
+        # Optional hedged requests to a second provider and failover on hard errors
+        self.llm_hedger = get_llm_hedger()
+
+        # Process-wide OAuth token (refresh-ahead, shared across workers via Redis)
+        self.token_manager = get_token_manager()
+
+        # Shared pooled keep-alive HTTP clients (one pool per upstream)
+        self.http_clients = get_http_client_registry()
+
+        # Single-flight groups: identical in-flight chat requests and Tilores fetches share one execution
+        # SINGLE_FLIGHT_CROSS_WORKER=true also coalesces chat requests across workers via Redis
+        self.chat_flight = SingleFlight(
+            "chat", cross_worker=os.getenv("SINGLE_FLIGHT_CROSS_WORKER", "false").lower() == "true"
+        )
+        self.tilores_flight = SingleFlight("tilores")
+
+        # Precompiled Tilores query documents (values always sent as variables)
+        self.query_catalog = get_query_catalog()
+
+        # Minimal per-intent field sets instead of whole CREDIT_RESPONSE trees
+        self.field_planner = get_field_projection_planner()
+
+        # Compact, token-budgeted data context for LLM prompts
+        self.context_builder = get_credit_context_builder()
+
+        # Template answers for structured questions (status, scores, utilization, ...) without an LLM
+        self.fast_path = get_fast_path_engine()
+
+        # Entity records cached by entity ID and field set (stale-while-revalidate)
+        self.entity_cache = get_entity_cache()
+        self._template_paths = {}  # document -> record field paths
+        self._template_trees = {}  # document -> response selection tree (bodies are projected while read)
+
+        # Identifier -> entity ID index (skips the search round trip on repeat lookups)
+        self.resolution_cache = get_resolution_cache()
+
+        # Introspected schema, persisted and shared; selection sets compiled once per schema version
+        self.schema_registry = get_schema_registry()
+        self.schema_registry.register_compiler("credit_response_selection", self._compile_credit_response_selection)
+
         # Request counter for logging
         self.request_counter = 0
 
     def get_tilores_token(self):
-        """Get or refresh Tilores OAuth token"""
-        if self.tilores_token and self.token_expires_at and datetime.now() < self.token_expires_at:
-            return self.tilores_token
+        """Get or refresh Tilores OAuth token (sync wrapper for run_chain)"""
+        return run_sync(self.get_tilores_token_async())
 
+    async def get_tilores_token_async(self):
+        """Get the shared Tilores OAuth token without blocking the event loop"""
         try:
-            response = requests.post(
-                self.tilores_token_url,
-                data={
-                    "grant_type": "client_credentials",
-                    "client_id": self.tilores_client_id,
-                    "client_secret": self.tilores_client_secret,
-                },
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=10
-            )
-            response.raise_for_status()
-
-            token_data = response.json()
-            self.tilores_token = token_data["access_token"]
-            expires_in = token_data.get("expires_in", 3600)
-            self.token_expires_at = datetime.now() + timedelta(seconds=expires_in - 60)
-
-            return self.tilores_token
+            return await self.token_manager.get_token(self._get_async_redis_client())
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to get Tilores token: {str(e)}")
 
-    def _cache_response(self, cache_key: str, response: str):
-        """Cache response in both memory and Redis"""
-        # Memory cache
-        self.query_cache[cache_key] = {
-            'response': response,
-            'timestamp': datetime.now().timestamp()
+    async def _http_post_async(self, url: str, timeout: float, raise_for_status: bool = True,
+                               upstream: str = "tilores", **kwargs) -> tuple:
+        """
+        Non-blocking POST over the pooled keep-alive session for `upstream`
+
+        Returns (status, body) where body is parsed JSON for 200 responses and text otherwise.
+        """
+        status, body, _ = await self._http_post_sized_async(url, timeout, raise_for_status, upstream, **kwargs)
+        return status, body
+
+    async def _http_post_sized_async(self, url: str, timeout: float, raise_for_status: bool = True,
+                                     upstream: str = "tilores", projection: Optional[Tree] = None,
+                                     **kwargs) -> tuple:
+        """
+        Same as _http_post_async, also returning the raw response size in bytes
+
+        With a selection tree, 200 bodies are projected to it while they stream in
+        (never buffered or decoded whole).
+        """
+        session = self.http_clients.get_async_session(upstream)
+        async with session.post(url, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as response:
+            if raise_for_status:
+                response.raise_for_status()
+            if projection is not None and response.status == 200:
+                projector = JsonProjector(projection)
+                async for chunk in response.content.iter_chunked(1 << 16):
+                    projector.feed(chunk)
+                return response.status, projector.close(), projector.bytes_read
+            raw = await response.read()
+            if response.status == 200:
+                return response.status, json.loads(raw), len(raw)
+            return response.status, raw.decode(response.get_encoding() or "utf-8", errors="replace"), len(raw)
+
+    async def _tilores_graphql_async(self, template: str, variables: Optional[dict] = None, timeout: float = 30,
+                                     raise_for_status: bool = True, with_size: bool = False,
+                                     projection: Optional[Tree] = None) -> tuple:
+        """
+        Execute a catalog GraphQL template, coalescing identical in-flight queries
+
+        Returns (status, body), or (status, body, response_bytes) when with_size is set;
+        with a projection, body holds only the fields of that selection tree.
+        """
+        key = make_flight_key(template, self.query_catalog.get(template).sha256, variables, raise_for_status,
+                              projection)
+        status, body, response_bytes = await self.tilores_flight.do(
+            key,
+            lambda: self._execute_tilores_graphql_async(template, variables, timeout, raise_for_status, projection),
+        )
+        return (status, body, response_bytes) if with_size else (status, body)
+
+    async def _execute_tilores_graphql_async(self, template: str, variables: Optional[dict], timeout: float,
+                                             raise_for_status: bool, projection: Optional[Tree] = None) -> tuple:
+        """Execute a catalog GraphQL template with the current OAuth token"""
+        token = await self.get_tilores_token_async()
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json"
         }
 
-        # Redis cache
-        if self.redis_client:
-            try:
-                self.redis_client.setex(f"response:{cache_key}", self.cache_ttl, response)
-                print(f"💾 Cached response (Redis + Memory): {cache_key[:8]}...")
-            except Exception as e:
-                print(f"⚠️ Redis cache failed: {e}")
-                print(f"💾 Cached response (Memory only): {cache_key[:8]}...")
-        else:
-            print(f"💾 Cached response (Memory only): {cache_key[:8]}...")
+        async def post(include_document: bool) -> tuple:
+            payload = json.dumps(self.query_catalog.build_payload(template, variables, include_document))
+            status, body, response_bytes = await self._http_post_sized_async(
+                self.tilores_api_url,
+                timeout=timeout,
+                raise_for_status=raise_for_status,
+                projection=projection,
+                data=payload,
+                headers=headers,
+            )
+            self.query_catalog.record(template, len(payload), response_bytes)
+            return status, body, response_bytes
 
-    def _get_redis_cache(self, cache_key: str) -> Optional[str]:
-        """Get cached response from Redis"""
-        if self.redis_client:
-            try:
-                cached = self.redis_client.get(f"response:{cache_key}")
-                if cached:
-                    print(f"🚀 Redis cache hit: {cache_key[:8]}...")
-                    return cached
-            except Exception as e:
-                print(f"⚠️ Redis get failed: {e}")
-        return None
+        try:
+            status, body, response_bytes = await post(self.query_catalog.should_send_document(template))
+        except aiohttp.ClientResponseError as e:
+            if e.status != 401:
+                raise
+            status = 401
+        if status == 401:
+            # Token revoked or rotated early - drop the shared token and retry once
+            await self.token_manager.invalidate(self._get_async_redis_client())
+            headers["Authorization"] = f"Bearer {await self.get_tilores_token_async()}"
+            status, body, response_bytes = await post(True)
+        if self.query_catalog.handle_persisted_query_errors(template, body):
+            # Server doesn't know the hash (or persisted queries) - resend with the full document
+            status, body, response_bytes = await post(True)
+        if status == 200:
+            self.query_catalog.mark_registered(template)
+        return status, body, response_bytes
+
+    def _get_async_redis_client(self):
+        """Async Redis client for the running event loop (async clients cannot be shared across loops)"""
+        if not self.redis_url:
+            return None
+        loop = asyncio.get_running_loop()
+        client = self._async_redis_clients.get(loop)
+        if client is None:
+            client = aioredis.from_url(self.redis_url, socket_connect_timeout=2, socket_timeout=2)
+            self._async_redis_clients[loop] = client
+        return client
 
     def _parse_query_for_customer(self, query: str) -> dict:
         """Parse query to extract customer search parameters"""
@@ -276,54 +409,29 @@ class MultiProviderCreditAPI:
         return search_params
 
     def _search_for_customer(self, customer_info: dict) -> Optional[str]:
+        """Search for customer using Tilores GraphQL API (sync wrapper)"""
+        return run_sync(self._search_for_customer_async(customer_info))
+
+    async def _search_for_customer_async(self, customer_info: dict) -> Optional[str]:
         """Search for customer using Tilores GraphQL API"""
         if not customer_info:
             return None
 
-        try:
-            # Build GraphQL search query
-            search_conditions = []
-            for key, value in customer_info.items():
-                search_conditions.append(f'{key}: "{value}"')
-
-            search_params = ", ".join(search_conditions)
-
-            query = f"""
-            query SearchCustomer {{
-                search(input: {{ parameters: {{ {search_params} }} }}) {{
-                    entities {{
-                        id
-                        records {{
-                            id
-                        }}
-                    }}
-                }}
-            }}
-            """
-
-            token = self.get_tilores_token()
-            response = requests.post(
-                self.tilores_api_url,
-                json={"query": query},
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json"
-                },
-                timeout=10
-            )
-            response.raise_for_status()
-
-            result = response.json()
+        async def search() -> Optional[str]:
+            # Identifiers travel as variables - one cached document for every search
+            _, result = await self._tilores_graphql_async("search", {"params": customer_info}, timeout=10)
             entities = result.get("data", {}).get("search", {}).get("entities", [])
 
             if entities and entities[0].get("records"):
                 entity_id = entities[0]["id"]
                 print(f"🔍 Found customer entity: {entity_id}")
                 return entity_id
-            else:
-                print("🔍 No customer found with provided information")
-                return None
+            print("🔍 No customer found with provided information")
+            return None
 
+        try:
+            # Identifier -> entity ID rarely changes; "not found" is cached briefly
+            return await self.resolution_cache.resolve(customer_info, search, self._get_async_redis_client())
         except Exception as e:
             print(f"⚠️ Error searching for customer: {e}")
             return None
@@ -332,7 +440,23 @@ class MultiProviderCreditAPI:
                            temperature: float = 0.7, max_tokens: int = None,
                            prompt_id: str = None, prompt_version: str = None,
                            agent_type: str = None) -> str:
-        """MANDATORY SLASH COMMAND ROUTING - All queries must start with slash commands"""
+        """Sync wrapper around process_chat_request_async (used by core_app.run_chain)"""
+        return run_sync(self.process_chat_request_async(
+            query, model=model, temperature=temperature, max_tokens=max_tokens,
+            prompt_id=prompt_id, prompt_version=prompt_version, agent_type=agent_type
+        ))
+
+    async def process_chat_request_async(self, query: str, model: str = "gpt-4o-mini",
+                                         temperature: float = 0.7, max_tokens: int = None,
+                                         prompt_id: str = None, prompt_version: str = None,
+                                         agent_type: str = None,
+                                         stream: bool = False) -> Union[str, AsyncIterator[str]]:
+        """
+        MANDATORY SLASH COMMAND ROUTING - All queries must start with slash commands
+
+        With stream=True, LLM-backed answers are returned as an async iterator of
+        upstream content deltas; immediate answers (help, errors, status) stay strings.
+        """
         start_time = time.time()
         self.request_counter += 1
         request_id = self.request_counter
@@ -346,10 +470,20 @@ class MultiProviderCreditAPI:
 
             # DIRECT SLASH COMMAND PROCESSING
             print(f"🎯 SLASH COMMAND DETECTED: {query}")
-            response = self._process_slash_command(query)
+            if stream:
+                response = await self._process_slash_command_async(query, stream=True)
+            else:
+                # Concurrent duplicates (same command, customer, agent and model) wait for one leader
+                key = self._chat_flight_key(query, model, temperature, max_tokens, agent_type)
+                response = await self.chat_flight.do(
+                    key, lambda: self._process_slash_command_async(query), self._get_async_redis_client()
+                )
 
             duration = time.time() - start_time
-            print(f"✅ Request #{request_id} completed in {duration:.1f}s")
+            if isinstance(response, str):
+                print(f"✅ Request #{request_id} completed in {duration:.1f}s")
+            else:
+                print(f"✅ Request #{request_id} streaming started after {duration:.1f}s")
             return response
 
         except Exception as e:
@@ -358,6 +492,15 @@ class MultiProviderCreditAPI:
             print(f"❌ Request #{request_id} failed in {duration:.1f}s: {error_msg}")
             return error_msg
 
+    def _chat_flight_key(self, query: str, model: str, temperature: float, max_tokens: Optional[int],
+                         agent_type: Optional[str]) -> str:
+        """Coalescing key: normalized slash command, customer identifiers, agent type, model and cache bypass"""
+        normalized_query = " ".join(query.lower().split())
+        identifiers = self._parse_query_for_customer(query)
+        # A bypassing request must not wait on a leader that may answer from the answer cache
+        return make_flight_key(normalized_query, identifiers, agent_type, model, temperature, max_tokens,
+                               is_bypassed())
+
     def _process_tool_query(self, query: str) -> str:
         """Process tool/system queries like connection tests and agent listings"""
         query_lower = query.lower()
@@ -404,6 +547,10 @@ class MultiProviderCreditAPI:
             return f"❌ Tool query error: {str(e)}"
 
     def _process_slash_command(self, query: str) -> str:
+        """Process slash commands (sync wrapper)"""
+        return run_sync(self._process_slash_command_async(query))
+
+    async def _process_slash_command_async(self, query: str, stream: bool = False) -> Union[str, AsyncIterator[str]]:
         """Process slash commands for quick agent switching"""
         query_stripped = query.strip()
 
@@ -511,10 +658,10 @@ Please specify what type of query you want:
                     print(f"🎯 Direct email format detected: {email} - generating comprehensive summary")
 
                     # Store the agent selection for this session
-                    self._set_session_agent(query, agent_type)
+                    await self._set_session_agent_async(query, agent_type)
 
                     # Process the comprehensive summary directly
-                    result = self._process_agent_query(summary_query, agent_type, "credit")  # Use credit category for comprehensive analysis
+                    result = await self._process_agent_query_async(summary_query, agent_type, "credit")  # Use credit category for comprehensive analysis
 
                     # Clean up any GraphQL suggestions from the response for email queries
                     result = self._clean_graphql_suggestions(result)
@@ -530,12 +677,15 @@ Please specify what type of query you want:
                     return error_msg
 
                 # Store the agent selection for this session
-                self._set_session_agent(query, agent_type)
+                await self._set_session_agent_async(query, agent_type)
 
                 # Process the query with the agent
                 if remaining_query:
                     print(f"🎯 Processing {command} with agent: {agent_type} category: {category} for query: {remaining_query}")
-                    result = self._process_agent_query(remaining_query, agent_type, category)
+                    result = await self._process_agent_query_async(remaining_query, agent_type, category, stream=stream)
+                    if not isinstance(result, str):
+                        # Track once the streamed answer is complete
+                        return self._track_stream_on_completion(result, command, remaining_query)
                     # Track with response data
                     track_slash_command_with_metadata(command, remaining_query, response_data=result)
                     return result
@@ -609,6 +759,31 @@ Please specify what type of query you want:
         except Exception as e:
             print(f"⚠️ Session agent storage error: {e}")
 
+    async def _get_session_agent_async(self, query: str) -> str:
+        """Get the stored agent preference for this session (async Redis)"""
+        try:
+            session_key = self._get_session_key(query)
+            redis_client = self._get_async_redis_client()
+            if session_key and redis_client:
+                stored_agent = await redis_client.get(f"session_agent:{session_key}")
+                if stored_agent:
+                    return stored_agent.decode('utf-8')
+        except Exception as e:
+            print(f"⚠️ Session agent retrieval error: {e}")
+        return None
+
+    async def _set_session_agent_async(self, query: str, agent_type: str):
+        """Store the agent preference for this session (async Redis)"""
+        try:
+            session_key = self._get_session_key(query)
+            redis_client = self._get_async_redis_client()
+            if session_key and redis_client:
+                # Store for 24 hours
+                await redis_client.setex(f"session_agent:{session_key}", 86400, agent_type)
+                print(f"💾 Session agent stored: {agent_type} for session {session_key[:8]}...")
+        except Exception as e:
+            print(f"⚠️ Session agent storage error: {e}")
+
     def _get_session_key(self, query: str) -> str:
         """Generate a session key from query context"""
         try:
@@ -833,6 +1008,10 @@ Please specify what type of query you want:
         return '\n'.join(cleaned_lines)
 
     def _process_status_query(self, query: str) -> str:
+        """Process Salesforce account status queries (sync wrapper)"""
+        return run_sync(self._process_status_query_async(query))
+
+    async def _process_status_query_async(self, query: str) -> str:
         """Process Salesforce account status queries - FIXED VERSION"""
         print("🔍 Processing customer status query...")
 
@@ -842,51 +1021,16 @@ Please specify what type of query you want:
             return "I need customer information (email, phone, name, or client ID) to check account status."
 
         # Search for customer
-        entity_id = self._search_for_customer(customer_info)
+        entity_id = await self._search_for_customer_async(customer_info)
         if not entity_id:
             return "No customer records found for the provided information."
 
         # Fetch Salesforce status data directly using entity records
         try:
-            # FIXED: Use proper GraphQL query structure
-            query_gql = """
-            query SalesforceStatus($id: ID!) {
-              entity(input: { id: $id }) {
-                entity {
-                  id
-                  records {
-                    id
-                    STATUS
-                    FIRST_NAME
-                    LAST_NAME
-                    EMAIL
-                    CLIENT_ID
-                    PRODUCT_NAME
-                    CURRENT_PRODUCT
-                    ENROLL_DATE
-                  }
-                }
-              }
-            }
-            """
+            entity_data, _ = await self._fetch_entity_async("status", entity_id, timeout=15)
 
-            # FIXED: Use self.get_tilores_token() and self.tilores_api_url correctly
-            token = self.get_tilores_token()
-            response = requests.post(
-                self.tilores_api_url,
-                json={"query": query_gql, "variables": {"id": entity_id}},
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json"
-                },
-                timeout=15
-            )
-            response.raise_for_status()
-            result = response.json()
-
-            print(f"🔍 Salesforce status query result: {result is not None}")
+            print(f"🔍 Salesforce status query result: {entity_data is not None}")
 
-            entity_data = result.get("data", {}).get("entity", {}).get("entity")
             if entity_data and entity_data.get("records"):
                 records = entity_data.get("records", [])
                 print(f"🔍 Found {len(records)} records for status analysis")
@@ -942,6 +1086,11 @@ Please specify what type of query you want:
             return f"Error retrieving account status: {str(e)}"
 
     def _process_agent_query(self, query: str, agent_type: str, category: str = None) -> str:
+        """Process agent queries (sync wrapper)"""
+        return run_sync(self._process_agent_query_async(query, agent_type, category))
+
+    async def _process_agent_query_async(self, query: str, agent_type: str, category: str = None,
+                                         stream: bool = False) -> Union[str, AsyncIterator[str]]:
         """Process agent queries with LLM-driven GraphQL orchestration"""
         try:
             # Load the agent prompt
@@ -964,154 +1113,88 @@ Please specify what type of query you want:
                 return "I need customer information (email, phone, name, or client ID) to analyze their data."
 
             # Search for customer
-            entity_id = self._search_for_customer(customer_info)
+            entity_id = await self._search_for_customer_async(customer_info)
             if not entity_id:
                 return "No customer records found for the provided information."
 
             # LLM-ORCHESTRATED PROCESSING: Let the LLM determine what data to fetch
             print(f"🔄 Calling LLM orchestration for category: {category}, agent: {agent_type}")
-            result = self._process_llm_orchestrated_query(query, category, entity_id, system_prompt, temperature, max_tokens)
-            print(f"🔄 LLM orchestration returned: {len(result)} chars")
+            result = await self._process_llm_orchestrated_query_async(
+                query, category, entity_id, system_prompt, temperature, max_tokens, stream=stream,
+                agent_type=agent_type, agent_config=agent_config
+            )
+            if isinstance(result, str):
+                print(f"🔄 LLM orchestration returned: {len(result)} chars")
+            else:
+                print("🔄 LLM orchestration streaming from upstream provider")
             return result
 
         except Exception as e:
             return f"Agent processing error: {str(e)}"
 
     def _process_llm_orchestrated_query(self, query: str, category: str, entity_id: str, system_prompt: str, temperature: float, max_tokens: int) -> str:
+        """System-driven GraphQL orchestration (sync wrapper)"""
+        return run_sync(self._process_llm_orchestrated_query_async(query, category, entity_id, system_prompt, temperature, max_tokens))
+
+    async def _process_llm_orchestrated_query_async(self, query: str, category: str, entity_id: str, system_prompt: str, temperature: float, max_tokens: int,
+                                                    stream: bool = False,
+                                                    agent_type: Optional[str] = None,
+                                                    agent_config: Optional[Dict] = None) -> Union[str, AsyncIterator[str]]:
         """System-driven GraphQL orchestration - system determines template, LLM analyzes data"""
         try:
-            # System automatically determines which template to use based on category
-            template_mapping = {
-                "billing": "billing_payment",
-                "credit": "credit_scores",
-                "status": "account_status"
-            }
+            # Structured questions are answered from templates; only open-ended ones need the LLM
+            fast_intent = self.fast_path.match(query, category, agent_type, agent_config)
 
-            # Default to billing_credit_combined for any complex queries
-            template_name = template_mapping.get(category, "billing_credit_combined")
-
-            print(f"🔍 System selected template: {template_name} for category: {category}")
-
-            # Execute the appropriate GraphQL query directly
-            template_queries = {
-                "billing_payment": """
-                query GetBillingPayment($id: ID!) {
-                  entity(input: { id: $id }) {
-                    entity {
-                      records {
-                        PAYMENT_METHOD
-                        CARD_TYPE
-                        CARD_LAST_4
-                        TRANSACTION_AMOUNT
-                        LAST_APPROVED_TRANSACTION
-                        LAST_APPROVED_TRANSACTION_AMOUNT
-                        NET_BALANCE_DUE
-                        ENROLLMENT_BALANCE
-                        RECURRING_MONTHLY_FEE
-                        AMOUNT
-                      }
-                    }
-                  }
-                }
-                """,
-                "credit_scores": """
-                query GetCreditScores($id: ID!) {
-                  entity(input: { id: $id }) {
-                    entity {
-                      records {
-                        CREDIT_RESPONSE {
-                          CREDIT_BUREAU
-                        }
-                      }
-                    }
-                  }
-                }
-                """,
-                "account_status": """
-                query GetAccountStatus($id: ID!) {
-                  entity(input: { id: $id }) {
-                    entity {
-                      records {
-                        STATUS
-                        ENROLL_DATE
-                        CURRENT_PRODUCT
-                        ENROLLMENT_BALANCE
-                        ACTIVE
-                      }
-                    }
-                  }
-                }
-                """,
-                "billing_credit_combined": """
-                query GetBillingCreditCombined($id: ID!) {
-                  entity(input: { id: $id }) {
-                    entity {
-                      records {
-                        PAYMENT_METHOD
-                        CARD_TYPE
-                        CARD_LAST_4
-                        TRANSACTION_AMOUNT
-                        LAST_APPROVED_TRANSACTION
-                        NET_BALANCE_DUE
-                        ENROLLMENT_BALANCE
-                        CREDIT_RESPONSE
-                        STATUS
-                        ENROLL_DATE
-                      }
-                    }
-                  }
-                }
-                """
-            }
+            # System plans the minimal field set for the category and the intents named in the query
+            intents = self.field_planner.detect_intents(query, category)
+            if fast_intent is not None:
+                intents = tuple(sorted(set(intents) | set(fast_intent.data_intents)))
+            template_name = self._register_projection(intents)
 
-            query_content = template_queries.get(template_name, "")
-            if not query_content:
-                return f"Unknown template: {template_name}"
+            print(f"🔍 System selected projection: {template_name} for category: {category}")
 
-            # Execute the GraphQL query
-            response = requests.post(
-                self.tilores_api_url,
-                headers={"Authorization": f"Bearer {self.get_tilores_token()}"},
-                json={"query": query_content, "variables": {"id": entity_id}},
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                query_result = response.json()
-                print(f"🔍 GraphQL query successful, data received: {len(str(query_result))} chars")
-
-                # Extract customer data
-                customer_data = "No data available"
-                if 'data' in query_result and 'entity' in query_result['data'] and 'entity' in query_result['data']['entity']:
-                    entity_data = query_result['data']['entity']['entity']
-                    if 'records' in entity_data and entity_data['records']:
-                        records = entity_data['records']
-
-                        # Special handling for credit queries - collect all CREDIT_RESPONSE data
-                        if category == "credit":
-                            credit_data = []
-                            for record in records:
-                                if 'CREDIT_RESPONSE' in record and record['CREDIT_RESPONSE'] is not None:
-                                    credit_data.append(record['CREDIT_RESPONSE'])
-
-                            if credit_data:
-                                customer_data = json.dumps({
-                                    "credit_reports": credit_data,
-                                    "total_reports": len(credit_data),
-                                    "bureaus": list(set(report.get('CREDIT_BUREAU', 'Unknown') for report in credit_data))
-                                }, indent=2)
-                                print(f"🔍 Credit data extracted from {len(credit_data)} reports across {len(records)} records")
-                            else:
-                                customer_data = json.dumps({"message": "No credit reports found for this customer"}, indent=2)
-                                print("🔍 No credit reports found in any records")
-                        else:
-                            # For non-credit queries, use the first record as before
-                            customer_data = json.dumps(records[0], indent=2)
-                            print(f"🔍 Customer record data extracted: {len(customer_data)} chars")
-                    else:
-                        print("🔍 No customer records found")
-                else:
-                    print("🔍 Unexpected GraphQL response structure")
+            # Execute the GraphQL query (served from the entity cache when the fields are already held)
+            try:
+                entity_data, content_hash = await self._fetch_entity_async(
+                    template_name, entity_id, category or "combined", intents
+                )
+                fetched = True
+            except Exception as e:
+                print(f"🔍 GraphQL query failed: {e}")
+                fetched = False
+
+            if fetched:
+                records = entity_data.get('records') if entity_data else None
+                if fast_intent is not None:
+                    answer = self.fast_path.answer(fast_intent, query, records)
+                    if answer is not None:
+                        print(f"⚡ Fast-path answer: {fast_intent.name}")
+                        return answer
+
+                compact = self.context_builder.config["enabled"]
+                customer_data = None if compact else self._json_customer_data(records, category)
+
+                # Get the final analysis from the fastest healthy model that fits the prompt
+                # (compact contexts are fitted to the routed model's budget, so route on the prompt alone)
+                routing_messages = [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": customer_data or ""}
+                ]
+                model = self._route_model(routing_messages, max_tokens, session_key=entity_id)
+
+                # Same question on the same data version and prompt: reuse the earlier answer
+                cache_key = None
+                if content_hash:
+                    cache_key = self.answer_cache.make_key(
+                        query, agent_type, model, prompt_version(system_prompt, temperature, max_tokens), content_hash
+                    )
+                    cached = await self.answer_cache.get(cache_key, category, self._get_async_redis_client())
+                    if cached is not None:
+                        print(f"🚀 Answer cache hit: {cache_key.digest[:8]}...")
+                        return cached
+
+                if compact:
+                    customer_data = self._compact_customer_data(records, model, intents, system_prompt, max_tokens)
 
                 # Now give the data to the LLM for analysis
                 data_context = f"""
@@ -1128,22 +1211,71 @@ Please analyze this customer data and provide a comprehensive response to the us
                     {"role": "user", "content": data_context}
                 ]
 
-                # Get the final analysis from the LLM - Using Grok for reliable customer processing
-                final_response = self._call_llm_with_messages(messages, "llama-3.3-70b-versatile", temperature, max_tokens)
+                if stream:
+                    return self._stream_llm_with_messages_async(messages, model, temperature, max_tokens,
+                                                                cache_key=cache_key)
+                final_response = await self._call_llm_with_messages_async(messages, model, temperature, max_tokens,
+                                                                          cache_key=cache_key)
                 return final_response
 
             else:
-                print(f"🔍 GraphQL query failed: {response.status_code}")
                 return f"Unable to retrieve customer data at this time. Please try again later."
 
         except Exception as e:
             print(f"🔍 Error in orchestration: {e}")
             return f"Unable to process your request due to a technical issue. Please try again."
 
+    def _compact_customer_data(self, records: Optional[list], model: str, intents: tuple, system_prompt: str,
+                               max_tokens: Optional[int]) -> str:
+        """Compact tables of the records, fitted to the model's token budget"""
+        if not records:
+            print("🔍 No customer records found")
+            return "No data available"
+        reserved = self.context_builder.count(system_prompt) + (max_tokens or 0)
+        context = self.context_builder.build(records, model, intents, reserved_tokens=reserved)
+        print(f"🔍 Data context for {model}: {context.tokens} tokens "
+              f"(budget {context.budget}, saved {context.saved_tokens} vs. JSON)")
+        return context.text
+
+    def _json_customer_data(self, records: Optional[list], category: str) -> str:
+        """Indented JSON of the records (used when CREDIT_CONTEXT_ENABLED=false)"""
+        if not records:
+            print("🔍 No customer records found")
+            return "No data available"
+
+        # Special handling for credit queries - collect all CREDIT_RESPONSE data
+        if category == "credit":
+            credit_data = []
+            for record in records:
+                if 'CREDIT_RESPONSE' in record and record['CREDIT_RESPONSE'] is not None:
+                    credit_data.append(record['CREDIT_RESPONSE'])
+
+            if credit_data:
+                print(f"🔍 Credit data extracted from {len(credit_data)} reports across {len(records)} records")
+                return json.dumps({
+                    "credit_reports": credit_data,
+                    "total_reports": len(credit_data),
+                    "bureaus": list(set(report.get('CREDIT_BUREAU', 'Unknown') for report in credit_data))
+                }, indent=2)
+            print("🔍 No credit reports found in any records")
+            return json.dumps({"message": "No credit reports found for this customer"}, indent=2)
+
+        # For non-credit queries, use the first record as before
+        customer_data = json.dumps(records[0], indent=2)
+        print(f"🔍 Customer record data extracted: {len(customer_data)} chars")
+        return customer_data
+
     # REMOVED: All old rigid category methods replaced by LLM orchestration
 
     def _process_data_analysis_query(self, query: str, query_type: str, prompt_config: Dict,
                                    model: str, temperature: float, max_tokens: int) -> str:
+        """Process data analysis queries (sync wrapper)"""
+        return run_sync(self._process_data_analysis_query_async(
+            query, query_type, prompt_config, model, temperature, max_tokens
+        ))
+
+    async def _process_data_analysis_query_async(self, query: str, query_type: str, prompt_config: Dict,
+                                                 model: str, temperature: float, max_tokens: int) -> str:
         """Process data analysis queries with dynamic prompts"""
 
         # Parse customer information from query
@@ -1152,7 +1284,7 @@ Please analyze this customer data and provide a comprehensive response to the us
             return "I need customer information (email, phone, name, or client ID) to analyze their data."
 
         # Search for customer
-        entity_id = self._search_for_customer(customer_info)
+        entity_id = await self._search_for_customer_async(customer_info)
         if not entity_id:
             return "No customer records found for the provided information."
 
@@ -1171,7 +1303,8 @@ Please analyze this customer data and provide a comprehensive response to the us
 
         # Fetch real customer data using schema-based query
         try:
-            data_context = self._fetch_comprehensive_data(entity_id, query)
+            reserved = self.context_builder.count(system_prompt) + (max_tokens or 0)
+            data_context = await self._fetch_comprehensive_data_async(entity_id, query, model, reserved)
         except Exception as e:
             print(f"⚠️ Error fetching comprehensive data: {e}")
             data_context = f"Customer data analysis for entity {entity_id} - {query_type} analysis requested"
@@ -1186,53 +1319,18 @@ Please analyze this customer data and provide a comprehensive response to the us
         print(f"🤖 DEBUG: User content (first 200 chars): {messages[1]['content'][:200]}...")
 
         # Call LLM with proper message structure
-        return self._call_llm_with_messages(messages, model, temperature, max_tokens)
+        return await self._call_llm_with_messages_async(messages, model, temperature, max_tokens)
 
     def _introspect_graphql_schema(self) -> dict:
-        """Use GraphQL introspection to discover the complete schema"""
-        introspection_query = """
-        query IntrospectionQuery {
-          __schema {
-            types {
-              name
-              kind
-              fields {
-                name
-                type {
-                  name
-                  kind
-                  ofType {
-                    name
-                    kind
-                    fields {
-                      name
-                      type {
-                        name
-                        kind
-                        ofType {
-                          name
-                          kind
-                        }
-                      }
-                    }
-                  }
-                }
-              }
-            }
-          }
-        }
-        """
+        """Use GraphQL introspection to discover the complete schema (sync wrapper)"""
+        return run_sync(self._introspect_graphql_schema_async())
 
+    async def _introspect_graphql_schema_async(self) -> dict:
+        """Use GraphQL introspection to discover the complete schema"""
         try:
-            response = requests.post(
-                self.tilores_api_url,
-                headers={"Authorization": f"Bearer {self.get_tilores_token()}"},
-                json={"query": introspection_query},
-                timeout=30
-            )
+            status, result = await self._tilores_graphql_async("introspection", timeout=30, raise_for_status=False)
 
-            if response.status_code == 200:
-                result = response.json()
+            if status == 200:
                 print(f"🔍 DEBUG: Introspection successful, response keys: {list(result.keys())}")
                 if 'data' in result:
                     print(f"🔍 DEBUG: Data keys: {list(result['data'].keys())}")
@@ -1240,18 +1338,28 @@ Please analyze this customer data and provide a comprehensive response to the us
                     print(f"🔍 DEBUG: GraphQL errors: {result['errors']}")
                 return result
             else:
-                print(f"🔍 DEBUG: Introspection failed with status {response.status_code}")
-                print(f"🔍 DEBUG: Response text: {response.text}")
+                print(f"🔍 DEBUG: Introspection failed with status {status}")
+                print(f"🔍 DEBUG: Response text: {result}")
                 return {}
         except Exception as e:
             print(f"🔍 DEBUG: Introspection error: {e}")
             return {}
 
     def _build_credit_response_query(self) -> str:
-        """Build CREDIT_RESPONSE query based on introspected schema"""
-        # First, try to introspect the schema
-        schema = self._introspect_graphql_schema()
+        """Build CREDIT_RESPONSE query based on introspected schema (sync wrapper)"""
+        return run_sync(self._build_credit_response_query_async())
+
+    async def _build_credit_response_query_async(self) -> str:
+        """Get the CREDIT_RESPONSE selection compiled from the cached schema (no per-request introspection)"""
+        schema = await self.schema_registry.get_schema_async(
+            self._introspect_graphql_schema_async, self._get_async_redis_client()
+        )
+        if not schema:
+            return self._compile_credit_response_selection({})
+        return self.schema_registry.get_compiled("credit_response_selection")
 
+    def _compile_credit_response_selection(self, schema: dict) -> str:
+        """Build CREDIT_RESPONSE query based on introspected schema (runs once per schema version)"""
         if not schema:
             print("🔍 DEBUG: Using COMPLETE fallback CREDIT_RESPONSE query with bureau-specific fields")
             return """
@@ -1458,13 +1566,119 @@ Please analyze this customer data and provide a comprehensive response to the us
                 }
             """
 
-    def _fetch_comprehensive_data(self, entity_id: str, query: str) -> str:
+    async def _fetch_entity_async(self, template: str, entity_id: str, category: Optional[str] = None,
+                                  intents: tuple = (), timeout: float = 30) -> tuple:
+        """
+        Fetch an entity's records for a catalog template through the entity cache
+
+        Returns (entity_data, content_hash); entity_data is None when nothing was found.
+        Raises when Tilores answers with a non-200 status.
+        """
+        document = self.query_catalog.get(template).document
+        paths = self._template_paths.get(document)
+        if paths is None:
+            paths = record_selection_paths(document)
+            self._template_paths[document] = paths
+            # Only the entity is read from the body (errors for persisted-query handling)
+            self._template_trees[document] = response_tree(
+                "data.entity.entity.records", paths, "data.entity.entity.id", "errors"
+            ) if paths else None
+
+        async def fetch():
+            status, body, response_bytes = await self._tilores_graphql_async(
+                template, {"id": entity_id}, timeout=timeout, raise_for_status=False, with_size=True,
+                projection=self._template_trees[document],
+            )
+            if category:
+                self.field_planner.record_response(category, response_bytes, intents)
+            if status != 200:
+                raise Exception(f"GraphQL request failed: {status}")
+            print(f"🔍 GraphQL query successful, data received: {response_bytes} bytes")
+            return body.get("data", {}).get("entity", {}).get("entity")
+
+        return await self.entity_cache.get_or_fetch(entity_id, paths, fetch, self._get_async_redis_client())
+
+    async def credit_portfolio_async(self, entity_ids: List[str]) -> Dict[str, Any]:
+        """
+        Late-payment and utilization trends across customers in one columnar pass
+
+        Entities are fetched with the credit_file template through the entity cache,
+        so cached customers reuse their parsed CreditFile. Parsing and aggregation
+        run in worker threads to keep the event loop serving other requests.
+
+        Returns:
+            Dictionary with the customer and liability counts, the entity IDs that
+            could not be read, and one trend row per entity, bureau and report month
+            (see credit_columns.month_over_month)
+        """
+        limit = asyncio.Semaphore(PORTFOLIO_CONCURRENCY)
+        # One parsing thread: more would contend with the event loop for the GIL
+        parsing = asyncio.Lock()
+
+        async def read(entity_id: str) -> Optional[CreditFile]:
+            async with limit:
+                entity_data, _ = await self._fetch_entity_async("credit_file", entity_id, timeout=15)
+            if not entity_data:
+                return None
+            async with parsing:
+                return await asyncio.to_thread(self._portfolio_credit_file, entity_id, entity_data)
+
+        results = await asyncio.gather(*(read(entity_id) for entity_id in entity_ids), return_exceptions=True)
+        found, missing = [], []
+        for entity_id, credit in zip(entity_ids, results):
+            if isinstance(credit, CreditFile):
+                found.append((entity_id, credit))
+            else:
+                missing.append(entity_id)  # Not found, or the fetch failed
+        liabilities, trend = await asyncio.to_thread(self._portfolio_trend, [credit for _, credit in found])
+        for row in trend:
+            row["entity_id"] = found[row.pop("owner")][0]
+        return {
+            "customers": len(found),
+            "liabilities": liabilities,
+            "missing": missing,
+            "trend": trend,
+        }
+
+    def _portfolio_credit_file(self, entity_id: str, entity_data: dict) -> CreditFile:
+        """An entity's credit file: the entity cache's parsed one, else parsed from the fetched records"""
+        credit = self.entity_cache.credit_file(entity_id)
+        return credit if credit is not None else parse_credit_file(entity_data.get("records") or [])
+
+    def _portfolio_trend(self, credit_files: List[CreditFile]) -> tuple:
+        """Liability count and month-over-month trend rows (owner = index into credit_files)"""
+        columns = portfolio_columns(credit_files)
+        return len(columns), table_rows(month_over_month(columns))
+
+    def _register_projection(self, intents: tuple) -> str:
+        """Register the projected entity query for an intent set in the catalog and return its template name"""
+        # Prune against the current schema version (no-op while the hash is unchanged)
+        self.field_planner.set_schema(self.schema_registry.schema, self.schema_registry.schema_hash)
+        template_name, document = self.field_planner.entity_query(intents)
+        self.query_catalog.register(template_name, document)
+        return template_name
+
+    def _fetch_comprehensive_data(self, entity_id: str, query: str, model: Optional[str] = None,
+                                  reserved_tokens: int = 0) -> str:
+        """Fetch comprehensive customer and credit data (sync wrapper)"""
+        return run_sync(self._fetch_comprehensive_data_async(entity_id, query, model, reserved_tokens))
+
+    async def _fetch_comprehensive_data_async(self, entity_id: str, query: str, model: Optional[str] = None,
+                                              reserved_tokens: int = 0) -> str:
         """Fetch comprehensive customer and credit data using schema-based query"""
         print(f"🔍 Fetching comprehensive data for entity: {entity_id}")
 
         try:
+            # A query about specific credit facets only needs those facets plus the status profile
+            credit_intents = self.field_planner.match_intents(query, CREDIT_INTENTS)
+            if credit_intents:
+                intents = ("status",) + credit_intents
+                template_name = self._register_projection(intents)
+                entity_data, _ = await self._fetch_entity_async(template_name, entity_id, "comprehensive", intents)
+                return self._format_fetched_entity(entity_data, query, model, intents, reserved_tokens)
+
             # Build dynamic CREDIT_RESPONSE query based on schema
-            credit_response_query = self._build_credit_response_query()
+            credit_response_query = await self._build_credit_response_query_async()
             comprehensive_query = f"""
             query GetFullCreditData($id: ID!) {{
               entity(input: {{ id: $id }}) {{
@@ -1486,599 +1700,37 @@ Please analyze this customer data and provide a comprehensive response to the us
             }}
             """
 
-            response = requests.post(
-                self.tilores_api_url,
-                headers={"Authorization": f"Bearer {self.get_tilores_token()}"},
-                json={"query": comprehensive_query, "variables": {"id": entity_id}},
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                entity_data = data.get('data', {}).get('entity', {}).get('entity', {})
-
-                if entity_data and entity_data.get('records'):
-                    return self._format_comprehensive_data(entity_data, query)
-                else:
-                    raise Exception("No entity data found in response")
-            else:
-                raise Exception(f"GraphQL request failed: {response.status_code}")
+            # Re-registering is a no-op until the compiled selection changes with the schema
+            self.query_catalog.register("comprehensive", comprehensive_query)
+            entity_data, _ = await self._fetch_entity_async("comprehensive", entity_id, "comprehensive", ("full",))
+            return self._format_fetched_entity(entity_data, query, model, (), reserved_tokens)
 
         except Exception as e:
             print(f"❌ Comprehensive data fetch error: {e}")
             # Fallback to status query for basic customer info
-            return self._process_status_query(f"account status for {query}")
-
-    def _format_comprehensive_data(self, entity_data: dict, query: str) -> str:
-        """Format comprehensive customer and credit data for LLM"""
-        records = entity_data.get('records', [])
-
-        # Extract customer data
-        customer_status = None
-        customer_name = None
-        customer_email = None
-        client_id = None
-        current_product = None
-        enroll_date = None
-
-        # Credit data collections
-        credit_scores = []
-        bureaus = []
-        credit_dates = []
-        credit_limits = []
-        credit_balances = []
-        account_types = []
-        late_payments = []
-        inquiries = []
-        all_credit_liability_data = []
-
-        # Bureau-specific data collections for late payments
-        experian_late_payments = []
-        transunion_late_payments = []
-        equifax_late_payments = []
-
-        # MANDATORY CREDIT SCORE EXTRACTION FORMULA - NEVER EDIT OR REMOVE
-        # Extract ALL credit scores with dates (before filtering to most recent)
-        all_credit_scores = []
-        for record in records:
-            credit_response = record.get("CREDIT_RESPONSE")
-            if credit_response:
-                report_date = credit_response.get("CreditReportFirstIssuedDate", "Unknown Date")
-                credit_score_list = credit_response.get("CREDIT_SCORE", [])
-                if isinstance(credit_score_list, list):
-                    for credit_score in credit_score_list:
-                        score_value = credit_score.get("Value")
-                        score_source = credit_score.get("CreditRepositorySourceType")
-                        score_type = credit_score.get("CreditScoreType", "Unknown")
-                        if score_value and score_source:
-                            all_credit_scores.append({
-                                'bureau': score_source,
-                                'score': score_value,
-                                'date': report_date,
-                                'type': score_type
-                            })
-
-        # HYBRID PROCESSING: Also extract from EQUIFAX_REPORT to restore July 17 data
-        for record in records:
-            equifax_report = record.get("EQUIFAX_REPORT")
-            if equifax_report:
-                report_date = equifax_report.get("REPORT_DATE", "Unknown Date")
-                credit_score_list = equifax_report.get("CREDIT_SCORE", [])
-                if isinstance(credit_score_list, list):
-                    for credit_score in credit_score_list:
-                        score_value = credit_score.get("Value")
-                        if score_value:
-                            all_credit_scores.append({
-                                'bureau': 'Equifax',
-                                'score': score_value,
-                                'date': report_date,
-                                'type': 'Equifax Report',
-                                'source': 'EQUIFAX_REPORT'
-                            })
-                            print(f"🔍 DEBUG: EQUIFAX_REPORT score found: {score_value} ({report_date})")
-
-        print(f"🔍 DEBUG: All credit scores extracted: {len(all_credit_scores)} scores")
-        for score in all_credit_scores:
-            print(f"🔍 DEBUG: {score['bureau']} - {score['score']} ({score['date']}) - {score['type']} {score.get('source', 'CREDIT_RESPONSE')}")
-
-        # UTILIZATION DATA EXTRACTION using PROTECTED PARAMETERS
-        # Extract ALL utilization data with dates (before filtering to most recent)
-        all_utilization_data = []
-        for record in records:
-            credit_response = record.get("CREDIT_RESPONSE")
-            if credit_response:
-                # PROTECTED PARAMETERS - NEVER EDIT OR REMOVE
-                report_date = credit_response.get("CreditReportFirstIssuedDate", "Unknown Date")
-                # Bureau identification MUST use CreditRepositorySourceType from CREDIT_SCORE array (same method as protected credit score algorithm)
-                bureau = "Unknown Bureau"
-                credit_score_list = credit_response.get("CREDIT_SCORE", [])
-                if isinstance(credit_score_list, list) and credit_score_list:
-                    bureau = credit_score_list[0].get("CreditRepositorySourceType", "Unknown Bureau")
-                print(f"🔍 DEBUG: Utilization Report - Date: {report_date}, Bureau: {bureau} (using CreditRepositorySourceType from CREDIT_SCORE)")
-                print(f"🔍 DEBUG: {bureau} CREDIT_RESPONSE keys: {list(credit_response.keys())}")
-
-                # Process CREDIT_SUMMARY for utilization data (Experian/TransUnion with PT016)
-                credit_summary = credit_response.get("CREDIT_SUMMARY")
-                print(f"🔍 DEBUG: {bureau} CREDIT_SUMMARY exists: {credit_summary is not None}, type: {type(credit_summary)}")
-                if credit_summary:
-                    print(f"🔍 DEBUG: {bureau} CREDIT_SUMMARY structure: {list(credit_summary.keys()) if isinstance(credit_summary, dict) else 'Not a dict'}")
-                    if isinstance(credit_summary, dict) and 'DATA_SET' in credit_summary:
-                        data_sets = credit_summary.get("DATA_SET", [])
-                        print(f"🔍 DEBUG: {bureau} CREDIT_SUMMARY.DATA_SET has {len(data_sets)} items")
-                        for i, data_set in enumerate(data_sets[:3]):  # Show first 3 items
-                            print(f"🔍 DEBUG: {bureau} DATA_SET[{i}]: ID={data_set.get('ID')}, Name={data_set.get('Name')}, Value={data_set.get('Value')}")
-
-                # Handle both dict and list structures for CREDIT_SUMMARY
-                if credit_summary and isinstance(credit_summary, dict):
-                    # New dict structure from GraphQL introspection
-                    data_sets = credit_summary.get("DATA_SET", [])
-                    if isinstance(data_sets, list):
-                        print(f"🔍 DEBUG: {bureau} CREDIT_SUMMARY (dict) has {len(data_sets)} DATA_SET items")
-                        for data_set in data_sets:
-                            name = data_set.get("Name", "")
-                            value = data_set.get("Value", "")
-                            item_id = data_set.get("ID", "")
-
-                            # Debug: Show all utilization-related fields
-                            if "utilization" in name.lower() or item_id == "PT016":
-                                print(f"🔍 DEBUG: {bureau} UTILIZATION FIELD - ID: {item_id}, Name: {name}, Value: {value}")
-
-                            # FLEXIBLE UTILIZATION PROCESSING - Supports multiple bureau patterns
-                            utilization_patterns = [
-                                # Experian/TransUnion pattern
-                                {"id": "PT016", "name_check": lambda n: "utilization" in n.lower() and "revolving" in n.lower()},
-                                # Equifax pattern
-                                {"id": None, "name_check": lambda n: "utilization" in n.lower() and "revolving" in n.lower()},
-                                # Generic utilization pattern (for future bureaus)
-                                {"id": None, "name_check": lambda n: "utilization" in n.lower() and "revolving" in n.lower()}
-                            ]
-
-                            for pattern in utilization_patterns:
-                                if ((pattern["id"] is None and not item_id) or
-                                    (pattern["id"] is not None and item_id == pattern["id"])) and \
-                                   pattern["name_check"](name):
-                                    if value and bureau != "Unknown Bureau":
-                                        all_utilization_data.append({
-                                            'bureau': bureau,
-                                            'utilization': value,
-                                            'date': report_date,
-                                            'type': 'revolving'
-                                        })
-                                        print(f"🔍 DEBUG: Found {bureau} utilization ({pattern['id'] or 'no ID'}) - {value}% ({report_date})")
-                                        break  # Process only the first matching pattern
-
-                elif credit_summary and isinstance(credit_summary, list):
-                    # Legacy list structure (fallback)
-                    print(f"🔍 DEBUG: {bureau} has {len(credit_summary)} CREDIT_SUMMARY sections (legacy list)")
-                    for summary in credit_summary:
-                        data_sets = summary.get("DATA_SET", [])
-                        if isinstance(data_sets, list):
-                            print(f"🔍 DEBUG: {bureau} CREDIT_SUMMARY has {len(data_sets)} DATA_SET items")
-                            for data_set in data_sets:
-                                name = data_set.get("Name", "")
-                                value = data_set.get("Value", "")
-                                item_id = data_set.get("ID", "")
-                                data_type = data_set.get("Type", "")
-
-                                # Debug: Show all utilization-related fields
-                                if "utilization" in name.lower() or item_id == "PT016":
-                                    print(f"🔍 DEBUG: {bureau} UTILIZATION FIELD - ID: {item_id}, Name: {name}, Value: {value}, Type: {data_type}")
-
-                                # Experian/TransUnion: ID="PT016", Type="creditSummary"
-                                if item_id == "PT016" and "Utilization on revolving trades" in name and data_type == "creditSummary":
-                                    if value and bureau != "Unknown Bureau":
-                                        all_utilization_data.append({
-                                            'bureau': bureau,
-                                            'utilization': value,
-                                            'date': report_date,
-                                            'type': 'revolving'
-                                        })
-                                        print(f"🔍 DEBUG: Found {bureau} utilization (PT016) - {value}% ({report_date})")
-
-                # Process CREDIT_ATTRIBUTES for utilization data (Equifax without ID)
-                credit_attributes = credit_response.get("CREDIT_ATTRIBUTES")
-                print(f"🔍 DEBUG: {bureau} CREDIT_ATTRIBUTES exists: {credit_attributes is not None}, type: {type(credit_attributes)}")
-                if credit_attributes and isinstance(credit_attributes, list):
-                    print(f"🔍 DEBUG: {bureau} has {len(credit_attributes)} CREDIT_ATTRIBUTES sections")
-                    for attribute in credit_attributes:
-                        data_sets = attribute.get("DATA_SET", [])
-                        if isinstance(data_sets, list):
-                            print(f"🔍 DEBUG: {bureau} CREDIT_ATTRIBUTES has {len(data_sets)} DATA_SET items")
-                            for data_set in data_sets:
-                                name = data_set.get("Name", "")
-                                value = data_set.get("Value", "")
-                                item_id = data_set.get("ID", "")
-                                data_type = data_set.get("Type", "")
-
-                                # Debug: Show all utilization-related fields
-                                if "utilization" in name.lower():
-                                    print(f"🔍 DEBUG: {bureau} UTILIZATION FIELD - ID: {item_id}, Name: {name}, Value: {value}, Type: {data_type}")
-
-                                # Equifax: NO ID, Type="creditAttributes"
-                                if not item_id and "Utilization on revolving trades" in name and data_type == "creditAttributes":
-                                    if value and bureau != "Unknown Bureau":
-                                        all_utilization_data.append({
-                                            'bureau': bureau,
-                                            'utilization': value,
-                                            'date': report_date,
-                                            'type': 'revolving'
-                                        })
-                                        print(f"🔍 DEBUG: Found {bureau} utilization (creditAttributes) - {value}% ({report_date})")
-
-        print(f"🔍 DEBUG: All utilization data extracted: {len(all_utilization_data)} records")
-
-        # Extract basic customer data from records (non-credit data)
-        for record in records:
-            # Basic customer data extraction (not bureau-specific)
-            if record.get("STATUS"):
-                customer_status = record.get("STATUS")
-            if record.get("FIRST_NAME") and record.get("LAST_NAME"):
-                customer_name = f"{record.get('FIRST_NAME')} {record.get('LAST_NAME')}"
-            if record.get("EMAIL"):
-                customer_email = record.get("EMAIL")
-            if record.get("CLIENT_ID"):
-                client_id = record.get("CLIENT_ID")
-            if record.get("CURRENT_PRODUCT"):
-                current_product = record.get("CURRENT_PRODUCT")
-            if record.get("ENROLL_DATE"):
-                enroll_date = record.get("ENROLL_DATE")
-
-            # Extract non-late-payment credit data (scores, limits, etc.)
-            credit_response = record.get("CREDIT_RESPONSE")
-            if credit_response:
-                # Report dates
-                if credit_response.get("CreditReportFirstIssuedDate"):
-                    credit_dates.append(credit_response.get("CreditReportFirstIssuedDate"))
-
-                # Credit scores (extracted separately from late payments)
-                credit_score_list = credit_response.get("CREDIT_SCORE", [])
-                if isinstance(credit_score_list, list):
-                    for credit_score in credit_score_list:
-                        score_value = credit_score.get("Value")
-                        score_model = credit_score.get("ModelNameType")
-                        score_source = credit_score.get("CreditRepositorySourceType")
-
-                        if score_value:
-                            score_info = f"{score_value}"
-                            if score_source:
-                                score_info += f" ({score_source})"
-                            if score_model:
-                                score_info += f" - {score_model}"
-                            credit_scores.append(score_info)
-
-                # Extract other credit data (account types, limits, balances)
-                credit_liability_list = credit_response.get("CREDIT_LIABILITY", [])
-                if isinstance(credit_liability_list, list) and credit_liability_list:
-                    for liability in credit_liability_list:
-                        if liability.get("AccountType"):
-                            account_types.append(liability.get("AccountType"))
-                        if liability.get("CreditLimitAmount"):
-                            credit_limits.append(liability.get("CreditLimitAmount"))
-                        if liability.get("CreditBalance"):
-                            credit_balances.append(liability.get("CreditBalance"))
-
-                # Credit inquiries
-                credit_inquiry_list = credit_response.get("CREDIT_INQUIRY", [])
-                if isinstance(credit_inquiry_list, list):
-                    for inquiry in credit_inquiry_list:
-                        inquiry_date = inquiry.get("InquiryDate")
-                        subscriber = inquiry.get("SubscriberName")
-                        if inquiry_date and subscriber:
-                            inquiries.append(f"{subscriber} ({inquiry_date})")
-
-        # STANDARDIZED RECORD PROCESSING - UNIFIED APPROACH FOR ALL BUREAUS
-        # Group records by bureau and select the best record for each bureau
-        print(f"🔍 DEBUG: Standardizing processing for {len(records)} records across all bureaus")
-
-        # Group records by bureau
-        bureau_records = {
-            "Experian": [],
-            "TransUnion": [],
-            "Equifax": []
-        }
+            return await self._process_status_query_async(f"account status for {query}")
 
-        # First pass: group records by bureau (HYBRID APPROACH)
-        for record in records:
-            # Check CREDIT_RESPONSE first (standardized approach)
-            credit_response = record.get("CREDIT_RESPONSE")
-            if credit_response:
-                bureau = self._standardize_bureau_identification(credit_response)
-                if bureau in bureau_records:
-                    bureau_records[bureau].append((record, credit_response))
-
-            # Also check EQUIFAX_REPORT for July 17 data (hybrid approach)
-            equifax_report = record.get("EQUIFAX_REPORT")
-            if equifax_report:
-                print(f"🔍 DEBUG: Found EQUIFAX_REPORT data - adding to Equifax processing")
-                # Create a synthetic credit_response from EQUIFAX_REPORT data
-                synthetic_credit_response = {
-                    "CREDIT_BUREAU": "Equifax",
-                    "CreditReportFirstIssuedDate": equifax_report.get("REPORT_DATE", "2025-07-17"),
-                    "CREDIT_SCORE": equifax_report.get("CREDIT_SCORE", []),
-                    "CREDIT_LIABILITY": equifax_report.get("CREDIT_LIABILITY", [])
-                }
-                bureau_records["Equifax"].append((record, synthetic_credit_response))
-
-        # Second pass: select best record for each bureau and process
-        for bureau_name, record_list in bureau_records.items():
-            if record_list:
-                # Select the best record (most complete/recent) for this bureau
-                best_record, best_credit_response = self._select_best_bureau_record(record_list, bureau_name)
-
-                print(f"🔍 DEBUG: Selected best {bureau_name} record: {best_record['id']}")
-                self._process_standardized_bureau_data(best_credit_response, bureau_name, late_payments)
-
-        print(f"🔍 DEBUG: Standardized processing complete - processed {len([r for records in bureau_records.values() for r in records])} records")
-
-        # Remove duplicates and None values
-        credit_scores = list(set([str(s) for s in credit_scores if s is not None]))
-        bureaus = list(set([str(b) for b in bureaus if b is not None]))
-        credit_dates = list(set([str(d) for d in credit_dates if d is not None]))
-        credit_limits = list(set([str(limit) for limit in credit_limits if limit is not None]))
-        credit_balances = list(set([str(b) for b in credit_balances if b is not None]))
-        account_types = list(set([str(a) for a in account_types if a is not None]))
-
-        # Format comprehensive data
-        formatted_data = f"""COMPREHENSIVE CUSTOMER ANALYSIS:
-CUSTOMER: {customer_name or 'Unknown'}
-EMAIL: {customer_email or 'Not provided'}
-CLIENT ID: {client_id or 'Not provided'}
-ACCOUNT STATUS: {customer_status or 'Unknown'}
-PRODUCT: {current_product or 'Not specified'}
-ENROLLMENT DATE: {enroll_date or 'Not provided'}
-
-ACTUAL CREDIT DATA:"""
-
-        # Display ALL credit scores with dates (using protected extraction formula)
-        if all_credit_scores:
-            # Sort by date for chronological display (older → newer)
-            sorted_scores = sorted(all_credit_scores, key=lambda x: (x['bureau'], x['date']))
-            score_display = []
-            for score in sorted_scores:
-                score_display.append(f"{score['score']} ({score['bureau']}) - {score['date']}")
-            formatted_data += f"\nCREDIT SCORES (ALL HISTORICAL): {', '.join(score_display)}"
-
-            # Calculate credit repair progress by bureau (starting vs ending scores)
-            bureau_progress = {}
-            for score in all_credit_scores:
-                bureau = score['bureau']
-                if bureau not in bureau_progress:
-                    bureau_progress[bureau] = {'scores': []}
-                bureau_progress[bureau]['scores'].append({
-                    'score': int(score['score']),
-                    'date': score['date']
-                })
+    def _format_fetched_entity(self, entity_data: Optional[dict], query: str, model: Optional[str] = None,
+                               intents: tuple = (), reserved_tokens: int = 0) -> str:
+        """Format fetched entity data, raising when it carries no records"""
+        if not (entity_data and entity_data.get('records')):
+            raise Exception("No entity data found in response")
+        if not self.context_builder.config["enabled"]:
+            return self._format_comprehensive_data(entity_data, query)
 
-            # Sort scores by date for each bureau and calculate progress
-            progress_display = []
-            for bureau, data in bureau_progress.items():
-                # Sort by date to get chronological order (older → newer)
-                sorted_bureau_scores = sorted(data['scores'], key=lambda x: x['date'])
-                if len(sorted_bureau_scores) >= 2:
-                    starting_score = sorted_bureau_scores[0]['score']
-                    ending_score = sorted_bureau_scores[-1]['score']
-                    starting_date = sorted_bureau_scores[0]['date']
-                    ending_date = sorted_bureau_scores[-1]['date']
-                    change = ending_score - starting_score
-                    change_symbol = "+" if change > 0 else ""
-                    progress_display.append(f"{bureau}: {starting_score} ({starting_date}) → {ending_score} ({ending_date}) = {change_symbol}{change} points")
-                elif len(sorted_bureau_scores) == 1:
-                    score = sorted_bureau_scores[0]['score']
-                    date = sorted_bureau_scores[0]['date']
-                    progress_display.append(f"{bureau}: {score} ({date}) - Single report available")
-
-            if progress_display:
-                formatted_data += f"\nCREDIT REPAIR PROGRESS: {'; '.join(progress_display)}"
-
-            # Calculate utilization progress by bureau (using all_utilization_data)
-            if all_utilization_data:
-                bureau_utilization = {}
-                for util in all_utilization_data:
-                    bureau = util['bureau']
-                    if bureau not in bureau_utilization:
-                        bureau_utilization[bureau] = {'utilizations': []}
-                    bureau_utilization[bureau]['utilizations'].append({
-                        'utilization': util['utilization'],
-                        'date': util['date']
-                    })
-
-                # Sort utilizations by date for each bureau and calculate progress
-                utilization_display = []
-                for bureau, data in bureau_utilization.items():
-                    # Sort by date to get chronological order (older → newer)
-                    sorted_utilizations = sorted(data['utilizations'], key=lambda x: x['date'])
-                    if len(sorted_utilizations) >= 2:
-                        starting_util = sorted_utilizations[0]['utilization']
-                        ending_util = sorted_utilizations[-1]['utilization']
-                        starting_date = sorted_utilizations[0]['date']
-                        ending_date = sorted_utilizations[-1]['date']
-                        utilization_display.append(f"{bureau}: {starting_util}% ({starting_date}) → {ending_util}% ({ending_date})")
-                    elif len(sorted_utilizations) == 1:
-                        util = sorted_utilizations[0]['utilization']
-                        date = sorted_utilizations[0]['date']
-                        utilization_display.append(f"{bureau}: {util}% ({date}) - Single report available")
-
-                if utilization_display:
-                    formatted_data += f"\nUTILIZATION PROGRESS: {'; '.join(utilization_display)}"
-
-        elif credit_scores:
-            formatted_data += f"\nCREDIT SCORES: {', '.join(credit_scores)}"
-        if bureaus:
-            formatted_data += f"\nCREDIT BUREAUS: {', '.join(bureaus)}"
-        if credit_dates:
-            formatted_data += f"\nREPORT DATES: {', '.join(credit_dates)}"
-        if credit_limits:
-            formatted_data += f"\nCREDIT LIMITS: ${', $'.join(credit_limits)}"
-        if credit_balances:
-            formatted_data += f"\nCREDIT BALANCES: ${', $'.join(credit_balances)}"
-        if account_types:
-            formatted_data += f"\nACCOUNT TYPES: {', '.join(account_types)}"
-        if late_payments:
-            formatted_data += f"\nLATE PAYMENTS: {'; '.join(late_payments)}"
-        if inquiries:
-            formatted_data += f"\nRECENT INQUIRIES: {'; '.join(inquiries[:5])}"  # Show first 5
-
-        if not any([credit_scores, bureaus, credit_dates, credit_limits, credit_balances]):
-            formatted_data += "\nNo credit scores currently available in system"
-
-        formatted_data += f"""
-
-CREDIT ANALYSIS CONTEXT:
-This customer is enrolled in credit repair services. Use the actual credit data above to provide specific, personalized analysis.
-If credit scores are available, reference the specific numbers and bureaus.
-If account details are available, reference specific balances, limits, and payment history.
+        context = self.context_builder.build(entity_data['records'], model, intents, reserved_tokens=reserved_tokens)
+        print(f"🔍 Comprehensive context: {context.tokens} tokens (budget {context.budget}, saved {context.saved_tokens} vs. JSON)")
+        return f"""CUSTOMER DATA (compact tables, one row per line, columns in parentheses):
+{context.text}
 
 For the specific query: "{query}"
 Provide detailed analysis using the actual credit data shown above."""
 
-        return formatted_data
-
-    def _standardize_bureau_identification(self, credit_response: dict) -> str:
-        """Standardized bureau identification logic for all three credit bureaus"""
-        # Try multiple identification methods in priority order
-        bureau = credit_response.get("CREDIT_BUREAU", "Unknown Bureau")
-
-        # Fallback 1: CreditRepositorySourceType from CREDIT_SCORE
-        if bureau == "Unknown Bureau":
-            credit_score_list = credit_response.get("CREDIT_SCORE", [])
-            if isinstance(credit_score_list, list) and credit_score_list:
-                bureau = credit_score_list[0].get("CreditRepositorySourceType", "Unknown Bureau")
-
-        # Fallback 2: String matching for known bureau names
-        if bureau == "Unknown Bureau":
-            bureau_field = str(credit_response.get("CREDIT_BUREAU", "")).upper()
-            if "EXPERIAN" in bureau_field:
-                bureau = "Experian"
-            elif "TRANSUNION" in bureau_field or "TRANS UNION" in bureau_field:
-                bureau = "TransUnion"
-            elif "EQUIFAX" in bureau_field:
-                bureau = "Equifax"
-
-        return bureau
-
-    def _select_best_bureau_record(self, record_list: list, bureau_name: str) -> tuple:
-        """Select the best record for a bureau based on data completeness"""
-        if len(record_list) == 1:
-            return record_list[0]
-
-        # Scoring criteria for record selection
-        best_record = None
-        best_score = -1
-
-        for record, credit_response in record_list:
-            score = 0
-
-            # Score based on late payment data completeness
-            credit_liability = credit_response.get("CREDIT_LIABILITY", [])
-            if isinstance(credit_liability, list) and credit_liability:
-                late_payment_count = 0
-                for liability in credit_liability:
-                    late_count = liability.get("LateCount", {})
-                    if late_count.get("Days30", 0) or late_count.get("Days60", 0) or late_count.get("Days90", 0):
-                        late_payment_count += 1
-
-                # Higher score for records with more late payment data
-                score += late_payment_count * 10
-
-                # Prefer records with more liability entries
-                score += len(credit_liability)
-
-            # Prefer records with more recent dates
-            report_date = credit_response.get("CreditReportFirstIssuedDate", "")
-            if report_date:
-                try:
-                    # Simple date comparison (newer dates get higher score)
-                    date_score = int(report_date.replace("-", "")) if report_date else 0
-                    score += date_score // 1000000  # Year component
-                except:
-                    pass
-
-            if score > best_score:
-                best_score = score
-                best_record = (record, credit_response)
-
-        print(f"🔍 DEBUG: {bureau_name} record selection - evaluated {len(record_list)} records, selected {best_record[0]['id']} with score {best_score}")
-        return best_record
-
-    def _process_standardized_bureau_data(self, credit_response: dict, bureau_name: str, late_payments: list):
-        """Standardized processing of bureau data using unified logic"""
-        print(f"🔍 DEBUG: Processing {bureau_name} data using standardized approach")
-
-        # Extract credit liability data
-        credit_liability_list = credit_response.get("CREDIT_LIABILITY", [])
-        print(f"🔍 DEBUG: {bureau_name} - Processing {len(credit_liability_list) if isinstance(credit_liability_list, list) else 0} CREDIT_LIABILITY entries")
-
-        if isinstance(credit_liability_list, list) and len(credit_liability_list) > 0:
-            total_late_30 = 0
-            total_late_60 = 0
-            total_late_90 = 0
-
-            for i, liability in enumerate(credit_liability_list):
-                late_count = liability.get("LateCount", {})
-                days_30 = late_count.get("Days30", 0)
-                days_60 = late_count.get("Days60", 0)
-                days_90 = late_count.get("Days90", 0)
-
-                # Convert string values to int if needed (handles different bureau formats)
-                try:
-                    days_30 = int(days_30) if days_30 else 0
-                    days_60 = int(days_60) if days_60 else 0
-                    days_90 = int(days_90) if days_90 else 0
-                except (ValueError, TypeError):
-                    days_30 = days_60 = days_90 = 0
-
-                total_late_30 += days_30
-                total_late_60 += days_60
-                total_late_90 += days_90
-
-                print(f"🔍 DEBUG: {bureau_name} LIABILITY[{i}]: {liability.get('Creditor', {}).get('Name', 'Unknown')} - {days_30}/{days_60}/{days_90}")
-
-            # Create standardized late payment entry
-            late_payment_entry = f"{bureau_name}: 30-day: {total_late_30}, 60-day: {total_late_60}, 90-day: {total_late_90}"
-            late_payments.append(late_payment_entry)
-            print(f"🔍 DEBUG: {bureau_name} STANDARDIZED TOTAL: {total_late_30}/{total_late_60}/{total_late_90}")
-        else:
-            print(f"🔍 DEBUG: {bureau_name} has no CREDIT_LIABILITY data")
-
-    def _process_bureau_report_data(self, bureau_data: dict, bureau_name: str, late_payments_list: list):
-        """Process bureau-specific report data for late payments (LEGACY - kept for compatibility)"""
-        print(f"🔍 DEBUG: Processing {bureau_name} report data")
-
-        # Extract CREDIT_LIABILITY from bureau-specific report
-        credit_liability = bureau_data.get("CREDIT_LIABILITY", [])
-        print(f"🔍 DEBUG: {bureau_name} CREDIT_LIABILITY: {len(credit_liability) if isinstance(credit_liability, list) else 'Not a list'} entries")
-
-        if isinstance(credit_liability, list) and len(credit_liability) > 0:
-            total_late_30 = 0
-            total_late_60 = 0
-            total_late_90 = 0
-
-            for i, liability in enumerate(credit_liability):
-                late_count = liability.get("LateCount", {})
-                days_30 = late_count.get("Days30", 0)
-                days_60 = late_count.get("Days60", 0)
-                days_90 = late_count.get("Days90", 0)
-
-                print(f"🔍 DEBUG: {bureau_name} LIABILITY[{i}]: LateCount={{Days30: {days_30}, Days60: {days_60}, Days90: {days_90}}}")
-
-                # Convert string values to int if needed
-                try:
-                    days_30 = int(days_30) if days_30 else 0
-                    days_60 = int(days_60) if days_60 else 0
-                    days_90 = int(days_90) if days_90 else 0
-                except (ValueError, TypeError):
-                    days_30 = days_60 = days_90 = 0
-
-                total_late_30 += days_30
-                total_late_60 += days_60
-                total_late_90 += days_90
-
-            # Add to bureau-specific late payments list
-            late_payment_entry = f"{bureau_name}: 30-day: {total_late_30}, 60-day: {total_late_60}, 90-day: {total_late_90}"
-            late_payments_list.append(late_payment_entry)
-            print(f"🔍 DEBUG: {bureau_name} TOTAL LATE PAYMENTS: {total_late_30}/{total_late_60}/{total_late_90}")
-        else:
-            print(f"🔍 DEBUG: {bureau_name} has no CREDIT_LIABILITY data")
+    def _format_comprehensive_data(self, entity_data: dict, query: str) -> str:
+        """Format comprehensive customer and credit data for LLM (one extraction pass over the records)"""
+        extract = extract_credit(entity_data.get('records', []))
+        print(f"🔍 Extracted {len(extract.reports)} credit reports from {len(entity_data.get('records', []))} records")
+        return format_comprehensive_data(extract, query)
 
     def _extract_conversation_context(self, messages: List[Dict[str, Any]]) -> Dict[str, str]:
         """Extract customer context from conversation history"""
@@ -2147,6 +1799,23 @@ Provide detailed analysis using the actual credit data shown above."""
             **self.providers["openai"]
         }
 
+    def _available_models(self) -> List[str]:
+        """Models whose provider has an API key configured"""
+        return [model for provider in self.providers.values() if provider.get("api_key") for model in provider["models"]]
+
+    def _route_model(self, messages: list, max_tokens: int, session_key: Optional[str] = None,
+                     needs_tools: bool = False) -> str:
+        """Pick the model for an LLM call from live router statistics"""
+        # Rough estimate: 4 chars per token
+        min_context = sum(len(str(msg.get("content", ""))) for msg in messages) // 4 + (max_tokens or 0)
+        return self.model_router.route(
+            self._available_models(), needs_tools=needs_tools, min_context=min_context, session_key=session_key
+        )
+
+    async def _probe_model_async(self, model: str):
+        """Minimal completion used by the router's background probes"""
+        await self._call_llm_with_messages_async([{"role": "user", "content": "ping"}], model, 0, 1, probe=True)
+
     def _clean_graphql_suggestions(self, response: str) -> str:
         """
         Clean up GraphQL suggestions from LLM responses for email-based queries.
@@ -2184,87 +1853,230 @@ Provide detailed analysis using the actual credit data shown above."""
         return cleaned_response
 
     def _call_llm_with_messages(self, messages: list, model: str, temperature: float, max_tokens: int) -> str:
-        """Call LLM API with proper provider routing using messages format"""
-        try:
-            # Get the correct provider for this model
-            provider = self._get_provider_for_model(model)
-            provider_name = provider["name"]
-
-            print(f"🤖 DEBUG: Using provider '{provider_name}' for model '{model}'")
-
-            # Prepare headers and payload based on provider
-            if provider_name == "google":
-                headers = {
-                    "Content-Type": "application/json",
-                }
-                # Convert messages to Google format
-                system_msg = next((msg["content"] for msg in messages if msg["role"] == "system"), "")
-                user_msg = next((msg["content"] for msg in messages if msg["role"] == "user"), "")
-
-                payload = {
-                    "contents": [{
-                        "parts": [{
-                            "text": f"System: {system_msg}\n\n{user_msg}"
-                        }]
-                    }],
-                    "generationConfig": {
-                        "temperature": temperature,
-                        "maxOutputTokens": max_tokens,
-                    }
+        """Call LLM API with proper provider routing (sync wrapper)"""
+        return run_sync(self._call_llm_with_messages_async(messages, model, temperature, max_tokens))
+
+    def _build_llm_request(self, provider: dict, messages: list, model: str, temperature: float,
+                           max_tokens: int, stream: bool = False) -> tuple:
+        """Build (url, payload, headers) for a provider, optionally in streaming mode"""
+        if provider["name"] == "google":
+            headers = {
+                "Content-Type": "application/json",
+            }
+            # Convert messages to Google format
+            system_msg = next((msg["content"] for msg in messages if msg["role"] == "system"), "")
+            user_msg = next((msg["content"] for msg in messages if msg["role"] == "user"), "")
+
+            payload = {
+                "contents": [{
+                    "parts": [{
+                        "text": f"System: {system_msg}\n\n{user_msg}"
+                    }]
+                }],
+                "generationConfig": {
+                    "temperature": temperature,
+                    "maxOutputTokens": max_tokens,
                 }
+            }
+            if stream:
+                url = f"{provider['base_url']}/models/{model}:streamGenerateContent?alt=sse&key={provider['api_key']}"
+            else:
                 url = f"{provider['base_url']}/models/{model}:generateContent?key={provider['api_key']}"
-                response = requests.post(url, json=payload, timeout=30)
+            return url, payload, headers
 
-            else:
-                # OpenAI-compatible providers (OpenAI, Groq)
-                headers = {
-                    "Authorization": f"Bearer {provider['api_key']}",
-                    "Content-Type": "application/json"
-                }
+        # OpenAI-compatible providers (OpenAI, Groq)
+        headers = {
+            "Authorization": f"Bearer {provider['api_key']}",
+            "Content-Type": "application/json"
+        }
 
-                payload = {
-                    "model": model,
-                    "messages": messages,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens
-                }
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if stream:
+            payload["stream"] = True
 
-                response = requests.post(
-                    f"{provider['base_url']}/chat/completions",
-                    json=payload,
-                    headers=headers,
-                    timeout=30
-                )
+        return f"{provider['base_url']}/chat/completions", payload, headers
 
-            response.raise_for_status()
-            result = response.json()
+    async def _request_llm_async(self, messages: list, model: str, temperature: float, max_tokens: int,
+                                 probe: bool = False) -> str:
+        """One completion request to the model's provider (raises on errors, records router stats)"""
+        provider = self._get_provider_for_model(model)
+        provider_name = provider["name"]
+        start_time = time.time()
+
+        print(f"🤖 DEBUG: Using provider '{provider_name}' for model '{model}'")
+
+        try:
+            url, payload, headers = self._build_llm_request(provider, messages, model, temperature, max_tokens)
+            _, result = await self._http_post_async(
+                url, timeout=30, upstream=provider_name, json=payload, headers=headers
+            )
 
             # Extract content based on provider response format
             if provider_name == "google":
-                return result["candidates"][0]["content"]["parts"][0]["text"]
+                content = result["candidates"][0]["content"]["parts"][0]["text"]
             else:
-                return result["choices"][0]["message"]["content"]
+                content = result["choices"][0]["message"]["content"]
+        except asyncio.CancelledError:
+            # Lost a hedge race: the elapsed time understates this model's latency - count, don't sample
+            self.model_router.record_cancelled(model)
+            raise
+        except Exception:
+            self.model_router.record(model, None, success=False, probe=probe)
+            raise
+        self.model_router.record(model, (time.time() - start_time) * 1000, probe=probe)
+        return content
+
+    def _hedge_partner(self, model: str, messages: list, max_tokens: int) -> Optional[str]:
+        """Fastest healthy model on a different provider, for hedging and failover"""
+        primary_provider = self._get_provider_for_model(model)["name"]
+        candidates = [
+            candidate for candidate in self._available_models()
+            if self._get_provider_for_model(candidate)["name"] != primary_provider
+        ]
+        if not candidates:
+            return None
+        min_context = sum(len(str(msg.get("content", ""))) for msg in messages) // 4 + (max_tokens or 0)
+        healthy = [
+            candidate for candidate in self.model_router.eligible(candidates, min_context=min_context)
+            if self.model_router.is_healthy(candidate)
+        ]
+        return healthy[0] if healthy else None
+
+    async def _call_llm_with_messages_async(self, messages: list, model: str, temperature: float, max_tokens: int,
+                                            probe: bool = False, cache_key: Optional[AnswerKey] = None) -> str:
+        """Call LLM API with proper provider routing using messages format (hedged/failover when enabled)"""
+        provider_name = "unknown"
+        try:
+            provider_name = self._get_provider_for_model(model)["name"]
+            if probe:
+                return await self._request_llm_async(messages, model, temperature, max_tokens, probe=True)
+
+            prompt_tokens = sum(len(str(msg.get("content", ""))) for msg in messages) // 4
+            answer = await self.llm_hedger.call(
+                model,
+                self._hedge_partner(model, messages, max_tokens),
+                lambda candidate: self._request_llm_async(messages, candidate, temperature, max_tokens),
+                prompt_tokens,
+            )
+            # Only successful answers reach the cache; errors below are returned as text
+            if cache_key is not None:
+                await self.answer_cache.put(cache_key, answer, self._get_async_redis_client())
+            return answer
 
         except Exception as e:
             return f"Error calling {provider_name} API: {str(e)}"
 
+    async def _http_stream_lines_async(self, url: str, upstream: str, **kwargs) -> AsyncIterator[str]:
+        """POST and yield the response body line by line as it arrives (for SSE)"""
+        # No total timeout for streams - only bound connect time and the gap between chunks
+        client_timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=30)
+        session = self.http_clients.get_async_session(upstream)
+        async with session.post(url, timeout=client_timeout, **kwargs) as response:
+            response.raise_for_status()
+            async for raw_line in response.content:
+                line = raw_line.decode("utf-8").strip()
+                if line:
+                    yield line
+
+    async def _stream_llm_raw_async(self, messages: list, model: str, temperature: float,
+                                    max_tokens: int) -> AsyncIterator[str]:
+        """Stream content deltas from one provider (raises on errors, records router stats)"""
+        provider = self._get_provider_for_model(model)
+        provider_name = provider["name"]
+
+        print(f"🤖 DEBUG: Streaming from provider '{provider_name}' for model '{model}'")
+        start_time = time.time()
+        ttft_ms = None
+
+        url, payload, headers = self._build_llm_request(
+            provider, messages, model, temperature, max_tokens, stream=True
+        )
+
+        try:
+            async for line in self._http_stream_lines_async(url, provider_name, json=payload, headers=headers):
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+
+                event = json.loads(data)
+                if provider_name == "google":
+                    parts = (event.get("candidates") or [{}])[0].get("content", {}).get("parts", [])
+                    delta = "".join(part.get("text", "") for part in parts)
+                else:
+                    choices = event.get("choices") or [{}]
+                    delta = (choices[0].get("delta") or {}).get("content")
+
+                if delta:
+                    if ttft_ms is None:
+                        ttft_ms = (time.time() - start_time) * 1000
+                    yield delta
+        except (asyncio.CancelledError, GeneratorExit):
+            self.model_router.record_cancelled(model)
+            raise
+        except Exception:
+            self.model_router.record(model, None, success=False)
+            raise
+
+        self.model_router.record(model, (time.time() - start_time) * 1000, ttft_ms=ttft_ms)
+
+    async def _stream_llm_with_messages_async(self, messages: list, model: str, temperature: float,
+                                              max_tokens: int, cache_key: Optional[AnswerKey] = None) -> AsyncIterator[str]:
+        """Stream content deltas straight from the provider (OpenAI/Groq SSE, Gemini streamGenerateContent)"""
+        provider_name = "unknown"
+        try:
+            provider_name = self._get_provider_for_model(model)["name"]
+            prompt_tokens = sum(len(str(msg.get("content", ""))) for msg in messages) // 4
+            stream = self.llm_hedger.stream(
+                model,
+                self._hedge_partner(model, messages, max_tokens),
+                lambda candidate: self._stream_llm_raw_async(messages, candidate, temperature, max_tokens),
+                prompt_tokens,
+            )
+            if cache_key is not None:
+                # Cached only when the whole stream completes without an upstream error
+                stream = self.answer_cache.store_stream(stream, cache_key, self._get_async_redis_client())
+            async for delta in stream:
+                yield delta
+
+        except Exception as e:
+            yield f"Error calling {provider_name} API: {str(e)}"
+
+    async def _track_stream_on_completion(self, stream: AsyncIterator[str], command: str,
+                                          query: str) -> AsyncIterator[str]:
+        """Pass a streamed answer through and track it in Langfuse once complete"""
+        collected = []
+        async for delta in stream:
+            collected.append(delta)
+            yield delta
+        track_slash_command_with_metadata(command, query, response_data="".join(collected))
+
     def _call_llm(self, prompt: str, model: str, temperature: float, max_tokens: int) -> str:
         """Legacy method for backward compatibility - converts prompt to messages format"""
         messages = [{"role": "system", "content": prompt}]
         return self._call_llm_with_messages(messages, model, temperature, max_tokens)
 
-    async def _generate_streaming_response(self, response_content: str, request_id: str, model: str):
-        """Generate streaming response chunks"""
+    async def _call_llm_async(self, prompt: str, model: str, temperature: float, max_tokens: int) -> str:
+        """Async variant of the legacy prompt-based LLM call"""
+        messages = [{"role": "system", "content": prompt}]
+        return await self._call_llm_with_messages_async(messages, model, temperature, max_tokens)
 
-        # Split response into chunks for streaming
-        words = response_content.split()
-        chunk_size = 10  # Words per chunk
+    async def _generate_streaming_response(self, response_content: Union[str, AsyncIterator[str]],
+                                           request_id: str, model: str):
+        """
+        Generate OpenAI-compatible SSE chunks
 
-        for i in range(0, len(words), chunk_size):
-            chunk_words = words[i:i + chunk_size]
-            chunk_content = " " + " ".join(chunk_words) if i > 0 else " ".join(chunk_words)
+        Upstream deltas are forwarded as soon as they arrive; a plain string
+        (help text, errors, deterministic answers) is sent as a single chunk.
+        """
 
-            # Create SSE-formatted chunk
+        def build_chunk(delta: dict, finish_reason: Optional[str] = None) -> str:
             chunk_data = {
                 "id": request_id,
                 "object": "chat.completion.chunk",
@@ -2273,33 +2085,23 @@ Provide detailed analysis using the actual credit data shown above."""
                 "choices": [
                     {
                         "index": 0,
-                        "delta": {
-                            "content": chunk_content
-                        },
-                        "finish_reason": None
+                        "delta": delta,
+                        "finish_reason": finish_reason
                     }
                 ]
             }
+            return f"data: {json.dumps(chunk_data)}\n\n"
 
-            yield f"data: {json.dumps(chunk_data)}\n\n"
-            await asyncio.sleep(0.05)  # Small delay for streaming effect
+        yield build_chunk({"role": "assistant"})
 
-        # Send final chunk
-        final_chunk = {
-            "id": request_id,
-            "object": "chat.completion.chunk",
-            "created": int(time.time()),
-            "model": model,
-            "choices": [
-                {
-                    "index": 0,
-                    "delta": {},
-                    "finish_reason": "stop"
-                }
-            ]
-        }
+        if isinstance(response_content, str):
+            yield build_chunk({"content": response_content})
+        else:
+            async for delta in response_content:
+                yield build_chunk({"content": delta})
 
-        yield f"data: {json.dumps(final_chunk)}\n\n"
+        # Send final chunk
+        yield build_chunk({}, finish_reason="stop")
         yield "data: [DONE]\n\n"
 
 
@@ -2473,8 +2275,25 @@ async def lifespan(app: FastAPI):
     print("🌐 Server will bind to 0.0.0.0:8080")
     if langfuse_client:
         print("📊 Langfuse metadata tracking active")
+    if os.getenv("HTTP_PREWARM", "true").lower() == "true":
+        await api.http_clients.prewarm()
+    if api.tilores_api_url:
+        # Load the schema before the first request and keep it fresh in the background
+        schema = await api.schema_registry.get_schema_async(
+            api._introspect_graphql_schema_async, api._get_async_redis_client()
+        )
+        if schema:
+            # Catch template/schema drift at boot rather than on the first customer request
+            api.query_catalog.validate(schema, api.schema_registry.schema_hash)
+            api.field_planner.set_schema(schema, api.schema_registry.schema_hash)
+        api.schema_registry.start_background_refresh(api._introspect_graphql_schema_async, api._get_async_redis_client)
+    api.model_router.start_probes(api._available_models, api._probe_model_async)
     yield
     print("🛑 Application shutting down...")
+    await api.model_router.stop_probes()
+    await api.schema_registry.stop_background_refresh()
+    await api.http_clients.close()
+    await services.shutdown_async()
 
 app = FastAPI(
     title="Multi-Provider Credit Analysis API with Agenta.ai SDK",
@@ -2492,8 +2311,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global API instance
+# Global API instance (shared with core_app.run_chain through the service container)
 api = MultiProviderCreditAPI()
+services = get_service_container()
+services.provide("credit_api", api)
 
 # Include webhook router if available
 if WEBHOOK_INTEGRATION and webhook_router:
@@ -2563,6 +2384,52 @@ async def list_models():
     }
 
 
+@app.get("/v1/metrics")
+async def performance_metrics():
+    """Performance metrics for the request pipeline"""
+    return {
+        "http_clients": api.http_clients.get_stats(),
+        "schema_registry": api.schema_registry.get_stats(),
+        "graphql_queries": api.query_catalog.get_stats(),
+        "field_projection": api.field_planner.get_stats(),
+        "entity_cache": api.entity_cache.get_stats(),
+        "resolution_cache": api.resolution_cache.get_stats(),
+        "answer_cache": api.answer_cache.get_stats(),
+        "credit_context": api.context_builder.get_stats(),
+        "fast_path": api.fast_path.get_stats(),
+        "tilores_token": api.token_manager.get_stats(),
+        "services": services.get_stats(),
+        "tool_runtime": services.get("tool_runtime").get_stats(),
+        "tool_prefetch": services.get("tool_prefetch").get_stats(),
+        "model_pool": services.get("model_pool").get_stats(),
+        "single_flight": {
+            "chat": api.chat_flight.get_stats(),
+            "tilores": api.tilores_flight.get_stats()
+        },
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/v1/router/stats")
+async def router_stats():
+    """Model routing decisions and per-model latency/health statistics"""
+    return {
+        **api.model_router.get_stats(),
+        "hedging": api.llm_hedger.get_stats(),
+        "available_models": api._available_models(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.post("/v1/credit/portfolio")
+async def credit_portfolio(portfolio_request: CreditPortfolioRequest):
+    """Month-over-month late-payment, balance and revolving-utilization trends for a batch of entities"""
+    entity_ids = list(dict.fromkeys(portfolio_request.entity_ids))
+    if not entity_ids or len(entity_ids) > PORTFOLIO_MAX_ENTITIES:
+        raise HTTPException(status_code=400, detail=f"Send 1 to {PORTFOLIO_MAX_ENTITIES} entity IDs")
+    return {**await api.credit_portfolio_async(entity_ids), "timestamp": datetime.now().isoformat()}
+
+
 @app.post("/v1/clear-cache")
 async def clear_cache():
     """Manual endpoint to clear memory cache for testing"""
@@ -2571,8 +2438,7 @@ async def clear_cache():
         cache_flushed = api.redis_client.flushdb()
 
         # Clear memory cache
-        cache_count = len(api.query_cache)
-        api.query_cache.clear()
+        cache_count = api.answer_cache.clear()
 
         return {
             "success": True,
@@ -2755,15 +2621,21 @@ async def chat_completions(request: Request):
                 print(f"🔍 DEBUG: Enhanced query: '{query}' -> '{enhanced_query}'")
                 query = enhanced_query
 
-        # Process the request with agent and Agenta.ai integration
-        response_content = api.process_chat_request(
+        # X-Cache-Bypass: true (or Cache-Control: no-cache) regenerates the answer instead of reusing one
+        if bypass_requested(request.headers):
+            set_bypass(True)
+            print("🔍 DEBUG: Answer cache bypassed for this request")
+
+        # Process the request with agent and Agenta.ai integration (non-blocking)
+        response_content = await api.process_chat_request_async(
             query=query,
             model=model,
             temperature=temperature,
             max_tokens=max_tokens,
             prompt_id=prompt_id,
             prompt_version=prompt_version,
-            agent_type=agent_type
+            agent_type=agent_type,
+            stream=bool(stream)
         )
 
         # Handle streaming vs non-streaming response
@@ -2771,7 +2643,7 @@ async def chat_completions(request: Request):
             request_id = f"chatcmpl-{uuid.uuid4().hex[:29]}"
             return StreamingResponse(
                 api._generate_streaming_response(response_content, request_id, model),
-                media_type="text/plain",
+                media_type="text/event-stream",
                 headers={
                     "Cache-Control": "no-cache",
                     "Connection": "keep-alive",
@@ -19,11 +19,14 @@ import requests
 from datetime import datetime
 from typing import Dict, Any, Optional
 
+from utils.http_clients import get_http_client_registry
+
 class LangfuseTraceRetriever:
     def __init__(self):
         self.secret_key = os.getenv('LANGFUSE_SECRET_KEY')
         self.public_key = os.getenv('LANGFUSE_PUBLIC_KEY')
         self.host = os.getenv('LANGFUSE_HOST', 'https://us.cloud.langfuse.com')
+        self.session = get_http_client_registry().get_sync_session('langfuse')
         
         if not all([self.secret_key, self.public_key]):
             raise ValueError("Missing Langfuse credentials. Set LANGFUSE_SECRET_KEY and LANGFUSE_PUBLIC_KEY")
@@ -34,7 +37,7 @@ class LangfuseTraceRetriever:
         
         try:
             # Use basic auth with public_key:secret_key
-            response = requests.get(url, auth=(self.public_key, self.secret_key), timeout=10)
+            response = self.session.get(url, auth=(self.public_key, self.secret_key), timeout=10)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -240,72 +240,32 @@ def determine_finish_reason(content: str, max_tokens: Optional[int] = None) -> s
 
 
 async def generate_streaming_response(request: ChatCompletionRequest, content: str):
-    """Generate Server-Sent Events for streaming responses"""
+    """Generate Server-Sent Events for a finished answer (sent as one content chunk)"""
 
     # Generate unique ID and metadata
     response_id = generate_unique_id()
     created = int(datetime.utcnow().timestamp())
     system_fp = get_system_fingerprint()
 
-    # Split content into chunks for streaming
-    words = content.split()
-    chunk_size = max(1, len(words) // 10)  # ~10 chunks
-
-    # Send opening chunk
-    opening_chunk = {
-        "id": response_id,
-        "object": "chat.completion.chunk",
-        "created": created,
-        "model": request.model,
-        "system_fingerprint": system_fp,
-        "choices": [{"index": 0, "delta": {"role": "assistant"}, "logprobs": None, "finish_reason": None}],
-    }
-    yield f"data: {json.dumps(opening_chunk)}\n\n"
-
-    # Send content chunks
-    for i in range(0, len(words), chunk_size):
-        chunk_words = words[i : i + chunk_size]
-        chunk_content = " ".join(chunk_words)
-        if i > 0:  # Add space before non-first chunks
-            chunk_content = " " + chunk_content
-
+    def build_chunk(delta: dict, finish_reason: Optional[str] = None) -> str:
         chunk_data = {
             "id": response_id,
             "object": "chat.completion.chunk",
             "created": created,
             "model": request.model,
             "system_fingerprint": system_fp,
-            "choices": [
-                {
-                    "index": 0,
-                    "delta": {"content": chunk_content},
-                    "logprobs": None,
-                    "finish_reason": None,
-                }
-            ],
+            "choices": [{"index": 0, "delta": delta, "logprobs": None, "finish_reason": finish_reason}],
         }
+        return f"data: {json.dumps(chunk_data)}\n\n"
 
-        yield f"data: {json.dumps(chunk_data)}\n\n"
-        await asyncio.sleep(0.02)  # Optimized 20ms delay for faster streaming
+    # Send opening chunk
+    yield build_chunk({"role": "assistant"})
 
-    # Send final chunk with finish reason
-    final_chunk = {
-        "id": response_id,
-        "object": "chat.completion.chunk",
-        "created": created,
-        "model": request.model,
-        "system_fingerprint": system_fp,
-        "choices": [
-            {
-                "index": 0,
-                "delta": {},
-                "logprobs": None,
-                "finish_reason": determine_finish_reason(content, request.max_tokens),
-            }
-        ],
-    }
+    # Send the content without artificial delays
+    yield build_chunk({"content": content})
 
-    yield f"data: {json.dumps(final_chunk)}\n\n"
+    # Send final chunk with finish reason
+    yield build_chunk({}, finish_reason=determine_finish_reason(content, request.max_tokens))
     yield "data: [DONE]\n\n"
 
 
@@ -419,7 +379,7 @@ async def chat_completions(chat_request: dict):
             monitor.end_timer(timer_id, success=True)
             return StreamingResponse(
                 generate_streaming_response(chat_request, content),
-                media_type="text/plain",
+                media_type="text/event-stream",
                 headers={"Cache-Control": "no-cache"},
             )
 
@@ -0,0 +1,260 @@
+"""
+LLM Answer Cache for Tilores_X
+Caches final slash-command answers keyed by question, agent, model, prompt version
+and the entity data content hash, so an answer is never served for changed data
+"""
+
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Mapping, Optional, Tuple
+
+from utils.similarity_cache import SimilarityIndex, get_similarity_index
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_CONFIG = {
+    "enabled": os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true",
+    "ttl": float(os.getenv("ANSWER_CACHE_TTL", "3600")),  # Safety net; data changes already change the key (s)
+    "max_entries": int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500")),  # L1 LRU size
+    "max_answer_chars": int(os.getenv("ANSWER_CACHE_MAX_ANSWER_CHARS", "20000")),  # Larger answers aren't cached
+    "version": os.getenv("ANSWER_CACHE_VERSION", "2"),  # Bump when the data-context template changes
+}
+
+BYPASS_HEADER = "x-cache-bypass"
+
+# Set per request from the bypass header; bypassed requests skip reads but refresh the entry
+_bypass: contextvars.ContextVar[bool] = contextvars.ContextVar("answer_cache_bypass", default=False)
+
+
+def bypass_requested(headers: Mapping[str, str]) -> bool:
+    """Whether request headers ask to skip cached answers (X-Cache-Bypass or Cache-Control: no-cache)"""
+    if headers.get(BYPASS_HEADER, "").strip().lower() in ("1", "true", "yes"):
+        return True
+    cache_control = headers.get("cache-control", "").lower()
+    return "no-cache" in cache_control or "no-store" in cache_control
+
+
+def set_bypass(bypass: bool) -> contextvars.Token:
+    """Mark the current request as bypassing the answer cache"""
+    return _bypass.set(bypass)
+
+
+def is_bypassed() -> bool:
+    return _bypass.get()
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+def prompt_version(system_prompt: str, temperature: float, max_tokens: Optional[int]) -> str:
+    """Version of the prompt configuration an answer was generated with"""
+    payload = json.dumps([system_prompt, temperature, max_tokens, ANSWER_CACHE_CONFIG["version"]])
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    """Question plus the scope (agent, model, prompt version, data version) it was answered in"""
+
+    question: str
+    scope: str
+
+    @property
+    def digest(self) -> str:
+        payload = json.dumps([normalize_question(self.question), self.scope])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class AnswerCache:
+    """
+    Two-level (in-process LRU + Redis) cache of final LLM answers
+
+    Keys combine the normalized question, agent type, model, prompt version
+    and the content hash of the entity data the answer was built from. Any
+    change to the customer's records or to the prompt produces a new key, so
+    stale answers are unreachable rather than invalidated. With the similarity
+    tier enabled, an exact miss falls back to a near-duplicate question answered
+    in the same scope.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, similarity: Optional[SimilarityIndex] = None):
+        """
+        Initialize the cache
+
+        Args:
+            config: Optional configuration overriding ANSWER_CACHE_CONFIG
+            similarity: Near-duplicate index (default: the global index when SIMILARITY_CACHE_ENABLED)
+        """
+        self.config = {**ANSWER_CACHE_CONFIG, **(config or {})}
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()  # digest -> (answer, stored at)
+        if similarity is None:
+            similarity = get_similarity_index()
+        self.similarity = similarity if similarity.config["enabled"] else None
+
+        # Statistics
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "similar_hits": 0,
+            "l1_hits": 0,
+            "redis_hits": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "skipped_too_large": 0,
+            "evictions": 0,
+            "redis_errors": 0,
+            "by_category": {},
+        }
+
+        logger.info(
+            f"🗃️ Answer cache initialized (ttl: {self.config['ttl']}s, "
+            f"max entries: {self.config['max_entries']}, enabled: {self.config['enabled']})"
+        )
+
+    @staticmethod
+    def make_key(question: str, agent_type: Optional[str], model: str, version: str, content_hash: str) -> AnswerKey:
+        scope = hashlib.sha256(json.dumps([agent_type, model, version, content_hash]).encode()).hexdigest()
+        return AnswerKey(question, scope)
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return f"tilores:answer:{key}"
+
+    def _count(self, category: Optional[str], outcome: str, similar: bool = False):
+        category_stats = self.stats["by_category"].setdefault(
+            category or "general", {"hits": 0, "misses": 0, "similar_hits": 0}
+        )
+        for stats in (self.stats, category_stats):
+            stats[outcome] += 1
+            stats["similar_hits"] += similar
+
+    def _remember(self, key: str, answer: str, stored_at: float):
+        self._entries[key] = (answer, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.config["max_entries"]:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def _read(self, digest: str, redis_client: Optional[Any]) -> Optional[str]:
+        """Answer for a digest from L1, then Redis"""
+        entry = self._entries.get(digest)
+        if entry is not None:
+            if time.time() - entry[1] < self.config["ttl"]:
+                self._entries.move_to_end(digest)
+                self.stats["l1_hits"] += 1
+                return entry[0]
+            del self._entries[digest]
+
+        if redis_client is not None:
+            try:
+                raw = await redis_client.get(self._redis_key(digest))
+                if raw:
+                    answer = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+                    self._remember(digest, answer, time.time())
+                    self.stats["redis_hits"] += 1
+                    return answer
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.warning(f"⚠️ Answer cache Redis read failed: {e}")
+        return None
+
+    async def get(self, key: AnswerKey, category: Optional[str] = None,
+                  redis_client: Optional[Any] = None) -> Optional[str]:
+        """
+        Cached answer for a key, or None (always None when disabled or bypassed)
+
+        Args:
+            key: make_key(...) result
+            category: Slash-command category for per-category hit rates
+            redis_client: Optional redis.asyncio client for the shared tier
+        """
+        if not self.config["enabled"]:
+            return None
+        if is_bypassed():
+            self.stats["bypassed"] += 1
+            return None
+
+        answer = await self._read(key.digest, redis_client)
+        similar = False
+        if answer is None and self.similarity is not None:
+            match = self.similarity.find(key.scope, key.question)
+            if match is not None:
+                answer = await self._read(match[0], redis_client)
+                similar = answer is not None
+
+        self._count(category, "hits" if answer is not None else "misses", similar)
+        return answer
+
+    async def put(self, key: AnswerKey, answer: str, redis_client: Optional[Any] = None):
+        """Store a complete answer in both tiers (and index its question for similar lookups)"""
+        if not self.config["enabled"] or not answer:
+            return
+        if len(answer) > self.config["max_answer_chars"]:
+            self.stats["skipped_too_large"] += 1
+            return
+        digest = key.digest
+        self._remember(digest, answer, time.time())
+        self.stats["stores"] += 1
+        if self.similarity is not None:
+            self.similarity.add(key.scope, key.question, digest)
+        if redis_client is not None:
+            try:
+                await redis_client.setex(self._redis_key(digest), max(1, int(self.config["ttl"])), answer)
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.warning(f"⚠️ Answer cache Redis write failed: {e}")
+        logger.debug(f"💾 Cached answer {digest[:8]}")
+
+    async def store_stream(self, stream: AsyncIterator[str], key: AnswerKey,
+                           redis_client: Optional[Any] = None) -> AsyncIterator[str]:
+        """Pass a streamed answer through and cache it once it has completed without error"""
+        collected = []
+        async for delta in stream:
+            collected.append(delta)
+            yield delta
+        await self.put(key, "".join(collected), redis_client)
+
+    def clear(self) -> int:
+        """Drop every in-process answer; returns how many were held"""
+        count = len(self._entries)
+        self._entries.clear()
+        if self.similarity is not None:
+            self.similarity.clear()
+        return count
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics with overall and per-category hit rates"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "enabled": self.config["enabled"],
+            "entries": len(self._entries),
+            "hit_rate": round(self.stats["hits"] / max(1, lookups) * 100, 1),
+            "similarity": self.similarity.get_stats() if self.similarity is not None else {"enabled": False},
+            "by_category": {
+                category: {
+                    **counts,
+                    "hit_rate": round(counts["hits"] / max(1, counts["hits"] + counts["misses"]) * 100, 1),
+                }
+                for category, counts in self.stats["by_category"].items()
+            },
+        }
+
+
+# Global instance
+_answer_cache = None
+
+
+def get_answer_cache() -> AnswerCache:
+    """Get or create the global answer cache"""
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = AnswerCache()
+    return _answer_cache
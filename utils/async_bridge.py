@@ -0,0 +1,131 @@
+"""
+Async Bridge for Synchronous Call Sites
+Runs coroutines from sync code (core_app.run_chain, scripts) on one long-lived
+background event loop instead of creating a new loop per call
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBridge:
+    """
+    Owns a background event loop thread and executes coroutines on it
+
+    Async-native components (HTTP sessions, Redis clients, locks) are bound to
+    the loop they were created on, so sync callers must always reuse the same
+    loop to keep connection pools warm between calls.
+    """
+
+    def __init__(self, name: str = "tilores-async-bridge"):
+        """
+        Initialize the bridge (the loop thread starts lazily)
+
+        Args:
+            name: Name of the background thread
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.stats = {"calls": 0, "errors": 0}
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the background loop, starting its thread on first use"""
+        if self._loop is not None and self._thread is not None and self._thread.is_alive():
+            return self._loop
+
+        with self._lock:
+            if self._loop is None or self._thread is None or not self._thread.is_alive():
+                ready = threading.Event()
+                self._loop = asyncio.new_event_loop()
+
+                def run_loop(loop: asyncio.AbstractEventLoop):
+                    asyncio.set_event_loop(loop)
+                    ready.set()
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run_loop, args=(self._loop,), name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+                logger.info(f"🔁 Async bridge loop started ({self.name})")
+
+        return self._loop
+
+    def submit(self, coro: Coroutine) -> Future:
+        """
+        Schedule a coroutine on the background loop
+
+        Args:
+            coro: Coroutine to execute
+
+        Returns:
+            concurrent.futures.Future resolving to the coroutine result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.get_loop())
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine to completion from synchronous code
+
+        Args:
+            coro: Coroutine to execute
+            timeout: Optional timeout in seconds
+
+        Returns:
+            The coroutine result
+        """
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is not None and running_loop is self._loop:
+            coro.close()
+            raise RuntimeError("AsyncBridge.run() called from the bridge loop itself - await the coroutine instead")
+
+        self.stats["calls"] += 1
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except Exception:
+            self.stats["errors"] += 1
+            future.cancel()
+            raise
+
+    def shutdown(self):
+        """Stop the background loop and join its thread"""
+        with self._lock:
+            if self._loop is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            if self._thread is not None:
+                self._thread.join(timeout=5)
+            self._loop.close()
+            self._loop = None
+            self._thread = None
+            logger.info(f"🛑 Async bridge loop stopped ({self.name})")
+
+
+# Global instance
+_async_bridge = None
+
+
+def get_async_bridge() -> AsyncBridge:
+    """Get or create the global async bridge"""
+    global _async_bridge
+    if _async_bridge is None:
+        _async_bridge = AsyncBridge()
+    return _async_bridge
+
+
+def run_sync(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine from synchronous code on the shared bridge loop"""
+    return get_async_bridge().run(coro, timeout)
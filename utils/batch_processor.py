@@ -10,6 +10,8 @@ from typing import Any, Dict, List
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 
+from utils.graphql_queries import execute_catalog_query
+
 logger = logging.getLogger(__name__)
 
 
@@ -140,34 +142,11 @@ class TiloresBatchProcessor:
 
     def _execute_tilores_search(self, search_params: Dict[str, Any]) -> Dict[str, Any]:
         """Execute actual Tilores GraphQL search"""
-        # Build GraphQL query
-        field_conditions = " AND ".join([f'{field}: "{value}"' for field, value in search_params.items()])
-
-        query = f"""
-        {{
-            search(query: "{field_conditions}") {{
-                entities {{
-                    id
-                    records {{
-                        ... on CustomerRecord {{
-                            EMAIL
-                            FIRST_NAME
-                            LAST_NAME
-                            PHONE_EXTERNAL
-                            CLIENT_ID
-                            SALESFORCE_ID
-                        }}
-                    }}
-                }}
-            }}
-        }}
-        """
-
-        # Execute query
-        result = self.tilores_api.execute(query)
+        # Precompiled document; identifiers are passed as variables
+        result = execute_catalog_query(self.tilores_api, "search_profile", {"params": search_params})
 
-        if result and "search" in result:
-            return result["search"]
+        if result and result.get("data", {}).get("search"):
+            return result["data"]["search"]
         return {}
 
     def batch_search(self, identifiers: List[str], search_type: str = "all") -> List[Dict[str, Any]]:
@@ -0,0 +1,202 @@
+"""
+Bureau Field Mappings for Tilores_X
+Declarative Experian/TransUnion/Equifax field specs (bureau aliases, DATA_SET attribute
+mappings, report-selection weights) compiled once into dict-indexed dispatch tables
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WILDCARD = "*"
+MAX_SPELLINGS = 1024  # Bound on remembered CREDIT_BUREAU spellings
+
+
+@dataclass(frozen=True)
+class BureauSpec:
+    """A credit bureau and the spellings it appears under in CREDIT_BUREAU"""
+
+    name: str
+    aliases: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class FieldMapping:
+    """
+    One DATA_SET attribute of a bureau report mapped to a target field
+
+    Items are matched by ID when they have one, otherwise by Name
+    (case-insensitive); `data_type` additionally requires the item's Type.
+    """
+
+    bureau: str  # Canonical bureau name, or "*" for every bureau
+    source: str  # CREDIT_SUMMARY or CREDIT_ATTRIBUTES
+    target: str  # Field the value is collected under
+    data_set_id: Optional[str] = None
+    name: Optional[str] = None
+    data_type: Optional[str] = None
+    transform: str = "raw"
+
+
+BUREAUS = (
+    BureauSpec("Experian", ("EXPERIAN",)),
+    BureauSpec("TransUnion", ("TRANSUNION", "TRANS UNION")),
+    BureauSpec("Equifax", ("EQUIFAX",)),
+)
+
+# Adding a bureau attribute is a new row here; values appear in CreditReport.mapped[target]
+FIELD_MAPPINGS = (
+    FieldMapping(WILDCARD, "CREDIT_SUMMARY", "revolving_utilization", data_set_id="PT016"),
+    FieldMapping("Equifax", "CREDIT_SUMMARY", "revolving_utilization", name="Utilization on revolving trades"),
+    FieldMapping("Equifax", "CREDIT_ATTRIBUTES", "revolving_utilization", name="Utilization on revolving trades",
+                 data_type="creditAttributes"),
+)
+
+# Which of several reports of a bureau is the most complete (highest score wins, first of equals)
+SELECTION_WEIGHTS = {
+    "late_account": 10,  # Per liability with any 30/60/90-day late count
+    "liability": 1,  # Per liability
+    "report_date": 1,  # Times YYYYMMDD // 1,000,000 of the report date
+}
+
+
+def _percent(value: Any) -> Optional[float]:
+    try:
+        return float(str(value).rstrip("%"))
+    except ValueError:
+        return None
+
+
+TRANSFORMS: Dict[str, Callable[[Any], Any]] = {
+    "raw": lambda value: value,
+    "int": lambda value: int(value),
+    "float": lambda value: float(value),
+    "percent": _percent,
+}
+
+_NON_LETTERS = re.compile(r"[^A-Z]")
+
+
+def _alias_key(name: str) -> str:
+    return _NON_LETTERS.sub("", name.upper())
+
+
+@dataclass(frozen=True)
+class DataSetTable:
+    """Dispatch table for one (bureau, source): DATA_SET ID -> mapping and lowercased Name -> mapping"""
+
+    by_id: Dict[str, FieldMapping]
+    by_name: Dict[str, FieldMapping]
+
+    def __bool__(self) -> bool:
+        return bool(self.by_id or self.by_name)
+
+    def match(self, data_set: Dict[str, Any]) -> Optional[FieldMapping]:
+        """Mapping for a DATA_SET item, or None"""
+        item_id = data_set.get("ID")
+        if item_id:
+            mapping = self.by_id.get(item_id)
+        else:
+            mapping = self.by_name.get((data_set.get("Name") or "").lower())
+        if mapping is not None and mapping.data_type is not None and data_set.get("Type") != mapping.data_type:
+            return None
+        return mapping
+
+
+EMPTY_TABLE = DataSetTable({}, {})
+
+
+class BureauMappings:
+    """
+    Compiled bureau specs
+
+    Aliases become one dict keyed by the letters of the spelling; field
+    mappings become one DataSetTable per (bureau, source), so matching a
+    DATA_SET item is a single dict lookup and sources without mappings are
+    not scanned at all.
+    """
+
+    def __init__(self, bureaus: Iterable[BureauSpec] = BUREAUS, mappings: Iterable[FieldMapping] = FIELD_MAPPINGS,
+                 selection_weights: Optional[Dict[str, int]] = None):
+        """
+        Compile the specs
+
+        Args:
+            bureaus: Bureau specs (canonical names and aliases)
+            mappings: DATA_SET field mappings
+            selection_weights: Report-selection weights (default: SELECTION_WEIGHTS)
+
+        Raises:
+            ValueError: On an unknown bureau or transform, or two mappings for the same attribute
+        """
+        bureaus, mappings = tuple(bureaus), tuple(mappings)
+        self.bureaus = tuple(spec.name for spec in bureaus)
+        self.selection_weights = {**SELECTION_WEIGHTS, **(selection_weights or {})}
+        self._aliases: Dict[str, str] = {}
+        self._spellings: Dict[str, str] = {}  # Exact spellings, checked before normalizing
+        for spec in bureaus:
+            for alias in (spec.name,) + spec.aliases:
+                self._aliases[_alias_key(alias)] = spec.name
+                for spelling in (alias, alias.upper(), alias.lower(), alias.title()):
+                    self._spellings[spelling] = spec.name
+
+        tables: Dict[Tuple[str, str], DataSetTable] = {}
+        for mapping in mappings:
+            if mapping.transform not in TRANSFORMS:
+                raise ValueError(f"Unknown transform '{mapping.transform}' for {mapping.target}")
+            if mapping.bureau != WILDCARD and mapping.bureau not in self.bureaus:
+                raise ValueError(f"Unknown bureau '{mapping.bureau}' for {mapping.target}")
+            if not (mapping.data_set_id or mapping.name):
+                raise ValueError(f"Mapping for {mapping.target} needs a DATA_SET ID or Name")
+            for bureau in (self.bureaus if mapping.bureau == WILDCARD else (mapping.bureau,)):
+                table = tables.setdefault((bureau, mapping.source), DataSetTable({}, {}))
+                index, key = ((table.by_id, mapping.data_set_id) if mapping.data_set_id
+                              else (table.by_name, mapping.name.lower()))
+                if key in index:
+                    raise ValueError(f"Duplicate mapping for {bureau} {mapping.source} '{key}'")
+                index[key] = mapping
+        self._tables = tables
+        self._transforms = {mapping: TRANSFORMS[mapping.transform] for mapping in mappings}
+        logger.debug(f"🗺️ Compiled {len(self._transforms)} bureau field mappings into {len(tables)} tables")
+
+    def canonical_bureau(self, name: Optional[str]) -> Optional[str]:
+        """Canonical bureau for a CREDIT_BUREAU spelling ("EXPERIAN", "Trans Union"), else the name unchanged"""
+        if not name:
+            return name
+        canonical = self._spellings.get(name)
+        if canonical is not None:
+            return canonical
+        key = _alias_key(name)
+        canonical = self._aliases.get(key)
+        if canonical is None:
+            # e.g. "EXPERIAN CREDIT" - rare, only reached on a direct miss
+            canonical = next((bureau for alias, bureau in self._aliases.items() if alias in key), name)
+        if len(self._spellings) < MAX_SPELLINGS:  # Remember the resolution (feeds are a handful of spellings)
+            self._spellings[name] = canonical
+        return canonical
+
+    def table(self, bureau: str, source: str) -> DataSetTable:
+        """Dispatch table for a bureau's CREDIT_SUMMARY or CREDIT_ATTRIBUTES items"""
+        return self._tables.get((bureau, source), EMPTY_TABLE)
+
+    def transform(self, mapping: FieldMapping, value: Any) -> Any:
+        """Mapped value, or None when the transform rejects it"""
+        try:
+            return self._transforms[mapping](value)
+        except (ValueError, TypeError):
+            return None
+
+
+# Global instance
+_bureau_mappings = None
+
+
+def get_bureau_mappings() -> BureauMappings:
+    """Get or create the global compiled bureau mappings"""
+    global _bureau_mappings
+    if _bureau_mappings is None:
+        _bureau_mappings = BureauMappings()
+    return _bureau_mappings
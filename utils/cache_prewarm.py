@@ -10,6 +10,8 @@ from datetime import datetime
 import schedule
 import threading
 
+from utils.graphql_queries import execute_catalog_query
+
 logger = logging.getLogger(__name__)
 
 
@@ -74,12 +76,10 @@ class CachePrewarmer:
             # Fetch from Tilores
             logger.debug(f"Warming cache for {identifier}...")
 
-            # Build search query
+            # Execute search (precompiled document, identifiers as variables)
             search_params = self._build_search_params(identifier)
-            query = self._build_graphql_query(search_params)
-
-            # Execute search
-            result = self.tilores_api.execute(query)
+            response = execute_catalog_query(self.tilores_api, "search_profile", {"params": search_params})
+            result = (response or {}).get("data", {}).get("search")
 
             if result:
                 # Cache the result
@@ -238,34 +238,6 @@ class CachePrewarmer:
                 return {"FIRST_NAME": parts[0], "LAST_NAME": parts[-1]}
             return {"LAST_NAME": identifier}
 
-    def _build_graphql_query(self, search_params: Dict[str, str]) -> str:
-        """Build GraphQL query for search"""
-        conditions = " AND ".join([f'{field}: "{value}"' for field, value in search_params.items()])
-
-        return f"""
-        {{
-            search(query: "{conditions}") {{
-                entities {{
-                    id
-                    records {{
-                        ... on CustomerRecord {{
-                            EMAIL
-                            FIRST_NAME
-                            LAST_NAME
-                            PHONE_EXTERNAL
-                            CLIENT_ID
-                            SALESFORCE_ID
-                            MAILING_STREET
-                            MAILING_CITY
-                            MAILING_STATE
-                            MAILING_ZIP
-                        }}
-                    }}
-                }}
-            }}
-        }}
-        """
-
 
 # Convenience functions for easy usage
 
@@ -0,0 +1,279 @@
+"""
+Columnar Credit Kernels for Tilores_X
+Liabilities as NumPy columns (owner, report, bureau, report date, account type, balance,
+limit, 30/60/90-day late counts) with vectorized late-payment totals, per-account
+utilization, revolving/installment splits and month-over-month deltas
+"""
+
+import datetime as dt
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.credit_models import AccountType, Bureau, CreditFile
+
+# A table is a dict of equal-length columns: the group keys followed by the aggregates
+Table = Dict[str, np.ndarray]
+
+BUREAU_CODES = tuple(Bureau)  # bureau column value -> Bureau
+ACCOUNT_TYPE_CODES = tuple(AccountType)  # account_type column value -> AccountType
+NO_ACCOUNT_TYPE = -1
+
+REVOLVING_TYPES = (AccountType.REVOLVING, AccountType.CREDIT_LINE)
+INSTALLMENT_TYPES = (AccountType.INSTALLMENT, AccountType.MORTGAGE)
+
+_EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
+_NAT = np.datetime64("NaT", "D").view(np.int64)
+_BUREAU_INDEX = {bureau: code for code, bureau in enumerate(BUREAU_CODES)}
+_ACCOUNT_TYPE_INDEX = {account_type: code for code, account_type in enumerate(ACCOUNT_TYPE_CODES)}
+_SPLIT_CODES = {
+    "revolving": np.array([_ACCOUNT_TYPE_INDEX[account_type] for account_type in REVOLVING_TYPES], np.int8),
+    "installment": np.array([_ACCOUNT_TYPE_INDEX[account_type] for account_type in INSTALLMENT_TYPES], np.int8),
+}
+
+
+def _days(values: Sequence[Optional[dt.date]]) -> np.ndarray:
+    """datetime64[D] of dates, NaT for None (via day ordinals: converting date objects is several times slower)"""
+    return np.fromiter(
+        (_NAT if value is None else value.toordinal() - _EPOCH_ORDINAL for value in values), np.int64, len(values)
+    ).view("datetime64[D]")
+
+
+@dataclass
+class LiabilityColumns:
+    """
+    One row per liability, one array per field
+
+    `owner` numbers the customers of a batch (0 for a single customer) and
+    `report` numbers the bureau reports within an owner, so kernels can pick
+    one report where several cover the same month.
+    """
+
+    owner: np.ndarray  # int32
+    report: np.ndarray  # int32
+    bureau: np.ndarray  # int8 code into BUREAU_CODES
+    report_date: np.ndarray  # datetime64[D], NaT when unknown
+    account_type: np.ndarray  # int8 code into ACCOUNT_TYPE_CODES, NO_ACCOUNT_TYPE when missing
+    balance: np.ndarray  # float64, NaN when missing
+    limit: np.ndarray  # float64, NaN when missing
+    late: np.ndarray  # int32 (rows, 3): 30/60/90-day late counts
+
+    def __len__(self) -> int:
+        return len(self.owner)
+
+    @classmethod
+    def from_credit_file(cls, credit: CreditFile, owner: int = 0) -> "LiabilityColumns":
+        """Columns of a CreditFile's liabilities (report numbers are the file's Liability.report)"""
+        items = credit.liabilities
+        count = len(items)
+        if not count:
+            return cls.empty()
+        lates = [item.late for item in items]
+        return cls(
+            owner=np.full(count, owner, np.int32),
+            report=np.fromiter((item.report for item in items), np.int32, count),
+            bureau=np.fromiter((_BUREAU_INDEX[item.bureau] for item in items), np.int8, count),
+            report_date=_days([item.date for item in items]),
+            account_type=np.fromiter(
+                (NO_ACCOUNT_TYPE if item.account_type is None else _ACCOUNT_TYPE_INDEX[item.account_type]
+                 for item in items),
+                np.int8, count,
+            ),
+            balance=np.array([item.balance for item in items], np.float64),  # None -> NaN
+            limit=np.array([item.limit for item in items], np.float64),
+            late=np.column_stack([
+                np.fromiter((late.days30 for late in lates), np.int32, count),
+                np.fromiter((late.days60 for late in lates), np.int32, count),
+                np.fromiter((late.days90 for late in lates), np.int32, count),
+            ]),
+        )
+
+    @classmethod
+    def empty(cls) -> "LiabilityColumns":
+        return cls(
+            owner=np.empty(0, np.int32),
+            report=np.empty(0, np.int32),
+            bureau=np.empty(0, np.int8),
+            report_date=np.empty(0, "datetime64[D]"),
+            account_type=np.empty(0, np.int8),
+            balance=np.empty(0, np.float64),
+            limit=np.empty(0, np.float64),
+            late=np.empty((0, 3), np.int32),
+        )
+
+    @classmethod
+    def concat(cls, parts: Iterable["LiabilityColumns"]) -> "LiabilityColumns":
+        """One set of columns from several (owners are kept as set on each part)"""
+        parts = list(parts)
+        if not parts:
+            return cls.empty()
+        return cls(**{
+            name: np.concatenate([getattr(part, name) for part in parts])
+            for name in cls.__dataclass_fields__
+        })
+
+    def take(self, mask: np.ndarray) -> "LiabilityColumns":
+        """The rows selected by a boolean mask or index array"""
+        return LiabilityColumns(**{name: getattr(self, name)[mask] for name in self.__dataclass_fields__})
+
+    @property
+    def month(self) -> np.ndarray:
+        """Report month (datetime64[M])"""
+        return self.report_date.astype("datetime64[M]")
+
+
+def portfolio_columns(credit_files: Iterable[CreditFile]) -> LiabilityColumns:
+    """Liabilities of many customers, owner numbered in iteration order"""
+    return LiabilityColumns.concat(
+        LiabilityColumns.from_credit_file(credit, owner) for owner, credit in enumerate(credit_files)
+    )
+
+
+# Kernels
+
+def _key(columns: LiabilityColumns, name: str) -> np.ndarray:
+    return columns.month if name == "month" else getattr(columns, name)
+
+
+def _group(columns: LiabilityColumns, keys: Sequence[str]) -> Tuple[Table, np.ndarray, np.ndarray]:
+    """(key columns per group, group id per liability, first liability of each group)"""
+    key_columns = [_key(columns, name) for name in keys]
+    if not len(columns):
+        return {name: key[:0] for name, key in zip(keys, key_columns)}, np.empty(0, np.intp), np.empty(0, np.intp)
+    # datetime64 keys sort on their int64 view (NaT first); lexsort's last key is the primary one
+    sortable = [key.view(np.int64) if key.dtype.kind == "M" else key for key in key_columns]
+    order = np.lexsort(sortable[::-1])
+    starts = np.zeros(len(order), bool)
+    starts[0] = True
+    for key in sortable:
+        ordered = key[order]
+        starts[1:] |= ordered[1:] != ordered[:-1]
+    ids = np.empty(len(order), np.intp)
+    ids[order] = np.cumsum(starts) - 1
+    first = order[starts]
+    return {name: key[first] for name, key in zip(keys, key_columns)}, ids, first
+
+
+def group_by(columns: LiabilityColumns, keys: Sequence[str]) -> Tuple[Table, np.ndarray]:
+    """
+    Group liabilities by key columns ("month" groups by report month)
+
+    Returns:
+        Tuple of (key columns per group, sorted lexicographically; group id per liability)
+    """
+    table, ids, _ = _group(columns, keys)
+    return table, ids
+
+
+def _sum(ids: np.ndarray, groups: int, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    return np.bincount(ids, weights=weights, minlength=groups)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """numerator / denominator * 100, NaN where the denominator isn't positive"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator * 100, np.nan)
+
+
+def _add_late(table: Table, ids: np.ndarray, columns: LiabilityColumns):
+    groups = len(next(iter(table.values())))
+    for index, name in enumerate(("days30", "days60", "days90")):
+        table[name] = _sum(ids, groups, columns.late[:, index]).astype(np.int64)
+    table["late_accounts"] = _sum(ids, groups, columns.late.any(axis=1)).astype(np.int64)
+    table["liabilities"] = _sum(ids, groups).astype(np.int64)
+
+
+def _add_split(table: Table, ids: np.ndarray, columns: LiabilityColumns, kinds: Sequence[str]):
+    groups = len(next(iter(table.values())))
+    usable = ~np.isnan(columns.balance) & (columns.limit > 0)
+    for name in kinds:
+        selected = usable & np.isin(columns.account_type, _SPLIT_CODES[name])
+        balance = _sum(ids, groups, np.where(selected, columns.balance, 0.0))
+        limit = _sum(ids, groups, np.where(selected, columns.limit, 0.0))
+        table[f"{name}_balance"] = balance
+        table[f"{name}_limit"] = limit
+        table[f"{name}_pct"] = _ratio(balance, limit)
+
+
+def late_totals(columns: LiabilityColumns, by: Sequence[str] = ("owner", "bureau", "report_date")) -> Table:
+    """30/60/90-day late totals, accounts with any late payment and liability count per group"""
+    table, ids = group_by(columns, by)
+    _add_late(table, ids, columns)
+    return table
+
+
+def account_utilization(columns: LiabilityColumns) -> np.ndarray:
+    """Balance as a percentage of the limit per liability (NaN without a positive limit or a balance)"""
+    return _ratio(columns.balance, columns.limit)
+
+
+def utilization_split(columns: LiabilityColumns, by: Sequence[str] = ("owner", "bureau", "report_date")) -> Table:
+    """
+    Revolving and installment balance, limit and utilization per group
+
+    Only liabilities with both a balance and a positive limit count, so the
+    percentages compare like with like.
+    """
+    table, ids = group_by(columns, by)
+    _add_split(table, ids, columns, ("revolving", "installment"))
+    return table
+
+
+def latest_report_per_month(columns: LiabilityColumns) -> np.ndarray:
+    """Mask of the liabilities on the latest report of each owner, bureau and month (first report of equals)"""
+    reports, ids, first = _group(columns, ("owner", "report"))
+    if not len(ids):
+        return np.zeros(0, bool)
+    report_date, bureau = columns.report_date[first], columns.bureau[first]  # Shared by a report's liabilities
+    days = np.where(np.isnat(report_date), np.iinfo(np.int64).min + 1, report_date.view(np.int64))  # Undated last
+    months = report_date.astype("datetime64[M]").view(np.int64)
+    order = np.lexsort((reports["report"], -days, months, bureau, reports["owner"]))
+    owner, bureau, month = reports["owner"][order], bureau[order], months[order]
+    first = np.ones(len(order), bool)
+    first[1:] = (owner[1:] != owner[:-1]) | (bureau[1:] != bureau[:-1]) | (month[1:] != month[:-1])
+    latest = np.zeros(len(order), bool)
+    latest[order[first]] = True
+    return latest[ids]
+
+
+def month_over_month(columns: LiabilityColumns) -> Table:
+    """
+    Late totals, total balance and revolving utilization per owner, bureau and report
+    month (latest report of the month), with the change since the owner's previous
+    month of that bureau (NaN for the first month)
+    """
+    latest = columns.take(latest_report_per_month(columns))
+    table, ids = group_by(latest, ("owner", "bureau", "month"))
+    _add_late(table, ids, latest)
+    table["balance"] = _sum(ids, len(table["owner"]), np.nan_to_num(latest.balance)).astype(np.float64)
+    _add_split(table, ids, latest, ("revolving",))
+
+    owner, bureau = table["owner"], table["bureau"]
+    continues = (owner[1:] == owner[:-1]) & (bureau[1:] == bureau[:-1])  # Rows are sorted by owner, bureau, month
+    for name in ("days30", "days60", "days90", "late_accounts", "balance", "revolving_pct"):
+        values = table[name].astype(np.float64)
+        delta = np.full(len(values), np.nan)
+        delta[1:] = np.where(continues, values[1:] - values[:-1], np.nan)
+        table[f"{name}_delta"] = delta
+    return table
+
+
+def table_rows(table: Table) -> List[Dict[str, object]]:
+    """A table as one dict per group (bureaus and account types decoded, dates as ISO strings, NaN as None)"""
+    names = list(table)
+    rows = []
+    for values in zip(*(table[name].tolist() for name in names)):
+        row = {}
+        for name, value in zip(names, values):
+            if name == "bureau":
+                value = str(BUREAU_CODES[value])
+            elif name == "account_type":
+                value = None if value == NO_ACCOUNT_TYPE else str(ACCOUNT_TYPE_CODES[value])
+            elif isinstance(value, (dt.date, dt.datetime)):
+                value = value.isoformat()[:7 if name == "month" else 10]
+            elif isinstance(value, float) and value != value:
+                value = None
+            row[name] = value
+        rows.append(row)
+    return rows
@@ -0,0 +1,444 @@
+"""
+Credit Context Builder for Tilores_X
+Renders entity records as compact tables (scores, utilization, late payments,
+bureau attributes, inquiries, accounts) that fit a per-model token budget, truncating by priority
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.credit_extraction import CreditExtract, dated_attributes, extract_credit
+from utils.model_router import MODEL_CAPABILITIES, UNKNOWN_MODEL_CAPABILITIES
+
+try:
+    import tiktoken
+
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_budgets(raw: str) -> Dict[str, int]:
+    """Parse "model=tokens,model=tokens" into a dict"""
+    budgets = {}
+    for item in raw.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            budgets[name.strip()] = int(value)
+    return budgets
+
+
+CREDIT_CONTEXT_CONFIG = {
+    "enabled": os.getenv("CREDIT_CONTEXT_ENABLED", "true").lower() == "true",
+    "encoding": os.getenv("CREDIT_CONTEXT_ENCODING", "cl100k_base"),
+    "max_tokens": int(os.getenv("CREDIT_CONTEXT_MAX_TOKENS", "6000")),  # Cap on data context per request
+    "context_share": float(os.getenv("CREDIT_CONTEXT_SHARE", "0.5")),  # Share of the model window for data
+    "model_budgets": _parse_budgets(os.getenv("CREDIT_CONTEXT_MODEL_BUDGETS", "")),  # Explicit overrides
+    # Serializes and tokenizes the records as indented JSON on every build - for evaluation only
+    "measure_baseline": os.getenv("CREDIT_CONTEXT_MEASURE_BASELINE", "false").lower() == "true",
+}
+
+# Default section order; sections for the query's intents move to the front (after the profile)
+SECTION_PRIORITY = (
+    "profile", "scores", "utilization", "late_payments", "attributes", "inquiries", "accounts", "other",
+)
+
+# Sub-trees rendered as tables rather than as profile fields
+CREDIT_KEYS = ("CREDIT_RESPONSE", "EQUIFAX_REPORT")
+
+_encoding_cache: Dict[str, Any] = {}
+
+
+def count_tokens(text: str, encoding: Optional[str] = None) -> int:
+    """Tokenizer count (tiktoken), or a 4-chars-per-token estimate when tiktoken is unavailable"""
+    if not text:
+        return 0
+    if TIKTOKEN_AVAILABLE:
+        name = encoding or CREDIT_CONTEXT_CONFIG["encoding"]
+        try:
+            if name not in _encoding_cache:
+                _encoding_cache[name] = tiktoken.get_encoding(name)
+            return len(_encoding_cache[name].encode(text, disallowed_special=()))
+        except Exception as e:
+            logger.debug(f"tiktoken unavailable for {name}: {e}")
+    return (len(text) + 3) // 4
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _compact(value: Any) -> Any:
+    """Drop null/empty fields and duplicate list items, recursively"""
+    if isinstance(value, dict):
+        compacted = {key: _compact(item) for key, item in value.items()}
+        return {key: item for key, item in compacted.items() if not _is_empty(item)}
+    if isinstance(value, list):
+        items, seen = [], set()
+        for item in (_compact(item) for item in value):
+            marker = json.dumps(item, sort_keys=True, default=str)
+            if not _is_empty(item) and marker not in seen:
+                seen.add(marker)
+                items.append(item)
+        return items
+    return value
+
+
+def _as_list(value: Any) -> List[Any]:
+    if isinstance(value, list):
+        return value
+    return [value] if isinstance(value, dict) else []
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value) if value else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+@dataclass
+class Section:
+    """One block of the context: a table (header + rows) or free text lines"""
+
+    name: str
+    title: str
+    columns: Tuple[str, ...] = ()
+    rows: List[Tuple[Any, ...]] = field(default_factory=list)
+    lines: List[str] = field(default_factory=list)
+
+    def header(self) -> str:
+        return f"{self.title} ({'|'.join(self.columns)})" if self.columns else self.title
+
+    def body(self) -> List[str]:
+        if self.columns:
+            return ["|".join("" if cell is None else str(cell) for cell in row) for row in self.rows]
+        return list(self.lines)
+
+
+@dataclass
+class CreditContext:
+    """Rendered context plus token accounting for one request"""
+
+    text: str
+    tokens: int
+    budget: int
+    baseline_tokens: Optional[int] = None
+    truncated: List[str] = field(default_factory=list)  # Sections cut to fit
+    dropped: List[str] = field(default_factory=list)  # Sections left out entirely
+
+    @property
+    def saved_tokens(self) -> Optional[int]:
+        return None if self.baseline_tokens is None else self.baseline_tokens - self.tokens
+
+
+def _bureau(report: Dict[str, Any], default: str = "Unknown") -> str:
+    bureau = report.get("CREDIT_BUREAU")
+    if not bureau:
+        scores = _as_list(report.get("CREDIT_SCORE"))
+        bureau = scores[0].get("CreditRepositorySourceType") if scores else None
+    return bureau or default
+
+
+def _credit_reports(records: Iterable[Dict[str, Any]]) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """(bureau, report date, report) for every CREDIT_RESPONSE and EQUIFAX_REPORT"""
+    reports = []
+    for record in records:
+        for credit_response in _as_list(record.get("CREDIT_RESPONSE")):
+            date = credit_response.get("CreditReportFirstIssuedDate") or ""
+            reports.append((_bureau(credit_response), date, credit_response))
+        for equifax_report in _as_list(record.get("EQUIFAX_REPORT")):
+            reports.append(("Equifax", equifax_report.get("REPORT_DATE") or "", equifax_report))
+    return reports
+
+
+def _unique(rows: Iterable[Tuple[Any, ...]]) -> List[Tuple[Any, ...]]:
+    return list(dict.fromkeys(rows))
+
+
+def _latest_first(rows: Iterable[Tuple[Any, ...]],
+                  change_rows: Iterable[Tuple[Any, ...]] = ()) -> List[Tuple[Any, ...]]:
+    """
+    (bureau, date, ...) rows in truncation priority order
+
+    The latest row of each bureau comes first, then the change rows, then the
+    remaining history newest first, so a cut table still answers "latest" questions.
+    """
+    history = sorted(_unique(rows), key=lambda row: (row[1], row[0]), reverse=True)
+    latest: Dict[Any, Tuple[Any, ...]] = {}
+    for row in history:
+        latest.setdefault(row[0], row)
+    heads = sorted(latest.values(), key=lambda row: row[0])
+    shown = set(heads)
+    return heads + list(change_rows) + [row for row in history if row not in shown]
+
+
+class CreditContextBuilder:
+    """
+    Builds the data context for LLM prompts
+
+    Credit sub-trees become compact pipe-separated tables; remaining record
+    fields are merged across records with nulls and duplicates dropped.
+    Sections are added in priority order until the model's token budget is
+    used; a table that doesn't fit keeps as many rows as fit.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the builder
+
+        Args:
+            config: Optional configuration overriding CREDIT_CONTEXT_CONFIG
+        """
+        self.config = {**CREDIT_CONTEXT_CONFIG, **(config or {})}
+
+        # Statistics
+        self.stats = {
+            "requests": 0,
+            "context_tokens": 0,
+            "baseline_tokens": 0,
+            "saved_tokens": 0,
+            "truncated_requests": 0,
+        }
+
+    def count(self, text: str) -> int:
+        return count_tokens(text, self.config["encoding"])
+
+    def budget_for(self, model: Optional[str], reserved_tokens: int = 0) -> int:
+        """Token budget for the data context on a model, leaving room for prompt and completion"""
+        if model in self.config["model_budgets"]:
+            return self.config["model_budgets"][model]
+        window = MODEL_CAPABILITIES.get(model, UNKNOWN_MODEL_CAPABILITIES)["context"]
+        available = int(window * self.config["context_share"]) - reserved_tokens
+        return max(256, min(self.config["max_tokens"], available))
+
+    # Sections
+
+    def _profile_sections(self, records: List[Dict[str, Any]]) -> List[Section]:
+        """Scalar fields merged across records; nested non-credit fields as compact JSON"""
+        merged: Dict[str, List[Any]] = {}
+        nested: Dict[str, List[Any]] = {}
+        for record in records:
+            for key, value in record.items():
+                if key in CREDIT_KEYS or key == "id" or _is_empty(value):
+                    continue
+                target = nested if isinstance(value, (dict, list)) else merged
+                values = target.setdefault(key, [])
+                value = _compact(value) if target is nested else value
+                if not _is_empty(value) and value not in values:
+                    values.append(value)
+
+        profile = Section("profile", "CUSTOMER")
+        profile.lines = [f"{key}: {'; '.join(str(value) for value in values)}" for key, values in merged.items()]
+        other = Section("other", "OTHER DATA")
+        other.lines = [
+            f"{key}: {json.dumps(values[0] if len(values) == 1 else values, separators=(',', ':'), default=str)}"
+            for key, values in nested.items()
+        ]
+        return [profile, other]
+
+    def _score_section(self, reports: List[Tuple[str, str, Dict[str, Any]]]) -> Section:
+        rows = []
+        for bureau, date, report in reports:
+            for score in _as_list(report.get("CREDIT_SCORE")):
+                value = score.get("Value")
+                if value:
+                    model = score.get("ModelNameType") or score.get("CreditScoreType") or ""
+                    rows.append((score.get("CreditRepositorySourceType") or bureau, date, value, model))
+        rows = sorted(_unique(rows), key=lambda row: (row[0], row[1]))
+
+        # First -> latest change per bureau (what "progress" questions ask about)
+        by_bureau: Dict[str, List[Tuple[Any, ...]]] = {}
+        for row in rows:
+            by_bureau.setdefault(row[0], []).append(row)
+        changes = []
+        for bureau, bureau_rows in by_bureau.items():
+            first, last = bureau_rows[0], bureau_rows[-1]
+            if len(bureau_rows) > 1 and _int(first[2]) and _int(last[2]):
+                change = _int(last[2]) - _int(first[2])
+                changes.append((bureau, f"{first[1]}->{last[1]}", f"{change:+d}", "change"))
+        return Section("scores", "CREDIT SCORES", ("bureau", "date", "score", "model"), _latest_first(rows, changes))
+
+    def _utilization_section(self, reports: List[Tuple[str, str, Dict[str, Any]]]) -> Section:
+        rows = []
+        for bureau, date, report in reports:
+            data_sets = []
+            for container in ("CREDIT_SUMMARY", "CREDIT_ATTRIBUTES"):
+                for block in _as_list(report.get(container)):
+                    data_sets.extend(_as_list(block.get("DATA_SET")))
+            for data_set in data_sets:
+                name = str(data_set.get("Name", "")).lower()
+                value = data_set.get("Value")
+                if value and "utilization" in name:
+                    kind = "revolving" if "revolving" in name else data_set.get("Name")
+                    rows.append((bureau, date, f"{value}%", kind))
+        return Section("utilization", "UTILIZATION", ("bureau", "date", "pct", "type"), _latest_first(rows))
+
+    def _late_payment_section(self, reports: List[Tuple[str, str, Dict[str, Any]]]) -> Section:
+        rows = []
+        for bureau, date, report in reports:
+            totals = [0, 0, 0]
+            accounts = 0
+            for liability in _as_list(report.get("CREDIT_LIABILITY")):
+                late = liability.get("LateCount") or {}
+                counts = [_int(late.get("Days30")), _int(late.get("Days60")), _int(late.get("Days90"))]
+                if any(counts):
+                    accounts += 1
+                    totals = [total + count for total, count in zip(totals, counts)]
+            if report.get("CREDIT_LIABILITY"):
+                rows.append((bureau, date, *totals, accounts))
+        columns = ("bureau", "date", "30d", "60d", "90d", "accounts_late")
+        return Section("late_payments", "LATE PAYMENTS", columns, _latest_first(rows))
+
+    def _attribute_section(self, extract: CreditExtract) -> Section:
+        """Every bureau-mapped DATA_SET value (BureauMappings.FIELD_MAPPINGS), whatever its target"""
+        rows = [
+            (entry["bureau"], entry["date"], entry["attribute"], entry["value"])
+            for entry in dated_attributes(extract)
+        ]
+        return Section("attributes", "BUREAU ATTRIBUTES", ("bureau", "date", "attribute", "value"), _latest_first(rows))
+
+    def _inquiry_section(self, reports: List[Tuple[str, str, Dict[str, Any]]]) -> Section:
+        rows = []
+        for bureau, _, report in reports:
+            for inquiry in _as_list(report.get("CREDIT_INQUIRY")):
+                if inquiry.get("InquiryDate") or inquiry.get("SubscriberName"):
+                    rows.append((inquiry.get("InquiryDate") or "", inquiry.get("SubscriberName") or "", bureau))
+        rows = sorted(_unique(rows), key=lambda row: row[0], reverse=True)  # Most recent first
+        return Section("inquiries", "INQUIRIES", ("date", "subscriber", "bureau"), rows)
+
+    def _account_section(self, reports: List[Tuple[str, str, Dict[str, Any]]]) -> Section:
+        rows = []
+        for bureau, date, report in reports:
+            for liability in _as_list(report.get("CREDIT_LIABILITY")):
+                creditor = liability.get("Creditor")
+                creditor = creditor.get("Name") if isinstance(creditor, dict) else creditor
+                row = (bureau, date, creditor or "", liability.get("AccountType") or "",
+                       liability.get("CreditBalance") or "", liability.get("CreditLimitAmount") or "")
+                if any(row[2:]):
+                    rows.append(row)
+        rows = sorted(_unique(rows), key=lambda row: (row[0], row[1]), reverse=True)  # Latest reports first
+        return Section("accounts", "ACCOUNTS", ("bureau", "date", "creditor", "type", "balance", "limit"), rows)
+
+    def sections(self, records: List[Dict[str, Any]]) -> Dict[str, Section]:
+        """All non-empty sections for a record list, by name"""
+        reports = _credit_reports(records)
+        extract = extract_credit(records)
+        profile, other = self._profile_sections(records)
+        sections = [
+            profile,
+            self._score_section(reports),
+            self._utilization_section(reports),
+            self._late_payment_section(reports),
+            self._attribute_section(extract),
+            self._inquiry_section(reports),
+            self._account_section(reports),
+            other,
+        ]
+        return {section.name: section for section in sections if section.rows or section.lines}
+
+    # Assembly
+
+    def _order(self, names: Iterable[str], intents: Iterable[str]) -> List[str]:
+        names = list(names)
+        preferred = [name for name in intents if name in names and name != "profile"]
+        rest = [name for name in SECTION_PRIORITY if name in names and name not in preferred and name != "profile"]
+        return (["profile"] if "profile" in names else []) + preferred + rest
+
+    def build(self, records: List[Dict[str, Any]], model: Optional[str] = None, intents: Iterable[str] = (),
+              reserved_tokens: int = 0, baseline: Optional[str] = None) -> CreditContext:
+        """
+        Render records into a budgeted context
+
+        Args:
+            records: Entity records (as returned by Tilores)
+            model: Model the prompt is for (selects the budget)
+            intents: Query intents; their sections get priority
+            reserved_tokens: Tokens already taken by the system prompt and completion
+            baseline: What would have been sent otherwise (for tokens-saved reporting)
+
+        Returns:
+            CreditContext with the text and token accounting
+        """
+        budget = self.budget_for(model, reserved_tokens)
+        sections = self.sections(records)
+        lines: List[str] = []
+        used = 0
+        truncated, dropped = [], []
+
+        for name in self._order(sections, intents):
+            section = sections[name]
+            header = section.header()
+            header_tokens = self.count(header) + 1
+            body = section.body()
+            body_tokens = [self.count(line) + 1 for line in body]
+            if used + header_tokens + sum(body_tokens) <= budget:
+                lines.append(header)
+                lines.extend(body)
+                used += header_tokens + sum(body_tokens)
+                continue
+
+            # Keep the rows that fit (tables are already in priority order), noting what was cut
+            kept = []
+            room = budget - used - header_tokens - 12  # Leave room for the omission note
+            for line, tokens in zip(body, body_tokens):
+                if tokens > room:
+                    break
+                kept.append(line)
+                room -= tokens
+            if not kept:
+                dropped.append(name)
+                continue
+            lines.append(header)
+            lines.extend(kept)
+            lines.append(f"... {len(body) - len(kept)} more {section.title.lower()} rows omitted")
+            used = budget - room
+            truncated.append(name)
+
+        text = "\n".join(lines) if lines else "No customer data available"
+        result = CreditContext(text=text, tokens=self.count(text), budget=budget, truncated=truncated, dropped=dropped)
+
+        if baseline is None and self.config["measure_baseline"]:
+            baseline = json.dumps(records, indent=2)
+        if baseline is not None:
+            result.baseline_tokens = self.count(baseline)
+
+        self.stats["requests"] += 1
+        self.stats["context_tokens"] += result.tokens
+        if result.baseline_tokens is not None:
+            self.stats["baseline_tokens"] += result.baseline_tokens
+            self.stats["saved_tokens"] += result.saved_tokens
+        if truncated or dropped:
+            self.stats["truncated_requests"] += 1
+            logger.info(f"✂️ Context cut to {budget} tokens for {model}: truncated {truncated}, dropped {dropped}")
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get context statistics"""
+        requests = max(1, self.stats["requests"])
+        return {
+            **self.stats,
+            "enabled": self.config["enabled"],
+            "tokenizer": f"tiktoken/{self.config['encoding']}" if TIKTOKEN_AVAILABLE else "chars/4 estimate",
+            "avg_context_tokens": round(self.stats["context_tokens"] / requests, 1),
+            "avg_saved_tokens": round(self.stats["saved_tokens"] / requests, 1),
+            "saved_ratio": round(self.stats["saved_tokens"] / max(1, self.stats["baseline_tokens"]) * 100, 1),
+        }
+
+
+# Global instance
+_credit_context_builder = None
+
+
+def get_credit_context_builder() -> CreditContextBuilder:
+    """Get or create the global credit context builder"""
+    global _credit_context_builder
+    if _credit_context_builder is None:
+        _credit_context_builder = CreditContextBuilder()
+    return _credit_context_builder
@@ -0,0 +1,497 @@
+"""
+Credit Report Extraction for Tilores_X
+Visits each entity record once, filling a typed model of profile fields and credit
+reports (scores, liabilities, inquiries, summaries, attributes) keyed by bureau and
+report date, and renders the comprehensive-analysis text from that model
+"""
+
+import logging
+from itertools import islice
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.bureau_mappings import BUREAUS, BureauMappings, get_bureau_mappings
+
+logger = logging.getLogger(__name__)
+
+KNOWN_BUREAUS = tuple(spec.name for spec in BUREAUS)
+UNKNOWN_BUREAU = "Unknown Bureau"
+UNKNOWN_DATE = "Unknown Date"
+
+CREDIT_RESPONSE = "CREDIT_RESPONSE"
+EQUIFAX_REPORT = "EQUIFAX_REPORT"
+
+# Report date assumed for EQUIFAX_REPORT data without REPORT_DATE (the July 17 import)
+EQUIFAX_REPORT_DEFAULT_DATE = "2025-07-17"
+
+ANALYSIS_CONTEXT = (
+    "\n\nCREDIT ANALYSIS CONTEXT:\n"
+    "This customer is enrolled in credit repair services. "
+    "Use the actual credit data above to provide specific, personalized analysis.\n"
+    "If credit scores are available, reference the specific numbers and bureaus.\n"
+    "If account details are available, reference specific balances, limits, and payment history.\n"
+    "\n"
+    'For the specific query: "{query}"\n'
+    "Provide detailed analysis using the actual credit data shown above."
+)
+
+
+def _as_list(value: Any) -> List[Any]:
+    if isinstance(value, list):
+        return value
+    return [value] if isinstance(value, dict) else []
+
+
+def _late_int(value: Any) -> int:
+    return int(value) if value else 0
+
+
+@dataclass(slots=True)
+class ScoreEntry:
+    """One CREDIT_SCORE entry"""
+
+    value: Any
+    source: Optional[str] = None  # CreditRepositorySourceType
+    model: Optional[str] = None  # ModelNameType
+    score_type: Optional[str] = None  # CreditScoreType
+
+
+@dataclass(slots=True)
+class LiabilityEntry:
+    """One CREDIT_LIABILITY entry; late counts are kept as reported (strings or ints)"""
+
+    creditor: Optional[str] = None
+    account_type: Optional[str] = None
+    balance: Any = None
+    limit: Any = None
+    days30: Any = None
+    days60: Any = None
+    days90: Any = None
+
+    @property
+    def has_late(self) -> bool:
+        return bool(self.days30 or self.days60 or self.days90)
+
+    def late_counts(self) -> Tuple[int, int, int]:
+        """(30, 60, 90)-day late counts; an unparseable count zeroes the entry"""
+        try:
+            return _late_int(self.days30), _late_int(self.days60), _late_int(self.days90)
+        except (ValueError, TypeError):
+            return 0, 0, 0
+
+
+@dataclass(slots=True)
+class InquiryEntry:
+    """One CREDIT_INQUIRY entry"""
+
+    date: Optional[str] = None
+    subscriber: Optional[str] = None
+
+
+def _score(score: Dict[str, Any]) -> ScoreEntry:
+    return ScoreEntry(
+        value=score.get("Value"),
+        source=score.get("CreditRepositorySourceType"),
+        model=score.get("ModelNameType"),
+        score_type=score.get("CreditScoreType"),
+    )
+
+
+def _liability(liability: Dict[str, Any]) -> LiabilityEntry:
+    creditor = liability.get("Creditor")
+    late = liability.get("LateCount") or {}
+    return LiabilityEntry(
+        creditor=creditor.get("Name") if isinstance(creditor, dict) else creditor,
+        account_type=liability.get("AccountType"),
+        balance=liability.get("CreditBalance"),
+        limit=liability.get("CreditLimitAmount"),
+        days30=late.get("Days30"),
+        days60=late.get("Days60"),
+        days90=late.get("Days90"),
+    )
+
+
+def _inquiry(inquiry: Dict[str, Any]) -> InquiryEntry:
+    return InquiryEntry(inquiry.get("InquiryDate"), inquiry.get("SubscriberName"))
+
+
+@dataclass(slots=True)
+class CreditReport:
+    """
+    One bureau report (a CREDIT_RESPONSE or an EQUIFAX_REPORT) of one record
+
+    Score, liability and inquiry items are referenced, not copied; the typed
+    entries are built on access and not kept, so an extract costs little more
+    than the records it was read from.
+    """
+
+    source: str  # CREDIT_RESPONSE or EQUIFAX_REPORT
+    bureau: str  # CREDIT_BUREAU, falling back to the first score's repository
+    score_bureau: str  # First score's repository (what utilization is attributed to)
+    date: Optional[str]
+    record_id: Optional[str] = None
+    score_items: List[Dict[str, Any]] = field(default_factory=list)  # CREDIT_SCORE entries (not copied)
+    liability_items: List[Dict[str, Any]] = field(default_factory=list)  # CREDIT_LIABILITY entries
+    inquiry_items: List[Dict[str, Any]] = field(default_factory=list)  # CREDIT_INQUIRY entries
+    summary_items: List[Dict[str, Any]] = field(default_factory=list)  # CREDIT_SUMMARY DATA_SET items (not copied)
+    attribute_items: List[Dict[str, Any]] = field(default_factory=list)  # CREDIT_ATTRIBUTES DATA_SET items
+    mapped: Dict[str, List[Any]] = field(default_factory=dict)  # Bureau-mapped DATA_SET values by target field
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.bureau, self.date or ""
+
+    @property
+    def scores(self) -> List[ScoreEntry]:
+        return [_score(item) for item in self.score_items]
+
+    @property
+    def liabilities(self) -> List[LiabilityEntry]:
+        return [_liability(item) for item in self.liability_items]
+
+    @property
+    def inquiries(self) -> List[InquiryEntry]:
+        return [_inquiry(item) for item in self.inquiry_items]
+
+    @property
+    def revolving_utilization(self) -> List[Any]:
+        return self.mapped.get("revolving_utilization", [])
+
+    @property
+    def summaries(self) -> Dict[str, Any]:
+        """CREDIT_SUMMARY values by DATA_SET ID (or Name)"""
+        return {item.get("ID") or item.get("Name") or "": item.get("Value") for item in self.summary_items}
+
+    @property
+    def attributes(self) -> Dict[str, Any]:
+        """CREDIT_ATTRIBUTES values by DATA_SET ID (or Name)"""
+        return {item.get("ID") or item.get("Name") or "": item.get("Value") for item in self.attribute_items}
+
+
+@dataclass(slots=True)
+class CustomerProfile:
+    """Non-credit customer fields (the last non-empty value across records wins)"""
+
+    status: Optional[str] = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+    client_id: Optional[str] = None
+    product: Optional[str] = None
+    enroll_date: Optional[str] = None
+
+
+@dataclass(slots=True)
+class CreditExtract:
+    """Everything the formatters need from an entity's records"""
+
+    profile: CustomerProfile = field(default_factory=CustomerProfile)
+    reports: List[CreditReport] = field(default_factory=list)
+
+    def by_bureau(self) -> Dict[str, List[CreditReport]]:
+        """Reports grouped by bureau, in record order"""
+        grouped: Dict[str, List[CreditReport]] = {}
+        for report in self.reports:
+            grouped.setdefault(report.bureau, []).append(report)
+        return grouped
+
+    def by_key(self) -> Dict[Tuple[str, str], List[CreditReport]]:
+        """Reports grouped by (bureau, report date)"""
+        grouped: Dict[Tuple[str, str], List[CreditReport]] = {}
+        for report in self.reports:
+            grouped.setdefault(report.key, []).append(report)
+        return grouped
+
+
+class CreditReportVisitor:
+    """
+    Single-pass extraction of entity records into a CreditExtract
+
+    Each record, and each report inside it, is visited exactly once; DATA_SET
+    items are matched against the compiled bureau mappings while they are read.
+    """
+
+    def __init__(self, mappings: Optional[BureauMappings] = None):
+        self.extract = CreditExtract()
+        self.mappings = mappings or get_bureau_mappings()
+
+    def visit_records(self, records: Iterable[Dict[str, Any]]) -> CreditExtract:
+        for record in records:
+            self.visit_record(record)
+        return self.extract
+
+    def visit_record(self, record: Dict[str, Any]):
+        profile = self.extract.profile
+        if record.get("STATUS"):
+            profile.status = record["STATUS"]
+        if record.get("FIRST_NAME") and record.get("LAST_NAME"):
+            profile.name = f"{record['FIRST_NAME']} {record['LAST_NAME']}"
+        if record.get("EMAIL"):
+            profile.email = record["EMAIL"]
+        if record.get("CLIENT_ID"):
+            profile.client_id = record["CLIENT_ID"]
+        if record.get("CURRENT_PRODUCT"):
+            profile.product = record["CURRENT_PRODUCT"]
+        if record.get("ENROLL_DATE"):
+            profile.enroll_date = record["ENROLL_DATE"]
+
+        record_id = record.get("id")
+        for credit_response in _as_list(record.get(CREDIT_RESPONSE)):
+            self.extract.reports.append(self.visit_credit_response(credit_response, record_id))
+        for equifax_report in _as_list(record.get(EQUIFAX_REPORT)):
+            self.extract.reports.append(self.visit_equifax_report(equifax_report, record_id))
+
+    def visit_credit_response(self, credit_response: Dict[str, Any], record_id: Optional[str]) -> CreditReport:
+        score_items = _as_list(credit_response.get("CREDIT_SCORE"))
+        first_source = score_items[0].get("CreditRepositorySourceType") if score_items else None
+        score_bureau = self.mappings.canonical_bureau(first_source) or UNKNOWN_BUREAU
+        bureau = self.mappings.canonical_bureau(str(credit_response.get("CREDIT_BUREAU") or score_bureau))
+
+        report = CreditReport(
+            source=CREDIT_RESPONSE,
+            bureau=bureau,
+            score_bureau=score_bureau,
+            date=credit_response.get("CreditReportFirstIssuedDate"),
+            record_id=record_id,
+            score_items=score_items,
+            liability_items=_as_list(credit_response.get("CREDIT_LIABILITY")),
+            inquiry_items=_as_list(credit_response.get("CREDIT_INQUIRY")),
+        )
+        report.summary_items = self._visit_data_sets(report, "CREDIT_SUMMARY", credit_response.get("CREDIT_SUMMARY"))
+        report.attribute_items = self._visit_data_sets(
+            report, "CREDIT_ATTRIBUTES", credit_response.get("CREDIT_ATTRIBUTES")
+        )
+        return report
+
+    def visit_equifax_report(self, equifax_report: Dict[str, Any], record_id: Optional[str]) -> CreditReport:
+        return CreditReport(
+            source=EQUIFAX_REPORT,
+            bureau="Equifax",
+            score_bureau="Equifax",
+            date=equifax_report.get("REPORT_DATE"),
+            record_id=record_id,
+            score_items=_as_list(equifax_report.get("CREDIT_SCORE")),
+            liability_items=_as_list(equifax_report.get("CREDIT_LIABILITY")),
+        )
+
+    def _visit_data_sets(self, report: CreditReport, source: str, blocks: Any) -> List[Dict[str, Any]]:
+        """DATA_SET items of a CREDIT_SUMMARY/CREDIT_ATTRIBUTES block (or list of blocks), collecting mapped values"""
+        blocks = _as_list(blocks)
+        if len(blocks) == 1:
+            items = _as_list(blocks[0].get("DATA_SET"))  # Referenced, not copied
+        else:
+            items = [item for block in blocks for item in _as_list(block.get("DATA_SET"))]
+
+        table = self.mappings.table(report.score_bureau, source)
+        if table:  # Sources without mappings for this bureau aren't scanned
+            for data_set in items:
+                mapping = table.match(data_set)
+                if mapping is None:
+                    continue
+                value = data_set.get("Value")
+                if value:
+                    value = self.mappings.transform(mapping, value)
+                    if value is not None:
+                        report.mapped.setdefault(mapping.target, []).append(value)
+        return items
+
+
+def extract_credit(records: Iterable[Dict[str, Any]]) -> CreditExtract:
+    """Extract the typed credit model from entity records in one pass"""
+    return CreditReportVisitor().visit_records(records)
+
+
+# Formatters
+
+def _unique(values: Iterable[Any]) -> List[str]:
+    """Distinct non-None values as strings, in first-seen order"""
+    return list(dict.fromkeys(str(value) for value in values if value is not None))
+
+
+def _report_date(report: CreditReport) -> str:
+    return report.date or UNKNOWN_DATE
+
+
+def dated_scores(extract: CreditExtract) -> List[Dict[str, Any]]:
+    """Every score with its bureau and report date: CREDIT_RESPONSE scores (with a repository), then EQUIFAX_REPORT"""
+    scores, equifax_scores = [], []
+    for report in extract.reports:
+        for score in report.scores:
+            if not score.value:
+                continue
+            if report.source == EQUIFAX_REPORT:
+                equifax_scores.append({"bureau": "Equifax", "score": score.value, "date": _report_date(report),
+                                       "type": "Equifax Report"})
+            elif score.source:
+                scores.append({"bureau": score.source, "score": score.value, "date": _report_date(report),
+                               "type": score.score_type or "Unknown"})
+    return scores + equifax_scores
+
+
+def dated_utilization(extract: CreditExtract) -> List[Dict[str, Any]]:
+    """Revolving utilization per report, attributed to the report's score repository"""
+    return [
+        {"bureau": report.score_bureau, "utilization": value, "date": _report_date(report)}
+        for report in extract.reports
+        if report.source == CREDIT_RESPONSE and report.score_bureau != UNKNOWN_BUREAU
+        for value in report.revolving_utilization
+    ]
+
+
+def dated_attributes(extract: CreditExtract) -> List[Dict[str, Any]]:
+    """Every bureau-mapped DATA_SET value (a FIELD_MAPPINGS target) with its bureau and report date"""
+    return [
+        {"bureau": report.bureau, "attribute": target, "value": value, "date": _report_date(report)}
+        for report in extract.reports
+        for target, values in report.mapped.items()
+        for value in values
+    ]
+
+
+def _selection_score(report: CreditReport, weights: Dict[str, int]) -> int:
+    """Record completeness per SELECTION_WEIGHTS: late-payment accounts, liabilities, report date"""
+    late_accounts = sum(1 for liability in report.liabilities if liability.has_late)
+    score = weights["late_account"] * late_accounts + weights["liability"] * len(report.liability_items)
+    date = report.date or (EQUIFAX_REPORT_DEFAULT_DATE if report.source == EQUIFAX_REPORT else "")
+    try:
+        score += weights["report_date"] * (int(str(date).replace("-", "")) // 1000000) if date else 0
+    except ValueError:
+        pass
+    return score
+
+
+def late_payment_totals(extract: CreditExtract, mappings: Optional[BureauMappings] = None) -> List[str]:
+    """Late-payment totals from the most complete report of each known bureau"""
+    weights = (mappings or get_bureau_mappings()).selection_weights
+    grouped = extract.by_bureau()
+    totals = []
+    for bureau in KNOWN_BUREAUS:
+        reports = grouped.get(bureau)
+        if not reports:
+            continue
+        best = max(reports, key=lambda report: _selection_score(report, weights))  # First of equals
+        if not best.liability_items:
+            continue
+        days30 = days60 = days90 = 0
+        for liability in best.liabilities:
+            late30, late60, late90 = liability.late_counts()
+            days30, days60, days90 = days30 + late30, days60 + late60, days90 + late90
+        totals.append(f"{bureau}: 30-day: {days30}, 60-day: {days60}, 90-day: {days90}")
+    return totals
+
+
+def _progress(entries: List[Dict[str, Any]], render: Callable[[str, Dict[str, Any], Dict[str, Any]], str]) -> List[str]:
+    """First -> latest entry per bureau (bureaus in first-seen order); single reports render as (first, None)"""
+    by_bureau: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        by_bureau.setdefault(entry["bureau"], []).append(entry)
+    display = []
+    for bureau, bureau_entries in by_bureau.items():
+        ordered = sorted(bureau_entries, key=lambda entry: entry["date"])
+        display.append(render(bureau, ordered[0], ordered[-1] if len(ordered) >= 2 else None))
+    return display
+
+
+def _score_change(bureau: str, first: Dict[str, Any], last: Optional[Dict[str, Any]]) -> str:
+    start = int(first["score"])
+    if last is None:
+        return f"{bureau}: {start} ({first['date']}) - Single report available"
+    end = int(last["score"])
+    change = end - start
+    return (f"{bureau}: {start} ({first['date']}) → {end} ({last['date']}) = "
+            f"{'+' if change > 0 else ''}{change} points")
+
+
+def _utilization_change(bureau: str, first: Dict[str, Any], last: Optional[Dict[str, Any]]) -> str:
+    if last is None:
+        return f"{bureau}: {first['utilization']}% ({first['date']}) - Single report available"
+    return f"{bureau}: {first['utilization']}% ({first['date']}) → {last['utilization']}% ({last['date']})"
+
+
+def format_comprehensive_data(extract: CreditExtract, query: str) -> str:
+    """Comprehensive customer and credit analysis text for the LLM"""
+    profile = extract.profile
+    credit_responses = [report for report in extract.reports if report.source == CREDIT_RESPONSE]
+
+    all_scores = dated_scores(extract)
+    utilization = dated_utilization(extract)
+    late_payments = late_payment_totals(extract)
+    attributes = _unique(
+        f"{entry['bureau']} {entry['attribute']}: {entry['value']} ({entry['date']})"
+        for entry in sorted(dated_attributes(extract), key=lambda entry: (entry["bureau"], entry["date"]))
+    )
+
+    response_scores = [score for report in credit_responses for score in report.scores if score.value]
+    credit_dates = _unique(report.date for report in credit_responses if report.date)
+    limits: Dict[str, None] = {}  # Distinct values in first-seen order, as _unique
+    balances: Dict[str, None] = {}
+    types: Dict[str, None] = {}
+    for report in credit_responses:
+        for liability in report.liabilities:  # Built once per report, dropped with it
+            if liability.limit:
+                limits[str(liability.limit)] = None
+            if liability.balance:
+                balances[str(liability.balance)] = None
+            if liability.account_type:
+                types[str(liability.account_type)] = None
+    credit_limits, credit_balances, account_types = list(limits), list(balances), list(types)
+    inquiries = [
+        f"{inquiry.subscriber} ({inquiry.date})"
+        for inquiry in islice(
+            (inquiry for report in credit_responses for inquiry in report.inquiries
+             if inquiry.date and inquiry.subscriber),
+            5,  # Show first 5
+        )
+    ]
+
+    formatted_data = f"""COMPREHENSIVE CUSTOMER ANALYSIS:
+CUSTOMER: {profile.name or 'Unknown'}
+EMAIL: {profile.email or 'Not provided'}
+CLIENT ID: {profile.client_id or 'Not provided'}
+ACCOUNT STATUS: {profile.status or 'Unknown'}
+PRODUCT: {profile.product or 'Not specified'}
+ENROLLMENT DATE: {profile.enroll_date or 'Not provided'}
+
+ACTUAL CREDIT DATA:"""
+
+    if all_scores:
+        # Chronological per bureau (older → newer)
+        ordered = sorted(all_scores, key=lambda score: (score["bureau"], score["date"]))
+        formatted_data += "\nCREDIT SCORES (ALL HISTORICAL): " + ", ".join(
+            f"{score['score']} ({score['bureau']}) - {score['date']}" for score in ordered
+        )
+        progress = _progress(all_scores, _score_change)
+        if progress:
+            formatted_data += f"\nCREDIT REPAIR PROGRESS: {'; '.join(progress)}"
+        utilization_progress = _progress(utilization, _utilization_change)
+        if utilization_progress:
+            formatted_data += f"\nUTILIZATION PROGRESS: {'; '.join(utilization_progress)}"
+    elif response_scores:
+        # Scores without a repository (not attributable to a bureau)
+        credit_scores = _unique(
+            f"{score.value}" + (f" ({score.source})" if score.source else "")
+            + (f" - {score.model}" if score.model else "")
+            for score in response_scores
+        )
+        formatted_data += f"\nCREDIT SCORES: {', '.join(credit_scores)}"
+    if credit_dates:
+        formatted_data += f"\nREPORT DATES: {', '.join(credit_dates)}"
+    if credit_limits:
+        formatted_data += f"\nCREDIT LIMITS: ${', $'.join(credit_limits)}"
+    if credit_balances:
+        formatted_data += f"\nCREDIT BALANCES: ${', $'.join(credit_balances)}"
+    if account_types:
+        formatted_data += f"\nACCOUNT TYPES: {', '.join(account_types)}"
+    if late_payments:
+        formatted_data += f"\nLATE PAYMENTS: {'; '.join(late_payments)}"
+    if inquiries:
+        formatted_data += f"\nRECENT INQUIRIES: {'; '.join(inquiries)}"
+    if attributes:
+        formatted_data += f"\nBUREAU ATTRIBUTES: {'; '.join(attributes)}"
+
+    if not any([response_scores, credit_dates, credit_limits, credit_balances]):
+        formatted_data += "\nNo credit scores currently available in system"
+
+    formatted_data += ANALYSIS_CONTEXT.format(query=query)
+
+    logger.debug(f"🔍 Comprehensive data: {len(extract.reports)} reports, {len(all_scores)} scores")
+    return formatted_data
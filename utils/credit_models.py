@@ -0,0 +1,360 @@
+"""
+Credit Domain Models for Tilores_X
+Slotted credit records (scores, liabilities, late counts, inquiries, utilization) with
+interned bureau and account-type enums, values parsed once, and compact JSON round-tripping
+"""
+
+import datetime as dt
+import json
+import logging
+import re
+import sys
+from dataclasses import dataclass, field
+from enum import StrEnum
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.bureau_mappings import get_bureau_mappings
+from utils.credit_extraction import CREDIT_RESPONSE, UNKNOWN_BUREAU, CreditExtract, extract_credit
+
+logger = logging.getLogger(__name__)
+
+CREDIT_FILE_VERSION = 2  # Bump when the JSON layout changes; older payloads are rejected
+
+
+class Bureau(StrEnum):
+    """Credit bureau (members compare and hash equal to their names)"""
+
+    EXPERIAN = "Experian"
+    TRANSUNION = "TransUnion"
+    EQUIFAX = "Equifax"
+    UNKNOWN = "Unknown Bureau"
+
+
+class AccountType(StrEnum):
+    """MISMO liability account type"""
+
+    REVOLVING = "Revolving"
+    INSTALLMENT = "Installment"
+    MORTGAGE = "Mortgage"
+    OPEN = "Open"
+    CREDIT_LINE = "CreditLine"
+    UNKNOWN = "Unknown"
+
+
+_ACCOUNT_TYPE_KEYS = {
+    "REVOLVING": AccountType.REVOLVING,
+    "INSTALLMENT": AccountType.INSTALLMENT,
+    "MORTGAGE": AccountType.MORTGAGE,
+    "OPEN": AccountType.OPEN,
+    "CREDITLINE": AccountType.CREDIT_LINE,
+    "LINEOFCREDIT": AccountType.CREDIT_LINE,
+}
+_NON_LETTERS = re.compile(r"[^A-Z]")
+_AMOUNT_NOISE = str.maketrans("", "", "$,% ")
+
+
+@lru_cache(maxsize=256)
+def _bureau_from_text(text: str) -> Bureau:
+    canonical = get_bureau_mappings().canonical_bureau(text)
+    return Bureau._value2member_map_.get(canonical, Bureau.UNKNOWN)
+
+
+def parse_bureau(value: Any) -> Bureau:
+    """Bureau for a repository/CREDIT_BUREAU spelling ("EXPERIAN", "Trans Union"); UNKNOWN otherwise"""
+    if isinstance(value, Bureau):
+        return value
+    return _bureau_from_text(value) if value and isinstance(value, str) else Bureau.UNKNOWN
+
+
+@lru_cache(maxsize=256)
+def _account_type_from_text(text: str) -> AccountType:
+    return _ACCOUNT_TYPE_KEYS.get(_NON_LETTERS.sub("", text.upper()), AccountType.UNKNOWN)
+
+
+def parse_account_type(value: Any) -> Optional[AccountType]:
+    """Account type for a MISMO AccountType spelling; None when missing, UNKNOWN when unrecognized"""
+    if isinstance(value, AccountType):
+        return value
+    return _account_type_from_text(value) if value and isinstance(value, str) else None
+
+
+@lru_cache(maxsize=4096)
+def _date_from_text(text: str) -> Optional[dt.date]:
+    text = text.strip()
+    try:
+        if len(text) >= 10 and text[4] == "-":
+            return dt.date.fromisoformat(text[:10])  # YYYY-MM-DD, optionally followed by a time
+        if len(text) == 8 and text.isdigit():
+            return dt.date(int(text[:4]), int(text[4:6]), int(text[6:]))  # YYYYMMDD
+        if len(text) == 10 and text[2] == "/":
+            return dt.datetime.strptime(text, "%m/%d/%Y").date()
+    except ValueError:
+        pass
+    return None
+
+
+def parse_date(value: Any) -> Optional[dt.date]:
+    """Report/inquiry date; equal dates share one object, unparseable dates are None"""
+    if isinstance(value, dt.datetime):
+        return value.date()
+    if isinstance(value, dt.date):
+        return value
+    return _date_from_text(value) if value and isinstance(value, str) else None
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """Dollar amount or percentage ("$1,250.00", "37%", 1250); None when missing or unparseable"""
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).translate(_AMOUNT_NOISE))
+    except ValueError:
+        return None
+
+
+def parse_score(value: Any) -> Optional[int]:
+    """Credit score as an int; None when missing or not numeric"""
+    amount = parse_amount(value)
+    return int(amount) if amount else None
+
+
+def _text(value: Any) -> Optional[str]:
+    """Interned text, so a creditor or model name repeated across reports is held once"""
+    return sys.intern(value) if value and isinstance(value, str) else None
+
+
+@dataclass(slots=True, frozen=True)
+class LateCounts:
+    """30/60/90-day late payment counts of a liability"""
+
+    days30: int = 0
+    days60: int = 0
+    days90: int = 0
+
+    @classmethod
+    def of(cls, days30: int, days60: int, days90: int) -> "LateCounts":
+        return cls(days30, days60, days90) if days30 or days60 or days90 else NO_LATES
+
+    @property
+    def total(self) -> int:
+        return self.days30 + self.days60 + self.days90
+
+    def __bool__(self) -> bool:
+        return bool(self.days30 or self.days60 or self.days90)
+
+    def __add__(self, other: "LateCounts") -> "LateCounts":
+        return LateCounts(self.days30 + other.days30, self.days60 + other.days60, self.days90 + other.days90)
+
+
+NO_LATES = LateCounts()  # Shared by every liability without late payments
+
+
+@dataclass(slots=True)
+class CreditScore:
+    """One bureau score"""
+
+    bureau: Bureau
+    value: int
+    date: Optional[dt.date] = None
+    model: Optional[str] = None  # ModelNameType
+    score_type: Optional[str] = None  # CreditScoreType
+
+
+@dataclass(slots=True)
+class Liability:
+    """One tradeline"""
+
+    bureau: Bureau
+    account_type: Optional[AccountType] = None
+    creditor: Optional[str] = None
+    balance: Optional[float] = None
+    limit: Optional[float] = None
+    late: LateCounts = NO_LATES
+    date: Optional[dt.date] = None  # Date of the report it appeared in
+    report: int = 0  # Index of that report among the file's bureau reports (copies of a report stay apart)
+
+    @property
+    def utilization(self) -> Optional[float]:
+        """Balance as a percentage of the limit"""
+        if self.balance is None or not self.limit:
+            return None
+        return self.balance / self.limit * 100
+
+
+@dataclass(slots=True)
+class Inquiry:
+    """One hard inquiry"""
+
+    bureau: Bureau
+    date: Optional[dt.date] = None
+    subscriber: Optional[str] = None
+
+
+@dataclass(slots=True)
+class UtilizationSnapshot:
+    """A bureau-reported utilization percentage as of a report date"""
+
+    bureau: Bureau
+    date: Optional[dt.date]
+    percent: float
+    revolving: bool = True
+
+
+def _encode_date(value: Optional[dt.date]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _decode_date(value: Optional[str]) -> Optional[dt.date]:
+    return _date_from_text(value) if value else None
+
+
+@dataclass(slots=True)
+class CreditFile:
+    """
+    Every typed credit record of a customer
+
+    Serializes to compact JSON (one positional array per record, dates as ISO
+    strings, enums as their values) so a cached file decodes back to an equal
+    CreditFile without re-reading the raw bureau data.
+    """
+
+    scores: List[CreditScore] = field(default_factory=list)
+    liabilities: List[Liability] = field(default_factory=list)
+    inquiries: List[Inquiry] = field(default_factory=list)
+    utilization: List[UtilizationSnapshot] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.scores or self.liabilities or self.inquiries or self.utilization)
+
+    def latest_scores(self) -> Dict[Bureau, CreditScore]:
+        """Latest score per bureau (undated scores rank oldest; the last of equals wins)"""
+        latest: Dict[Bureau, CreditScore] = {}
+        for score in self.scores:
+            current = latest.get(score.bureau)
+            if current is None or (score.date or dt.date.min) >= (current.date or dt.date.min):
+                latest[score.bureau] = score
+        return latest
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "v": CREDIT_FILE_VERSION,
+            "scores": [[s.bureau.value, s.value, _encode_date(s.date), s.model, s.score_type] for s in self.scores],
+            "liabilities": [
+                [item.bureau.value, item.account_type.value if item.account_type else None, item.creditor,
+                 item.balance, item.limit, [item.late.days30, item.late.days60, item.late.days90],
+                 _encode_date(item.date), item.report]
+                for item in self.liabilities
+            ],
+            "inquiries": [[item.bureau.value, _encode_date(item.date), item.subscriber] for item in self.inquiries],
+            "utilization": [
+                [item.bureau.value, _encode_date(item.date), item.percent, item.revolving] for item in self.utilization
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CreditFile":
+        """
+        Decode a to_dict() payload
+
+        Raises:
+            ValueError: On a payload written by another CREDIT_FILE_VERSION
+        """
+        if data.get("v") != CREDIT_FILE_VERSION:
+            raise ValueError(f"Unsupported credit file version: {data.get('v')}")
+        return cls(
+            scores=[
+                CreditScore(Bureau(bureau), value, _decode_date(day), _text(model), _text(score_type))
+                for bureau, value, day, model, score_type in data["scores"]
+            ],
+            liabilities=[
+                Liability(Bureau(bureau), AccountType(account_type) if account_type else None, _text(creditor),
+                          balance, limit, LateCounts.of(*late), _decode_date(day), report)
+                for bureau, account_type, creditor, balance, limit, late, day, report in data["liabilities"]
+            ],
+            inquiries=[
+                Inquiry(Bureau(bureau), _decode_date(day), _text(subscriber))
+                for bureau, day, subscriber in data["inquiries"]
+            ],
+            utilization=[
+                UtilizationSnapshot(Bureau(bureau), _decode_date(day), percent, revolving)
+                for bureau, day, percent, revolving in data["utilization"]
+            ],
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, payload: str) -> "CreditFile":
+        return cls.from_dict(json.loads(payload))
+
+
+def credit_file_from_extract(extract: CreditExtract) -> CreditFile:
+    """
+    Typed records of a single-pass extract, each score, date and amount parsed once
+
+    Scores take the bureau of their repository (the report's bureau when they
+    have none); utilization is attributed like dated_utilization().
+    """
+    credit = CreditFile()
+    for index, report in enumerate(extract.reports):
+        bureau = parse_bureau(report.bureau)
+        day = parse_date(report.date)
+        for score in report.scores:
+            value = parse_score(score.value)
+            if value:
+                credit.scores.append(CreditScore(
+                    parse_bureau(score.source) if score.source else bureau, value, day,
+                    _text(score.model), _text(score.score_type),
+                ))
+        for liability in report.liabilities:
+            credit.liabilities.append(Liability(
+                bureau,
+                parse_account_type(liability.account_type),
+                _text(liability.creditor),
+                parse_amount(liability.balance),
+                parse_amount(liability.limit),
+                LateCounts.of(*liability.late_counts()),
+                day,
+                index,
+            ))
+        for inquiry in report.inquiries:
+            credit.inquiries.append(Inquiry(bureau, parse_date(inquiry.date), _text(inquiry.subscriber)))
+        if report.source == CREDIT_RESPONSE and report.score_bureau != UNKNOWN_BUREAU:
+            utilization_bureau = parse_bureau(report.score_bureau)
+            for value in report.revolving_utilization:
+                percent = parse_amount(value)
+                if percent is not None:
+                    credit.utilization.append(UtilizationSnapshot(utilization_bureau, day, percent))
+    return credit
+
+
+# Record field paths parse_credit_file reads: records projected to these parse to the same CreditFile
+CREDIT_FILE_PATHS = (
+    "CREDIT_RESPONSE.CREDIT_BUREAU",
+    "CREDIT_RESPONSE.CreditReportFirstIssuedDate",
+    "CREDIT_RESPONSE.CREDIT_SCORE.Value",
+    "CREDIT_RESPONSE.CREDIT_SCORE.CreditRepositorySourceType",
+    "CREDIT_RESPONSE.CREDIT_SCORE.ModelNameType",
+    "CREDIT_RESPONSE.CREDIT_SCORE.CreditScoreType",
+    "CREDIT_RESPONSE.CREDIT_LIABILITY.AccountType",
+    "CREDIT_RESPONSE.CREDIT_LIABILITY.Creditor",
+    "CREDIT_RESPONSE.CREDIT_LIABILITY.CreditBalance",
+    "CREDIT_RESPONSE.CREDIT_LIABILITY.CreditLimitAmount",
+    "CREDIT_RESPONSE.CREDIT_LIABILITY.LateCount",
+    "CREDIT_RESPONSE.CREDIT_INQUIRY.InquiryDate",
+    "CREDIT_RESPONSE.CREDIT_INQUIRY.SubscriberName",
+    "CREDIT_RESPONSE.CREDIT_SUMMARY.DATA_SET",
+    "CREDIT_RESPONSE.CREDIT_ATTRIBUTES.DATA_SET",
+    "EQUIFAX_REPORT.REPORT_DATE",
+    "EQUIFAX_REPORT.CREDIT_SCORE",
+    "EQUIFAX_REPORT.CREDIT_LIABILITY",
+)
+
+
+def parse_credit_file(records: Iterable[Dict[str, Any]]) -> CreditFile:
+    """Typed credit records of an entity's records"""
+    return credit_file_from_extract(extract_credit(records))
@@ -7,6 +7,9 @@ import re
 from datetime import datetime
 from typing import Any, Dict, List
 
+from utils.credit_columns import LiabilityColumns, month_over_month, table_rows
+from utils.credit_models import parse_credit_file
+
 
 class DataExpansionEngine:
     """Process and enhance Tilores entity data with normalization and insights"""
@@ -235,6 +238,8 @@ class DataExpansionEngine:
             "record_count": 0,
             "unique_emails": [],
             "unique_phones": [],
+            "latest_credit_scores": {},
+            "credit_trend": {},
             "data_completeness": 0.0,
         }
 
@@ -282,7 +287,16 @@ class DataExpansionEngine:
             "LOAN",
             "MORTGAGE",
         }
-        insights["has_financial_data"] = bool(financial_indicators & populated_fields)
+        # Bureau reports are nested under CREDIT_RESPONSE/EQUIFAX_REPORT, so read them through the typed model
+        credit = parse_credit_file(records)
+        insights["latest_credit_scores"] = {
+            str(bureau): score.value for bureau, score in credit.latest_scores().items()
+        }
+        insights["has_financial_data"] = bool(financial_indicators & populated_fields) or bool(credit)
+        # Latest report month per bureau, with the change since the bureau's previous month
+        for row in table_rows(month_over_month(LiabilityColumns.from_credit_file(credit))):
+            del row["owner"]
+            insights["credit_trend"][row.pop("bureau")] = row  # Rows run oldest to newest month
 
         # Determine primary identifier
         if emails:
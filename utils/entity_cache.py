@@ -0,0 +1,368 @@
+"""
+Entity Data Cache for Tilores_X
+Caches Tilores entity records by entity ID with field-set-aware reuse, partial-fetch
+merging, stale-while-revalidate refresh, a content hash and the parsed credit file per entry
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from utils.credit_models import CREDIT_FILE_PATHS, CreditFile, parse_credit_file
+from utils.field_projection import build_field_tree, project_value
+
+logger = logging.getLogger(__name__)
+
+# Fetches {"id": ..., "records": [...]} (or None) for the requested field paths
+EntityFetcher = Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+
+ENTITY_CACHE_CONFIG = {
+    "enabled": os.getenv("ENTITY_CACHE_ENABLED", "true").lower() == "true",
+    "fresh_ttl": float(os.getenv("ENTITY_CACHE_TTL", "300")),  # Served without refresh (s)
+    "stale_ttl": float(os.getenv("ENTITY_CACHE_STALE_TTL", "900")),  # Served while refreshing (s)
+    "max_entries": int(os.getenv("ENTITY_CACHE_MAX_ENTRIES", "1000")),  # L1 LRU size
+}
+
+
+def merge_values(existing: Any, new: Any) -> Any:
+    """Deep-merge two projections of the same record value"""
+    if isinstance(existing, dict) and isinstance(new, dict):
+        merged = dict(existing)
+        for key, value in new.items():
+            merged[key] = merge_values(existing[key], value) if key in existing else value
+        return merged
+    if isinstance(existing, list) and isinstance(new, list) and len(existing) == len(new):
+        # Same record, same list order - element-wise merge of the two projections
+        return [merge_values(old, item) for old, item in zip(existing, new)]
+    return new
+
+
+def merge_records(existing: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge two record lists by record id (records without an id are replaced wholesale)"""
+    if any("id" not in record for record in existing + new):
+        return new
+    merged = {record["id"]: record for record in existing}
+    for record in new:
+        merged[record["id"]] = merge_values(merged[record["id"]], record) if record["id"] in merged else record
+    return list(merged.values())
+
+
+def values_mergeable(existing: Any, new: Any) -> bool:
+    """True when merge_values keeps both projections whole (no list of a different length replaced)"""
+    if isinstance(existing, dict) and isinstance(new, dict):
+        return all(values_mergeable(existing[key], value) for key, value in new.items() if key in existing)
+    if isinstance(existing, list) and isinstance(new, list):
+        return len(existing) == len(new) and all(values_mergeable(old, item) for old, item in zip(existing, new))
+    return True
+
+
+def records_mergeable(existing: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> bool:
+    """True when merge_records yields records holding every field of both fetches"""
+    if any("id" not in record for record in existing + new):
+        return False
+    old = {record["id"]: record for record in existing}
+    if old.keys() != {record["id"] for record in new}:
+        return False  # Records added or gone: the others only hold one fetch's fields
+    return all(values_mergeable(old[record["id"]], record) for record in new)
+
+
+def covers(paths: Iterable[str], required: Iterable[str]) -> bool:
+    """
+    True when every required path is selected by `paths`: itself, under a selected
+    parent (which holds its subtree), or as a parent object selected field by field
+    """
+    paths = set(paths)
+    return all(
+        any(".".join(path.split(".")[:depth]) in paths for depth in range(1, path.count(".") + 2))
+        or any(selected.startswith(path + ".") for selected in paths)
+        for path in required
+    )
+
+
+def compute_content_hash(records: List[Dict[str, Any]]) -> str:
+    """Stable hash of an entity's cached records (data version for downstream caches)"""
+    return hashlib.sha256(json.dumps(records, sort_keys=True, default=str).encode()).hexdigest()
+
+
+@dataclass
+class EntityCacheEntry:
+    """Cached records of one entity and the field paths they contain"""
+
+    entity_id: str
+    paths: FrozenSet[str]
+    records: List[Dict[str, Any]]
+    fetched_at: float
+    content_hash: str
+    credit: Optional[CreditFile] = field(default=None, repr=False)  # Parsed by credit_file() on first use
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "entity_id": self.entity_id,
+            "paths": sorted(self.paths),
+            "records": self.records,
+            "fetched_at": self.fetched_at,
+            "content_hash": self.content_hash,
+            "credit_file": self.credit.to_dict() if self.credit is not None else None,
+        })
+
+    @classmethod
+    def from_json(cls, raw: Any) -> "EntityCacheEntry":
+        data = json.loads(raw)
+        credit = None
+        if data.get("credit_file"):
+            try:
+                credit = CreditFile.from_dict(data["credit_file"])
+            except (ValueError, KeyError, TypeError):
+                pass  # Written by another CREDIT_FILE_VERSION: re-parsed from the records on use
+        return cls(
+            entity_id=data["entity_id"],
+            paths=frozenset(data["paths"]),
+            records=data["records"],
+            fetched_at=data["fetched_at"],
+            content_hash=data["content_hash"],
+            credit=credit,
+        )
+
+
+class EntityCache:
+    """
+    Two-level (in-process LRU + Redis) cache of Tilores entity records
+
+    A request is served from cache when its field paths are a subset of the
+    cached entry's paths. Fetches for other field sets are merged into the
+    entry by record id. Entries older than the fresh TTL are still served
+    within the stale window while a background task refreshes them.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the cache
+
+        Args:
+            config: Optional configuration overriding ENTITY_CACHE_CONFIG
+        """
+        self.config = {**ENTITY_CACHE_CONFIG, **(config or {})}
+        self._entries: "OrderedDict[str, EntityCacheEntry]" = OrderedDict()
+        self._refreshing: Dict[Tuple[str, FrozenSet[str]], asyncio.Task] = {}
+
+        # Statistics
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "partial_misses": 0,
+            "l1_hits": 0,
+            "redis_hits": 0,
+            "merges": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "evictions": 0,
+            "redis_errors": 0,
+            "credit_parses": 0,
+            "credit_hits": 0,
+        }
+
+        logger.info(
+            f"🗃️ Entity cache initialized (fresh: {self.config['fresh_ttl']}s, "
+            f"stale: {self.config['stale_ttl']}s, enabled: {self.config['enabled']})"
+        )
+
+    @staticmethod
+    def _redis_key(entity_id: str) -> str:
+        return f"tilores:entity:{entity_id}"
+
+    def _age(self, entry: EntityCacheEntry) -> float:
+        return time.time() - entry.fetched_at
+
+    def _is_fresh(self, entry: EntityCacheEntry) -> bool:
+        return self._age(entry) < self.config["fresh_ttl"]
+
+    def _is_servable(self, entry: EntityCacheEntry) -> bool:
+        return self._age(entry) < self.config["fresh_ttl"] + self.config["stale_ttl"]
+
+    def _remember(self, entry: EntityCacheEntry):
+        """Store an entry in the L1 LRU"""
+        self._entries[entry.entity_id] = entry
+        self._entries.move_to_end(entry.entity_id)
+        while len(self._entries) > self.config["max_entries"]:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def _lookup(self, entity_id: str, redis_client: Optional[Any]) -> Optional[EntityCacheEntry]:
+        """Find a servable entry in L1, then Redis"""
+        entry = self._entries.get(entity_id)
+        if entry is not None:
+            if self._is_servable(entry):
+                self._entries.move_to_end(entity_id)
+                self.stats["l1_hits"] += 1
+                return entry
+            del self._entries[entity_id]
+
+        if redis_client is not None:
+            try:
+                raw = await redis_client.get(self._redis_key(entity_id))
+                if raw:
+                    entry = EntityCacheEntry.from_json(raw)
+                    if self._is_servable(entry):
+                        self._remember(entry)
+                        self.stats["redis_hits"] += 1
+                        return entry
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.warning(f"⚠️ Entity cache Redis read failed: {e}")
+        return None
+
+    async def _store(self, entity_id: str, paths: FrozenSet[str], records: List[Dict[str, Any]],
+                     redis_client: Optional[Any]) -> EntityCacheEntry:
+        """Merge freshly fetched records into the cached entry and persist it"""
+        now = time.time()
+        existing = self._entries.get(entity_id)
+        if existing is not None and self._is_fresh(existing) and records_mergeable(existing.records, records):
+            # Keep the older timestamp so merged-in fields never extend stale data's life
+            records = merge_records(existing.records, records)
+            paths = existing.paths | paths
+            fetched_at = existing.fetched_at
+            self.stats["merges"] += 1
+        else:
+            # Data changed shape since the cached fetch: the entry holds only this fetch's fields
+            fetched_at = now
+
+        content_hash = compute_content_hash(records)
+        entry = EntityCacheEntry(entity_id, paths, records, fetched_at, content_hash)
+        if existing is not None and existing.content_hash == content_hash:
+            entry.credit = existing.credit  # Refresh returned the same records (parsed on first use otherwise)
+        self._remember(entry)
+
+        if redis_client is not None:
+            ttl = max(1, int(self.config["fresh_ttl"] + self.config["stale_ttl"] - (now - fetched_at)))
+            try:
+                await redis_client.setex(self._redis_key(entity_id), ttl, entry.to_json())
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.warning(f"⚠️ Entity cache Redis write failed: {e}")
+        return entry
+
+    async def _fetch_and_store(self, entity_id: str, paths: FrozenSet[str], fetcher: EntityFetcher,
+                               redis_client: Optional[Any]) -> Optional[EntityCacheEntry]:
+        entity = await fetcher()
+        if not entity or not entity.get("records"):
+            return None
+        return await self._store(entity_id, paths, entity["records"], redis_client)
+
+    def _schedule_refresh(self, entity_id: str, paths: FrozenSet[str], fetcher: EntityFetcher,
+                          redis_client: Optional[Any]):
+        """Refresh a stale entry in the background (one refresh per entity and field set)"""
+        key = (entity_id, paths)
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                self.stats["refreshes"] += 1
+                await self._fetch_and_store(entity_id, paths, fetcher, redis_client)
+            except Exception as e:
+                self.stats["refresh_failures"] += 1
+                logger.warning(f"⚠️ Background entity refresh failed for {entity_id}: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    def _view(self, entry: EntityCacheEntry, paths: FrozenSet[str]) -> Dict[str, Any]:
+        """The cached entity reduced to the requested field paths"""
+        tree = build_field_tree(paths)
+        return {"id": entry.entity_id, "records": [project_value(record, tree) for record in entry.records]}
+
+    async def get_or_fetch(self, entity_id: str, paths: Iterable[str], fetcher: EntityFetcher,
+                           redis_client: Optional[Any] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Get entity records for a field set, fetching only when the cache can't serve them
+
+        Args:
+            entity_id: Tilores entity ID
+            paths: Dot-separated record field paths the caller needs
+            fetcher: Coroutine function fetching the entity for exactly these paths
+            redis_client: Optional redis.asyncio client for the shared tier
+
+        Returns:
+            Tuple of (entity dict with "id" and "records", content hash), or (None, None) when not found
+        """
+        paths = frozenset(paths)
+        if not self.config["enabled"]:
+            entity = await fetcher()
+            if not entity or not entity.get("records"):
+                return None, None
+            return entity, compute_content_hash(entity["records"])
+
+        entry = await self._lookup(entity_id, redis_client)
+        if entry is not None and paths <= entry.paths:
+            if self._is_fresh(entry):
+                self.stats["hits"] += 1
+            else:
+                self.stats["stale_hits"] += 1
+                self._schedule_refresh(entity_id, paths, fetcher, redis_client)
+            return self._view(entry, paths), entry.content_hash
+
+        self.stats["partial_misses" if entry is not None else "misses"] += 1
+        entry = await self._fetch_and_store(entity_id, paths, fetcher, redis_client)
+        if entry is None:
+            return None, None
+        return self._view(entry, paths), entry.content_hash
+
+    def credit_file(self, entity_id: Optional[str],
+                    required: Iterable[str] = CREDIT_FILE_PATHS) -> Optional[CreditFile]:
+        """
+        Parsed credit file of an entity cached in this process, without re-reading its bureau reports
+
+        Returns None when the entity isn't cached, is past the stale window, or
+        its cached field paths don't cover `required` (the file would be partial).
+        """
+        entry = self._entries.get(entity_id) if entity_id else None
+        if entry is None or not self._is_servable(entry) or not covers(entry.paths, required):
+            return None
+        if entry.credit is None:
+            entry.credit = parse_credit_file(entry.records)
+            self.stats["credit_parses"] += 1
+        else:
+            self.stats["credit_hits"] += 1
+        return entry.credit
+
+    async def invalidate(self, entity_id: str, redis_client: Optional[Any] = None):
+        """Drop an entity from both tiers (e.g. after a webhook reports a change)"""
+        self._entries.pop(entity_id, None)
+        if redis_client is not None:
+            try:
+                await redis_client.delete(self._redis_key(entity_id))
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.warning(f"⚠️ Entity cache Redis delete failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        served = self.stats["hits"] + self.stats["stale_hits"]
+        lookups = served + self.stats["misses"] + self.stats["partial_misses"]
+        return {
+            **self.stats,
+            "enabled": self.config["enabled"],
+            "entries": len(self._entries),
+            "refreshing": len(self._refreshing),
+            "hit_rate": round(served / max(1, lookups) * 100, 1),
+        }
+
+
+# Global instance
+_entity_cache = None
+
+
+def get_entity_cache() -> EntityCache:
+    """Get or create the global entity cache"""
+    global _entity_cache
+    if _entity_cache is None:
+        _entity_cache = EntityCache()
+    return _entity_cache
@@ -0,0 +1,191 @@
+"""
+Identifier Resolution Cache for Tilores_X
+Maps normalized customer identifiers (email, phone, client ID, Salesforce ID, name)
+to Tilores entity IDs, including short-lived "not found" entries
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_NOT_FOUND = ""  # Stored value for negative entries
+_MISSING = object()
+
+RESOLUTION_CACHE_CONFIG = {
+    "enabled": os.getenv("RESOLUTION_CACHE_ENABLED", "true").lower() == "true",
+    "ttl": int(os.getenv("RESOLUTION_CACHE_TTL", "86400")),  # Found entities (s)
+    "negative_ttl": int(os.getenv("RESOLUTION_CACHE_NEGATIVE_TTL", "120")),  # Not found (s)
+    "max_entries": int(os.getenv("RESOLUTION_CACHE_MAX_ENTRIES", "10000")),  # L1 LRU size
+}
+
+
+def normalize_identifier(field: str, value: Any) -> str:
+    """Normalize one identifier value so formatting variants share a cache entry"""
+    value = str(value).strip()
+    field = field.upper()
+    if field == "EMAIL":
+        return value.lower()
+    if field.startswith("PHONE"):
+        digits = re.sub(r"\D", "", value)
+        return digits[-10:] if len(digits) > 10 else digits
+    if field in ("FIRST_NAME", "LAST_NAME"):
+        return " ".join(value.split()).lower()
+    return value
+
+
+def resolution_key(identifiers: Dict[str, Any]) -> str:
+    """Stable key for a set of identifiers (hashed - raw identifiers are PII)"""
+    normalized = sorted((field.upper(), normalize_identifier(field, value)) for field, value in identifiers.items())
+    return hashlib.sha256(json.dumps(normalized).encode()).hexdigest()
+
+
+class EntityResolutionCache:
+    """
+    Two-level (in-process LRU + Redis) index of identifier -> entity ID
+
+    Entity IDs almost never change, so hits skip the Tilores search round trip.
+    Misses are cached for a short negative TTL so typos and false-positive name
+    matches don't repeatedly hit Tilores. Resolver errors are never cached.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the cache
+
+        Args:
+            config: Optional configuration overriding RESOLUTION_CACHE_CONFIG
+        """
+        self.config = {**RESOLUTION_CACHE_CONFIG, **(config or {})}
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()  # key -> (entity id, expires at)
+
+        # Statistics
+        self.stats = {
+            "lookups": 0,
+            "hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "l1_hits": 0,
+            "redis_hits": 0,
+            "resolved": 0,
+            "not_found": 0,
+            "redis_errors": 0,
+        }
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return f"tilores:resolve:{key}"
+
+    def _remember(self, key: str, value: str, ttl: float):
+        self._entries[key] = (value, time.time() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.config["max_entries"]:
+            self._entries.popitem(last=False)
+
+    async def _lookup(self, key: str, redis_client: Optional[Any]) -> Any:
+        """Cached value ("" = not found), or _MISSING"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if time.time() < expires_at:
+                self._entries.move_to_end(key)
+                self.stats["l1_hits"] += 1
+                return value
+            del self._entries[key]
+
+        if redis_client is not None:
+            try:
+                raw = await redis_client.get(self._redis_key(key))
+                if raw is not None:
+                    value = raw.decode() if isinstance(raw, bytes) else raw
+                    ttl = self.config["ttl"] if value else self.config["negative_ttl"]
+                    self._remember(key, value, ttl)
+                    self.stats["redis_hits"] += 1
+                    return value
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.warning(f"⚠️ Resolution cache Redis read failed: {e}")
+        return _MISSING
+
+    async def _store(self, key: str, value: str, redis_client: Optional[Any]):
+        ttl = self.config["ttl"] if value else self.config["negative_ttl"]
+        self._remember(key, value, ttl)
+        if redis_client is not None:
+            try:
+                await redis_client.setex(self._redis_key(key), ttl, value)
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.warning(f"⚠️ Resolution cache Redis write failed: {e}")
+
+    async def resolve(self, identifiers: Dict[str, Any], resolver: Callable[[], Awaitable[Optional[str]]],
+                      redis_client: Optional[Any] = None) -> Optional[str]:
+        """
+        Resolve identifiers to an entity ID, calling the resolver only on a cache miss
+
+        Args:
+            identifiers: Search parameters (e.g. {"EMAIL": "..."})
+            resolver: Coroutine function performing the Tilores search (entity ID or None)
+            redis_client: Optional redis.asyncio client for the shared tier
+
+        Returns:
+            Entity ID, or None when no entity matches
+        """
+        if not self.config["enabled"]:
+            return await resolver()
+
+        self.stats["lookups"] += 1
+        key = resolution_key(identifiers)
+        cached = await self._lookup(key, redis_client)
+        if cached is not _MISSING:
+            if cached:
+                self.stats["hits"] += 1
+                logger.debug(f"🔑 Resolved identifiers from cache ({key[:8]})")
+                return cached
+            self.stats["negative_hits"] += 1
+            return None
+
+        self.stats["misses"] += 1
+        entity_id = await resolver()
+        self.stats["resolved" if entity_id else "not_found"] += 1
+        await self._store(key, entity_id or _NOT_FOUND, redis_client)
+        return entity_id
+
+    async def invalidate(self, identifiers: Dict[str, Any], redis_client: Optional[Any] = None):
+        """Forget a resolution (e.g. after a merge changes the entity ID)"""
+        key = resolution_key(identifiers)
+        self._entries.pop(key, None)
+        if redis_client is not None:
+            try:
+                await redis_client.delete(self._redis_key(key))
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.warning(f"⚠️ Resolution cache Redis delete failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        served = self.stats["hits"] + self.stats["negative_hits"]
+        return {
+            **self.stats,
+            "enabled": self.config["enabled"],
+            "entries": len(self._entries),
+            "saved_round_trips": served,
+            "hit_rate": round(served / max(1, self.stats["lookups"]) * 100, 1),
+        }
+
+
+# Global instance
+_resolution_cache = None
+
+
+def get_resolution_cache() -> EntityResolutionCache:
+    """Get or create the global identifier resolution cache"""
+    global _resolution_cache
+    if _resolution_cache is None:
+        _resolution_cache = EntityResolutionCache()
+    return _resolution_cache
@@ -0,0 +1,337 @@
+"""
+Fast-Path Answers for Tilores_X
+Answers high-frequency, fully structured questions (account status, latest scores,
+utilization, late payments, last payment, balance) from templates without an LLM
+"""
+
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from utils.credit_context import CreditContextBuilder, get_credit_context_builder
+from utils.similarity_cache import normalize_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_agents(raw: str) -> Dict[str, bool]:
+    """Parse "agent=true,agent=false" into a dict"""
+    agents = {}
+    for item in raw.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            agents[name.strip()] = value.strip().lower() == "true"
+    return agents
+
+
+FAST_PATH_CONFIG = {
+    "enabled": os.getenv("FAST_PATH_ENABLED", "true").lower() == "true",
+    "agents": _parse_agents(os.getenv("FAST_PATH_AGENTS", "")),  # Overrides the agent prompt's "fast_path" flag
+}
+
+BUREAUS = ("equifax", "experian", "transunion")
+
+
+@dataclass(frozen=True)
+class FastIntent:
+    """
+    A structured question the fast path can answer
+
+    The question's normalized tokens (identifiers and fillers dropped) must
+    include one of `required` and be drawn entirely from `required`, `allowed`
+    and the bureau names; any other word makes it open-ended.
+    """
+
+    name: str
+    required: Tuple[FrozenSet[str], ...]
+    allowed: FrozenSet[str]
+    data_intents: Tuple[str, ...]  # Field-planner intents the answer is rendered from
+    categories: Tuple[str, ...]  # Slash-command categories it applies to
+
+    def matches(self, tokens: FrozenSet[str]) -> bool:
+        if not any(required <= tokens for required in self.required):
+            return False
+        vocabulary = self.allowed.union(*self.required)
+        return all(token in vocabulary or token in BUREAUS for token in tokens)
+
+
+def _words(text: str) -> FrozenSet[str]:
+    """Vocabulary normalized the same way as questions (so "status" matches its stemmed form)"""
+    return normalize_tokens(text)
+
+
+# Checked in order; the first match wins
+FAST_INTENTS = (
+    FastIntent(
+        "status", (_words("status"), _words("active"), _words("enrolled"), _words("enrollment")),
+        _words("account salesforce subscription product still currently cancelled"),
+        ("status",), ("status", "billing", "credit"),
+    ),
+    FastIntent(
+        "latest_score", (_words("score"),),
+        _words("credit latest recent most fico vantage bureau each per all three 3 now"),
+        ("scores",), ("credit",),
+    ),
+    FastIntent(
+        "utilization", (_words("utilization"), _words("utilisation")),
+        _words("credit revolving rate ratio percentage latest recent most now"),
+        ("utilization",), ("credit",),
+    ),
+    FastIntent(
+        "late_payments", (_words("late"),),
+        _words("payment how many number count total credit report"),
+        ("late_payments",), ("credit",),
+    ),
+    FastIntent(
+        "last_payment", (_words("last payment"), _words("last transaction"), _words("recent payment")),
+        _words("when date amount made most approved"),
+        ("billing",), ("billing", "status"),
+    ),
+    FastIntent(
+        "balance", (_words("balance"),),
+        _words("account due owed net enrollment outstanding remaining"),
+        ("billing",), ("billing", "status"),
+    ),
+)
+
+# What the bare category (only a customer identifier, no question) answers
+CATEGORY_DEFAULT_FAST_INTENTS = {"status": "status"}
+
+
+class FastPathEngine:
+    """
+    Deterministic intent-to-template answers
+
+    A question is served from a template only when every word in it belongs
+    to one of the structured intents; anything open-ended (why, how to, should,
+    compare, explain) goes to the LLM. Templates read the same extracted
+    tables the LLM context is built from, and a template that finds no data
+    also falls back to the LLM.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, builder: Optional[CreditContextBuilder] = None):
+        """
+        Initialize the engine
+
+        Args:
+            config: Optional configuration overriding FAST_PATH_CONFIG
+            builder: Extracts the score/utilization/late-payment tables (default: global builder)
+        """
+        self.config = {**FAST_PATH_CONFIG, **(config or {})}
+        self.builder = builder or get_credit_context_builder()
+        self._intents = {intent.name: intent for intent in FAST_INTENTS}
+        self._renderers = {
+            "status": self._render_status,
+            "latest_score": self._render_latest_score,
+            "utilization": self._render_utilization,
+            "late_payments": self._render_late_payments,
+            "last_payment": self._render_last_payment,
+            "balance": self._render_balance,
+        }
+
+        # Statistics
+        self.stats = {
+            "requests": 0,
+            "served": 0,
+            "agent_disabled": 0,
+            "open_ended": 0,
+            "missing_data": 0,
+            "render_ms": 0.0,
+            "by_intent": {},
+        }
+
+    def enabled_for(self, agent_type: Optional[str], agent_config: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether the fast path serves an agent (FAST_PATH_AGENTS, then the agent prompt's "fast_path" flag)"""
+        if not self.config["enabled"]:
+            return False
+        if agent_type in self.config["agents"]:
+            return self.config["agents"][agent_type]
+        return bool((agent_config or {}).get("fast_path", False))
+
+    def match(self, query: str, category: Optional[str], agent_type: Optional[str] = None,
+              agent_config: Optional[Dict[str, Any]] = None) -> Optional[FastIntent]:
+        """
+        Fast intent for a question, or None when it needs the LLM
+
+        Args:
+            query: User question (customer identifiers are ignored)
+            category: Slash-command category
+            agent_type: Agent handling the question
+            agent_config: Agent prompt configuration (carries the per-agent "fast_path" switch)
+        """
+        self.stats["requests"] += 1
+        if not self.enabled_for(agent_type, agent_config):
+            self.stats["agent_disabled"] += 1
+            return None
+
+        tokens = normalize_tokens(query)
+        if not tokens:
+            name = CATEGORY_DEFAULT_FAST_INTENTS.get(category)
+            if name:
+                return self._intents[name]
+        for intent in FAST_INTENTS:
+            if (category is None or category in intent.categories) and intent.matches(tokens):
+                return intent
+        self.stats["open_ended"] += 1
+        return None
+
+    def answer(self, intent: FastIntent, query: str, records: Optional[List[Dict[str, Any]]]) -> Optional[str]:
+        """Render the answer for a matched intent, or None when the records lack the data"""
+        start = time.perf_counter()
+        answer = self._renderers[intent.name](records or [], normalize_tokens(query)) if records else None
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if answer is None:
+            self.stats["missing_data"] += 1
+            return None
+        self.stats["served"] += 1
+        self.stats["render_ms"] += elapsed_ms
+        self.stats["by_intent"][intent.name] = self.stats["by_intent"].get(intent.name, 0) + 1
+        logger.info(f"⚡ Fast-path {intent.name} answer rendered in {elapsed_ms:.2f}ms")
+        return answer
+
+    # Templates
+
+    @staticmethod
+    def _latest_per_bureau(rows: List[Tuple[Any, ...]], tokens: FrozenSet[str]) -> List[Tuple[Any, ...]]:
+        """Latest row per bureau (rows are (bureau, date, ...)), limited to bureaus named in the question"""
+        named = [bureau for bureau in BUREAUS if bureau in tokens]
+        latest: Dict[str, Tuple[Any, ...]] = {}
+        for row in rows:
+            bureau = str(row[0])
+            if named and bureau.lower() not in named:
+                continue
+            if bureau not in latest or str(row[1]) >= str(latest[bureau][1]):
+                latest[bureau] = row
+        return [latest[bureau] for bureau in sorted(latest)]
+
+    @staticmethod
+    def _latest_value(records: List[Dict[str, Any]], field: str, date_field: Optional[str] = None) -> Any:
+        """Field value from the record with the latest date_field (or the last record that has it)"""
+        best, best_date = None, None
+        for record in records:
+            value = record.get(field)
+            if value in (None, ""):
+                continue
+            date = str(record.get(date_field) or "") if date_field else ""
+            if best is None or best_date is None or date >= best_date:
+                best, best_date = value, date
+        return best
+
+    def _render_status(self, records: List[Dict[str, Any]], tokens: FrozenSet[str]) -> Optional[str]:
+        status = name = product = enrolled = None
+        for record in records:
+            status = record.get("STATUS") or status
+            if record.get("FIRST_NAME") and record.get("LAST_NAME"):
+                name = f"{record.get('FIRST_NAME')} {record.get('LAST_NAME')}"
+            product = record.get("CURRENT_PRODUCT") or record.get("PRODUCT_NAME") or product
+            enrolled = record.get("ENROLL_DATE") or enrolled
+        if not status:
+            return None
+
+        text = "**Salesforce Account Status:**\n\n"
+        text += f"• **Status:** {str(status).title()}\n"
+        if name:
+            text += f"• **Customer:** {name}\n"
+        if product:
+            text += f"• **Product:** {product}\n"
+        if enrolled:
+            text += f"• **Enrolled:** {enrolled}\n"
+        return text
+
+    def _render_latest_score(self, records: List[Dict[str, Any]], tokens: FrozenSet[str]) -> Optional[str]:
+        section = self.builder.sections(records).get("scores")
+        if section is None:
+            return None
+        rows = self._latest_per_bureau([row for row in section.rows if row[3] != "change"], tokens)
+        if not rows:
+            return None
+        text = "**Latest Credit Scores:**\n\n"
+        for bureau, date, score, model in rows:
+            details = ", ".join(str(part) for part in (model, date) if part)
+            text += f"• **{bureau}:** {score}" + (f" ({details})" if details else "") + "\n"
+        return text
+
+    def _render_utilization(self, records: List[Dict[str, Any]], tokens: FrozenSet[str]) -> Optional[str]:
+        section = self.builder.sections(records).get("utilization")
+        if section is None:
+            return None
+        rows = self._latest_per_bureau([row for row in section.rows if row[3] == "revolving"] or section.rows, tokens)
+        if not rows:
+            return None
+        text = "**Credit Utilization:**\n\n"
+        for bureau, date, pct, kind in rows:
+            text += f"• **{bureau}:** {pct} {kind}" + (f" (as of {date})" if date else "") + "\n"
+        return text
+
+    def _render_late_payments(self, records: List[Dict[str, Any]], tokens: FrozenSet[str]) -> Optional[str]:
+        section = self.builder.sections(records).get("late_payments")
+        if section is None:
+            return None
+        rows = self._latest_per_bureau(section.rows, tokens)
+        if not rows:
+            return None
+        text = "**Late Payments (latest report per bureau):**\n\n"
+        for bureau, date, days30, days60, days90, accounts in rows:
+            total = days30 + days60 + days90
+            text += (f"• **{bureau}:** {total} late payment{'s' if total != 1 else ''} "
+                     f"(30 days: {days30}, 60 days: {days60}, 90+ days: {days90}) "
+                     f"across {accounts} account{'s' if accounts != 1 else ''}")
+            text += f", report {date}\n" if date else "\n"
+        return text
+
+    def _render_last_payment(self, records: List[Dict[str, Any]], tokens: FrozenSet[str]) -> Optional[str]:
+        date = self._latest_value(records, "LAST_APPROVED_TRANSACTION", "LAST_APPROVED_TRANSACTION")
+        amount = self._latest_value(records, "LAST_APPROVED_TRANSACTION_AMOUNT", "LAST_APPROVED_TRANSACTION")
+        if not date and not amount:
+            return None
+        method = self._latest_value(records, "PAYMENT_METHOD")
+        card_type = self._latest_value(records, "CARD_TYPE")
+        card_last_4 = self._latest_value(records, "CARD_LAST_4")
+
+        text = "**Last Payment:**\n\n"
+        if date:
+            text += f"• **Date:** {date}\n"
+        if amount:
+            text += f"• **Amount:** ${amount}\n"
+        if method or card_type:
+            card = " ".join(str(part) for part in (card_type, f"ending {card_last_4}" if card_last_4 else None) if part)
+            text += f"• **Method:** {', '.join(str(part) for part in (method, card) if part)}\n"
+        return text
+
+    def _render_balance(self, records: List[Dict[str, Any]], tokens: FrozenSet[str]) -> Optional[str]:
+        due = self._latest_value(records, "NET_BALANCE_DUE")
+        enrollment = self._latest_value(records, "ENROLLMENT_BALANCE")
+        if due is None and enrollment is None:
+            return None
+        text = "**Account Balance:**\n\n"
+        if due is not None:
+            text += f"• **Net balance due:** ${due}\n"
+        if enrollment is not None:
+            text += f"• **Enrollment balance:** ${enrollment}\n"
+        return text
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get fast-path statistics, including the share of traffic served without an LLM"""
+        served = max(1, self.stats["served"])
+        return {
+            **self.stats,
+            "enabled": self.config["enabled"],
+            "agents": self.config["agents"],
+            "served_share": round(self.stats["served"] / max(1, self.stats["requests"]) * 100, 1),
+            "avg_render_ms": round(self.stats["render_ms"] / served, 3),
+        }
+
+
+# Global instance
+_fast_path_engine = None
+
+
+def get_fast_path_engine() -> FastPathEngine:
+    """Get or create the global fast-path engine"""
+    global _fast_path_engine
+    if _fast_path_engine is None:
+        _fast_path_engine = FastPathEngine()
+    return _fast_path_engine
@@ -0,0 +1,355 @@
+"""
+Field Projection Planner for Tilores_X
+Maps query intents (scores, utilization, late payments, inquiries, billing, status)
+to the minimal Tilores field set and renders the GraphQL selection for it
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Field paths per intent (dot-separated paths below the record)
+INTENT_FIELDS = {
+    "profile": [
+        "id", "FIRST_NAME", "LAST_NAME", "EMAIL", "CLIENT_ID", "PHONE_EXTERNAL",
+    ],
+    "status": [
+        "id", "STATUS", "FIRST_NAME", "LAST_NAME", "EMAIL", "CLIENT_ID",
+        "PRODUCT_NAME", "CURRENT_PRODUCT", "ENROLL_DATE", "ENROLLMENT_BALANCE", "ACTIVE",
+    ],
+    "billing": [
+        "PAYMENT_METHOD", "CARD_TYPE", "CARD_LAST_4", "TRANSACTION_AMOUNT",
+        "LAST_APPROVED_TRANSACTION", "LAST_APPROVED_TRANSACTION_AMOUNT", "NET_BALANCE_DUE",
+        "ENROLLMENT_BALANCE", "RECURRING_MONTHLY_FEE", "AMOUNT",
+    ],
+    "scores": [
+        "CREDIT_RESPONSE.CREDIT_BUREAU",
+        "CREDIT_RESPONSE.CreditReportFirstIssuedDate",
+        "CREDIT_RESPONSE.CREDIT_SCORE.Value",
+        "CREDIT_RESPONSE.CREDIT_SCORE.ModelNameType",
+        "CREDIT_RESPONSE.CREDIT_SCORE.CreditRepositorySourceType",
+        "CREDIT_RESPONSE.CREDIT_SCORE.CreditScoreType",
+        "EQUIFAX_REPORT.CREDIT_SCORE",
+        "EQUIFAX_REPORT.REPORT_DATE",
+        "EQUIFAX_REPORT.BUREAU",
+    ],
+    "utilization": [
+        "CREDIT_RESPONSE.CREDIT_BUREAU",
+        "CREDIT_RESPONSE.CreditReportFirstIssuedDate",
+        "CREDIT_RESPONSE.CREDIT_LIABILITY.AccountType",
+        "CREDIT_RESPONSE.CREDIT_LIABILITY.CreditLimitAmount",
+        "CREDIT_RESPONSE.CREDIT_LIABILITY.CreditBalance",
+        "CREDIT_RESPONSE.CREDIT_SUMMARY.DATA_SET.ID",
+        "CREDIT_RESPONSE.CREDIT_SUMMARY.DATA_SET.Name",
+        "CREDIT_RESPONSE.CREDIT_SUMMARY.DATA_SET.Value",
+        "EQUIFAX_REPORT.REPORT_DATE",
+        "EQUIFAX_REPORT.CREDIT_LIABILITY.AccountType",
+        "EQUIFAX_REPORT.CREDIT_LIABILITY.CreditLimitAmount",
+        "EQUIFAX_REPORT.CREDIT_LIABILITY.CreditBalance",
+    ],
+    "late_payments": [
+        "CREDIT_RESPONSE.CREDIT_BUREAU",
+        "CREDIT_RESPONSE.CreditReportFirstIssuedDate",
+        "CREDIT_RESPONSE.CREDIT_LIABILITY.AccountType",
+        "CREDIT_RESPONSE.CREDIT_LIABILITY.LateCount.Days30",
+        "CREDIT_RESPONSE.CREDIT_LIABILITY.LateCount.Days60",
+        "CREDIT_RESPONSE.CREDIT_LIABILITY.LateCount.Days90",
+        "EQUIFAX_REPORT.REPORT_DATE",
+        "EQUIFAX_REPORT.CREDIT_LIABILITY.AccountType",
+        "EQUIFAX_REPORT.CREDIT_LIABILITY.LateCount.Days30",
+        "EQUIFAX_REPORT.CREDIT_LIABILITY.LateCount.Days60",
+        "EQUIFAX_REPORT.CREDIT_LIABILITY.LateCount.Days90",
+    ],
+    "inquiries": [
+        "CREDIT_RESPONSE.CREDIT_BUREAU",
+        "CREDIT_RESPONSE.CreditReportFirstIssuedDate",
+        "CREDIT_RESPONSE.CREDIT_INQUIRY.InquiryDate",
+        "CREDIT_RESPONSE.CREDIT_INQUIRY.SubscriberName",
+    ],
+}
+
+CREDIT_INTENTS = ("scores", "utilization", "late_payments", "inquiries")
+
+# Keyword triggers per intent (matched case-insensitively against the user query)
+INTENT_PATTERNS = {
+    "scores": re.compile(r"\b(scores?|fico|vantage|rating)\b", re.IGNORECASE),
+    "utilization": re.compile(r"\b(utili[sz]ation|utili[sz]ed|balances?|limits?|debt|owe|revolving)\b", re.IGNORECASE),
+    "late_payments": re.compile(r"\b(late|delinquen\w*|missed|past\s+due|payment\s+history|30|60|90)\b", re.IGNORECASE),
+    "inquiries": re.compile(r"\b(inquir\w*|enquir\w*|hard\s+pulls?)\b", re.IGNORECASE),
+    "billing": re.compile(r"\b(billing|bill|card|charged?|transactions?|refund|fee|invoice)\b", re.IGNORECASE),
+    "status": re.compile(r"\b(status|active|cancel\w*|enrolled|enrollment|product|subscription)\b", re.IGNORECASE),
+}
+
+# Intents used when a slash-command category's query names nothing more specific
+CATEGORY_DEFAULT_INTENTS = {
+    "credit": ("scores", "utilization", "late_payments"),
+    "billing": ("billing",),
+    "status": ("status",),
+    "profile": ("profile",),
+}
+COMBINED_INTENTS = ("status", "billing", "scores", "utilization", "late_payments")
+
+# Intents that may be narrowed by the query within each category
+CATEGORY_ALLOWED_INTENTS = {
+    "credit": CREDIT_INTENTS,
+    "billing": ("billing",),
+    "status": ("status",),
+    "profile": ("profile", "status", "billing"),
+}
+
+
+@dataclass(frozen=True)
+class Projection:
+    """A planned field set for one combination of intents"""
+
+    intents: Tuple[str, ...]
+    paths: Tuple[str, ...]
+    selection: str
+    record_fields: Dict[str, bool]
+
+    @property
+    def name(self) -> str:
+        """Stable template name for this projection"""
+        return "projection:" + "+".join(self.intents)
+
+
+def build_field_tree(paths: Iterable[str]) -> Dict[str, Any]:
+    """Merge dot-separated paths into a nested selection tree"""
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        node = tree
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def render_selection(tree: Dict[str, Any]) -> str:
+    """Render a selection tree as a (minified) GraphQL selection set body"""
+    parts = []
+    for name, children in tree.items():
+        parts.append(f"{name} {{ {render_selection(children)} }}" if children else name)
+    return " ".join(parts)
+
+
+_SELECTION_TOKEN_PATTERN = re.compile(r"[A-Za-z_]\w*|[{}]")
+
+
+def record_selection_paths(document: str) -> Tuple[str, ...]:
+    """
+    Extract the leaf field paths selected under `records { ... }` in a query document
+
+    Inverse of render_selection for the plain (alias- and argument-free) record selections
+    used by the query catalog.
+    """
+    document = re.sub(r"#[^\n]*", "", document)
+    match = re.search(r"\brecords\s*\{", document)
+    if not match:
+        return ()
+    stack: List[str] = []
+    paths: List[str] = []
+    previous: Optional[str] = None
+    for token in _SELECTION_TOKEN_PATTERN.findall(document[match.end():]):
+        if token == "{":
+            if previous is None:
+                break
+            stack.append(previous)
+            previous = None
+        elif token == "}":
+            if previous is not None:
+                paths.append(".".join(stack + [previous]))
+                previous = None
+            if not stack:
+                break
+            stack.pop()
+        else:
+            if previous is not None:
+                paths.append(".".join(stack + [previous]))
+            previous = token
+    return tuple(paths)
+
+
+def project_value(value: Any, tree: Dict[str, Any]) -> Any:
+    """Reduce a (possibly list-valued) record value to the fields in a selection tree"""
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [project_value(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {name: project_value(value[name], children) for name, children in tree.items() if name in value}
+    return value
+
+
+def _named_type(type_ref: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Unwrap NON_NULL/LIST wrappers of an introspected type reference"""
+    while type_ref:
+        if type_ref.get("name"):
+            return type_ref["name"]
+        type_ref = type_ref.get("ofType")
+    return None
+
+
+def prune_tree(tree: Dict[str, Any], types: Dict[str, Dict[str, Any]], type_name: str) -> Dict[str, Any]:
+    """Drop fields the schema doesn't define (types unknown to the schema are kept as-is)"""
+    type_def = types.get(type_name)
+    if not type_def or not type_def.get("fields"):
+        return tree
+    fields = {f.get("name"): f for f in type_def["fields"]}
+    pruned = {}
+    for name, children in tree.items():
+        field_def = fields.get(name)
+        if field_def is None:
+            continue
+        if children:
+            child_type = _named_type(field_def.get("type"))
+            children = prune_tree(children, types, child_type) if child_type else children
+            if not children:
+                continue
+        pruned[name] = children
+    return pruned
+
+
+class FieldProjectionPlanner:
+    """
+    Plans the minimal record selection for an intent set
+
+    Projections are computed once per (intent set, schema version) and reused;
+    response sizes are tracked per category to measure the payload reduction.
+    """
+
+    def __init__(self, intent_fields: Optional[Dict[str, List[str]]] = None):
+        """
+        Initialize the planner
+
+        Args:
+            intent_fields: Field paths per intent (default INTENT_FIELDS)
+        """
+        self.intent_fields = intent_fields or INTENT_FIELDS
+        self._types: Dict[str, Dict[str, Any]] = {}
+        self._schema_hash: Optional[str] = None
+        self._projections: Dict[FrozenSet[str], Projection] = {}
+
+        # Per-category statistics
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    def set_schema(self, schema: Optional[Dict[str, Any]], schema_hash: Optional[str] = None):
+        """Use an introspected schema to drop fields the Record type doesn't have"""
+        if not schema or (schema_hash is not None and schema_hash == self._schema_hash):
+            return
+        types = schema.get("data", {}).get("__schema", {}).get("types", [])
+        self._types = {t.get("name"): t for t in types if t.get("name")}
+        self._schema_hash = schema_hash
+        self._projections.clear()
+
+    def detect_intents(self, query: str, category: Optional[str] = None) -> Tuple[str, ...]:
+        """
+        Map a user query (and optional slash-command category) to intents
+
+        Args:
+            query: User query text
+            category: Slash-command category (credit, billing, status) or None
+
+        Returns:
+            Sorted tuple of intents
+        """
+        detected = self.match_intents(query, CATEGORY_ALLOWED_INTENTS.get(category, tuple(INTENT_PATTERNS)))
+        return detected or tuple(sorted(CATEGORY_DEFAULT_INTENTS.get(category, COMBINED_INTENTS)))
+
+    def match_intents(self, query: str, allowed: Iterable[str]) -> Tuple[str, ...]:
+        """Intents among `allowed` whose keywords appear in the query (no defaults)"""
+        return tuple(sorted(
+            intent for intent in allowed
+            if intent in INTENT_PATTERNS and INTENT_PATTERNS[intent].search(query or "")
+        ))
+
+    def plan(self, intents: Iterable[str]) -> Projection:
+        """
+        Get the projection for a set of intents
+
+        Args:
+            intents: Intent names (see INTENT_FIELDS)
+
+        Returns:
+            Projection with the merged paths, rendered selection and top-level field map
+        """
+        key = frozenset(intents)
+        projection = self._projections.get(key)
+        if projection is not None:
+            return projection
+
+        unknown = key - set(self.intent_fields)
+        if unknown:
+            raise KeyError(f"Unknown projection intents: {', '.join(sorted(unknown))}")
+
+        paths = ["id"]  # Records are always addressable
+        for intent in sorted(key):
+            paths.extend(path for path in self.intent_fields[intent] if path not in paths)
+
+        tree = build_field_tree(paths)
+        if self._types:
+            tree = prune_tree(tree, self._types, "Record")
+
+        projection = Projection(
+            intents=tuple(sorted(key)),
+            paths=tuple(paths),
+            selection=render_selection(tree),
+            record_fields={name: True for name in tree},
+        )
+        self._projections[key] = projection
+        logger.debug(f"🎯 Planned projection {projection.name}: {len(paths)} paths")
+        return projection
+
+    def entity_query(self, intents: Iterable[str]) -> Tuple[str, str]:
+        """
+        Build an entity query document selecting only the planned fields
+
+        Returns:
+            Tuple of (template name, GraphQL document)
+        """
+        projection = self.plan(intents)
+        operation = "Projected" + "".join(part.title().replace("_", "") for part in projection.intents)
+        document = (
+            f"query {operation}($id: ID!) {{ entity(input: {{ id: $id }}) {{ entity {{ id "
+            f"records {{ {projection.selection} }} }} }} }}"
+        )
+        return projection.name, document
+
+    def record_response(self, category: str, response_bytes: int, intents: Iterable[str] = ()):
+        """Record the response size of a projected fetch"""
+        stats = self.stats.setdefault(category, {
+            "requests": 0, "response_bytes": 0, "max_response_bytes": 0, "intents": {},
+        })
+        stats["requests"] += 1
+        stats["response_bytes"] += response_bytes
+        stats["max_response_bytes"] = max(stats["max_response_bytes"], response_bytes)
+        intent_key = "+".join(sorted(intents)) or "default"
+        stats["intents"][intent_key] = stats["intents"].get(intent_key, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get projection statistics"""
+        categories = {}
+        for category, stats in self.stats.items():
+            categories[category] = {
+                **stats,
+                "avg_response_bytes": round(stats["response_bytes"] / max(1, stats["requests"]), 1),
+            }
+        return {
+            "schema_aware": bool(self._types),
+            "planned_projections": sorted(p.name for p in self._projections.values()),
+            "categories": categories,
+        }
+
+
+# Global instance
+_field_projection_planner = None
+
+
+def get_field_projection_planner() -> FieldProjectionPlanner:
+    """Get or create the global field projection planner"""
+    global _field_projection_planner
+    if _field_projection_planner is None:
+        _field_projection_planner = FieldProjectionPlanner()
+    return _field_projection_planner
@@ -0,0 +1,525 @@
+"""
+GraphQL Query Catalog for Tilores_X
+Named Tilores query documents compiled once (minified + hashed), always sent with
+variables, optionally as persisted-query hashes, with per-template size metrics
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+QUERY_TEMPLATES = {
+    "search": """
+    query SearchCustomer($params: SearchParams!) {
+      search(input: { parameters: $params }) {
+        entities {
+          id
+          records {
+            id
+          }
+        }
+      }
+    }
+    """,
+    "search_profile": """
+    query SearchCustomerProfile($params: SearchParams!) {
+      search(input: { parameters: $params }) {
+        entities {
+          id
+          records {
+            id
+            EMAIL
+            FIRST_NAME
+            LAST_NAME
+            PHONE_EXTERNAL
+            CLIENT_ID
+            SALESFORCE_ID
+            MAILING_STREET
+            MAILING_CITY
+            MAILING_STATE
+            MAILING_ZIP
+          }
+        }
+      }
+    }
+    """,
+    "status": """
+    query SalesforceStatus($id: ID!) {
+      entity(input: { id: $id }) {
+        entity {
+          id
+          records {
+            id
+            STATUS
+            FIRST_NAME
+            LAST_NAME
+            EMAIL
+            CLIENT_ID
+            PRODUCT_NAME
+            CURRENT_PRODUCT
+            ENROLL_DATE
+          }
+        }
+      }
+    }
+    """,
+    "billing_payment": """
+    query GetBillingPayment($id: ID!) {
+      entity(input: { id: $id }) {
+        entity {
+          records {
+            PAYMENT_METHOD
+            CARD_TYPE
+            CARD_LAST_4
+            TRANSACTION_AMOUNT
+            LAST_APPROVED_TRANSACTION
+            LAST_APPROVED_TRANSACTION_AMOUNT
+            NET_BALANCE_DUE
+            ENROLLMENT_BALANCE
+            RECURRING_MONTHLY_FEE
+            AMOUNT
+          }
+        }
+      }
+    }
+    """,
+    "credit_scores": """
+    query GetCreditScores($id: ID!) {
+      entity(input: { id: $id }) {
+        entity {
+          records {
+            CREDIT_RESPONSE {
+              CREDIT_BUREAU
+            }
+          }
+        }
+      }
+    }
+    """,
+    "account_status": """
+    query GetAccountStatus($id: ID!) {
+      entity(input: { id: $id }) {
+        entity {
+          records {
+            STATUS
+            ENROLL_DATE
+            CURRENT_PRODUCT
+            ENROLLMENT_BALANCE
+            ACTIVE
+          }
+        }
+      }
+    }
+    """,
+    "billing_credit_combined": """
+    query GetBillingCreditCombined($id: ID!) {
+      entity(input: { id: $id }) {
+        entity {
+          records {
+            PAYMENT_METHOD
+            CARD_TYPE
+            CARD_LAST_4
+            TRANSACTION_AMOUNT
+            LAST_APPROVED_TRANSACTION
+            NET_BALANCE_DUE
+            ENROLLMENT_BALANCE
+            CREDIT_RESPONSE
+            STATUS
+            ENROLL_DATE
+          }
+        }
+      }
+    }
+    """,
+    # Every field parse_credit_file reads (credit_models.CREDIT_FILE_PATHS); portfolio batches
+    "credit_file": """
+    query GetCreditFile($id: ID!) {
+      entity(input: { id: $id }) {
+        entity {
+          id
+          records {
+            id
+            CREDIT_RESPONSE {
+              CREDIT_BUREAU
+              CreditReportFirstIssuedDate
+              CREDIT_SCORE {
+                Value
+                CreditRepositorySourceType
+                ModelNameType
+                CreditScoreType
+              }
+              CREDIT_LIABILITY {
+                AccountType
+                Creditor {
+                  Name
+                }
+                CreditBalance
+                CreditLimitAmount
+                LateCount {
+                  Days30
+                  Days60
+                  Days90
+                }
+              }
+              CREDIT_INQUIRY {
+                InquiryDate
+                SubscriberName
+              }
+              CREDIT_SUMMARY {
+                DATA_SET {
+                  ID
+                  Name
+                  Value
+                }
+              }
+              CREDIT_ATTRIBUTES {
+                DATA_SET {
+                  ID
+                  Name
+                  Value
+                  Type
+                }
+              }
+            }
+            EQUIFAX_REPORT {
+              REPORT_DATE
+              CREDIT_SCORE
+              CREDIT_LIABILITY {
+                AccountType
+                CreditBalance
+                CreditLimitAmount
+                LateCount {
+                  Days30
+                  Days60
+                  Days90
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+    """,
+    "entity_by_record": """
+    query EntityByRecord($id: ID!) {
+      entityByRecord(input: { id: $id }) {
+        entity {
+          id
+          hits
+          recordInsights {
+            email: valuesDistinct(field: "EMAIL")
+            first_name: valuesDistinct(field: "FIRST_NAME")
+            last_name: valuesDistinct(field: "LAST_NAME")
+            client_id: valuesDistinct(field: "CLIENT_ID")
+            phone: valuesDistinct(field: "PHONE_EXTERNAL")
+          }
+          records {
+            id
+            EMAIL
+            FIRST_NAME
+            LAST_NAME
+            CLIENT_ID
+            PHONE_EXTERNAL
+            CUSTOMER_AGE
+            DATE_OF_BIRTH
+            ENROLL_DATE
+            STATUS
+          }
+        }
+      }
+    }
+    """,
+    "introspection": """
+    query IntrospectionQuery {
+      __schema {
+        queryType {
+          name
+        }
+        types {
+          name
+          kind
+          fields {
+            name
+            type {
+              name
+              kind
+              ofType {
+                name
+                kind
+                fields {
+                  name
+                  type {
+                    name
+                    kind
+                    ofType {
+                      name
+                      kind
+                    }
+                  }
+                }
+              }
+            }
+          }
+          inputFields {
+            name
+          }
+        }
+      }
+    }
+    """,
+}
+
+# Scalars built into GraphQL - never present as schema types worth validating
+_BUILTIN_SCALARS = {"ID", "String", "Int", "Float", "Boolean"}
+_COMMENT_PATTERN = re.compile(r"#[^\n]*")
+_VARIABLE_PATTERN = re.compile(r"\$(\w+)\s*:\s*([\w!\[\]]+)")
+_OPERATION_BODY_PATTERN = re.compile(r"^[^{]*\{\s*(\w+)")
+_RECORD_FIELD_PATTERN = re.compile(r"\brecords\s*\{([^{}]*)")
+
+
+@dataclass
+class CompiledQuery:
+    """A minified query document with its persisted-query hash"""
+
+    name: str
+    document: str
+    sha256: str
+    variables: Dict[str, str] = field(default_factory=dict)
+    root_field: Optional[str] = None
+    record_fields: List[str] = field(default_factory=list)
+
+
+def minify_document(document: str) -> str:
+    """Strip comments and collapse whitespace (documents contain no multi-space string literals)"""
+    return " ".join(_COMMENT_PATTERN.sub("", document).split())
+
+
+def compile_query(name: str, document: str) -> CompiledQuery:
+    """Compile a query document: minify, hash and extract what validation needs"""
+    minified = minify_document(document)
+    root_match = _OPERATION_BODY_PATTERN.match(minified)
+    record_match = _RECORD_FIELD_PATTERN.search(minified)
+    record_fields = []
+    if record_match:
+        # Only the scalar prefix of the records selection (nested objects are followed by "{")
+        record_fields = [token for token in record_match.group(1).split() if token.isidentifier()]
+    return CompiledQuery(
+        name=name,
+        document=minified,
+        sha256=hashlib.sha256(minified.encode()).hexdigest(),
+        variables=dict(_VARIABLE_PATTERN.findall(minified)),
+        root_field=root_match.group(1) if root_match else None,
+        record_fields=record_fields,
+    )
+
+
+class GraphQLQueryCatalog:
+    """
+    Central registry of Tilores query documents
+
+    Values are always sent as GraphQL variables, never interpolated into the
+    document, so identical templates share one server-side parse/cache entry.
+    """
+
+    def __init__(self, templates: Optional[Dict[str, str]] = None, persisted_queries: Optional[bool] = None):
+        """
+        Initialize the catalog and compile the built-in templates
+
+        Args:
+            templates: Query documents by name (default QUERY_TEMPLATES)
+            persisted_queries: Send persisted-query hashes (default TILORES_PERSISTED_QUERIES env)
+        """
+        if persisted_queries is None:
+            persisted_queries = os.getenv("TILORES_PERSISTED_QUERIES", "false").lower() == "true"
+        self.persisted_queries = persisted_queries
+
+        self.queries: Dict[str, CompiledQuery] = {}
+        self._registered_hashes = set()  # Hashes the server has accepted (persisted-query registry)
+        self.validation_errors: Dict[str, List[str]] = {}
+        self.validated_schema_hash: Optional[str] = None
+
+        # Per-template statistics
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+        for name, document in (templates or QUERY_TEMPLATES).items():
+            self.register(name, document)
+
+        logger.info(f"📚 GraphQL query catalog compiled ({len(self.queries)} templates)")
+
+    def register(self, name: str, document: str) -> CompiledQuery:
+        """Compile and register a document (no-op if unchanged)"""
+        existing = self.queries.get(name)
+        minified = minify_document(document)
+        if existing is not None and existing.document == minified:
+            return existing
+        compiled = compile_query(name, document)
+        self.queries[name] = compiled
+        return compiled
+
+    def get(self, name: str) -> CompiledQuery:
+        """Get a compiled query by name"""
+        if name not in self.queries:
+            raise KeyError(f"Unknown GraphQL template: {name}")
+        return self.queries[name]
+
+    def build_payload(self, name: str, variables: Optional[Dict[str, Any]] = None,
+                      include_document: bool = True) -> Dict[str, Any]:
+        """
+        Build the JSON request body for a template
+
+        Args:
+            name: Template name
+            variables: GraphQL variables
+            include_document: Send the full document (False = hash only, persisted queries)
+
+        Returns:
+            Request payload dictionary
+        """
+        compiled = self.get(name)
+        payload: Dict[str, Any] = {"variables": variables or {}}
+        if include_document:
+            payload["query"] = compiled.document
+        if self.persisted_queries:
+            payload["extensions"] = {"persistedQuery": {"version": 1, "sha256Hash": compiled.sha256}}
+        return payload
+
+    def should_send_document(self, name: str) -> bool:
+        """Whether the full document must be sent (always, unless the server already knows the hash)"""
+        return not (self.persisted_queries and self.get(name).sha256 in self._registered_hashes)
+
+    def mark_registered(self, name: str):
+        """Record that the server accepted this template's persisted-query hash"""
+        if self.persisted_queries:
+            self._registered_hashes.add(self.get(name).sha256)
+
+    def handle_persisted_query_errors(self, name: str, response: Any) -> bool:
+        """
+        Inspect a GraphQL response for persisted-query errors
+
+        Returns:
+            True if the request should be retried with the full document
+        """
+        if not self.persisted_queries or not isinstance(response, dict):
+            return False
+        codes = {
+            (error.get("extensions") or {}).get("code") or error.get("message")
+            for error in response.get("errors") or []
+        }
+        if "PERSISTED_QUERY_NOT_SUPPORTED" in codes or "PersistedQueryNotSupported" in codes:
+            logger.warning("⚠️ Tilores does not support persisted queries - sending full documents")
+            self.persisted_queries = False
+            self._registered_hashes.clear()
+            return True
+        if "PERSISTED_QUERY_NOT_FOUND" in codes or "PersistedQueryNotFound" in codes:
+            self._registered_hashes.discard(self.get(name).sha256)
+            return True
+        return False
+
+    def record(self, name: str, request_bytes: int, response_bytes: int = 0):
+        """Record payload and response sizes for a template"""
+        stats = self.stats.setdefault(name, {"requests": 0, "request_bytes": 0, "response_bytes": 0})
+        stats["requests"] += 1
+        stats["request_bytes"] += request_bytes
+        stats["response_bytes"] += response_bytes
+
+    def validate(self, schema: Dict[str, Any], schema_hash: Optional[str] = None) -> Dict[str, List[str]]:
+        """
+        Validate every template against an introspected schema
+
+        Checks root fields, variable types and the scalar fields selected on records.
+
+        Args:
+            schema: Introspection result
+            schema_hash: Optional schema version (skips re-validation of the same version)
+
+        Returns:
+            Dictionary of template name -> list of problems (empty when all valid)
+        """
+        if schema_hash is not None and schema_hash == self.validated_schema_hash:
+            return self.validation_errors
+
+        schema_data = schema.get("data", {}).get("__schema", {})
+        types = {t.get("name"): t for t in schema_data.get("types", []) if t.get("name")}
+        query_type_name = (schema_data.get("queryType") or {}).get("name") or "Query"
+        root_fields = {f.get("name") for f in (types.get(query_type_name) or {}).get("fields") or []}
+        record_fields = {f.get("name") for f in (types.get("Record") or {}).get("fields") or []}
+
+        errors: Dict[str, List[str]] = {}
+        for name, compiled in self.queries.items():
+            problems = []
+            if compiled.root_field and not compiled.root_field.startswith("__") and root_fields \
+                    and compiled.root_field not in root_fields:
+                problems.append(f"unknown root field '{compiled.root_field}'")
+            for variable, type_ref in compiled.variables.items():
+                type_name = type_ref.strip("[]!")
+                if type_name not in _BUILTIN_SCALARS and type_name not in types:
+                    problems.append(f"unknown type '{type_name}' for ${variable}")
+            if record_fields:
+                missing = [f for f in compiled.record_fields if f not in record_fields]
+                if missing:
+                    problems.append(f"unknown Record fields: {', '.join(missing)}")
+            if problems:
+                errors[name] = problems
+                logger.warning(f"⚠️ GraphQL template '{name}' does not match schema: {'; '.join(problems)}")
+
+        self.validation_errors = errors
+        self.validated_schema_hash = schema_hash
+        return errors
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get catalog statistics"""
+        templates = {}
+        for name, compiled in self.queries.items():
+            stats = self.stats.get(name, {"requests": 0, "request_bytes": 0, "response_bytes": 0})
+            requests_made = max(1, stats["requests"])
+            templates[name] = {
+                **stats,
+                "document_bytes": len(compiled.document),
+                "avg_request_bytes": round(stats["request_bytes"] / requests_made, 1),
+                "avg_response_bytes": round(stats["response_bytes"] / requests_made, 1),
+            }
+        return {
+            "persisted_queries": self.persisted_queries,
+            "registered_hashes": len(self._registered_hashes),
+            "validation_errors": self.validation_errors,
+            "templates": templates,
+        }
+
+
+def execute_catalog_query(tilores_api, name: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Execute a catalog template through a TiloresAPI client (sync callers)
+
+    Args:
+        tilores_api: TiloresAPI instance exposing gql(query, variables)
+        name: Template name
+        variables: GraphQL variables
+
+    Returns:
+        GraphQL response dictionary
+    """
+    catalog = get_query_catalog()
+    compiled = catalog.get(name)
+    variables = variables or {}
+    result = tilores_api.gql(compiled.document, variables)
+    catalog.record(name, len(compiled.document) + len(json.dumps(variables)))
+    return result
+
+
+# Global instance
+_query_catalog = None
+
+
+def get_query_catalog() -> GraphQLQueryCatalog:
+    """Get or create the global query catalog"""
+    global _query_catalog
+    if _query_catalog is None:
+        _query_catalog = GraphQLQueryCatalog()
+    return _query_catalog
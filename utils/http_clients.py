@@ -0,0 +1,274 @@
+"""
+Shared HTTP Client Registry for Tilores_X
+Process-wide pooled keep-alive clients for Tilores, OAuth, LLM providers and Langfuse
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+# Pool configuration (environment overridable)
+HTTP_POOL_CONFIG = {
+    "pool_size": int(os.getenv("HTTP_POOL_SIZE", "100")),  # Total connections per upstream pool
+    "per_host_limit": int(os.getenv("HTTP_POOL_PER_HOST", "20")),  # Connections per host
+    "keepalive_timeout": float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30")),  # Idle keep-alive (s)
+    "dns_cache_ttl": int(os.getenv("HTTP_DNS_CACHE_TTL", "300")),  # DNS cache TTL (s)
+    "prewarm_timeout": float(os.getenv("HTTP_PREWARM_TIMEOUT", "3")),  # Per-upstream pre-warm (s)
+}
+
+# Upstream base URLs used for pre-warming (None = not configured)
+UPSTREAM_URLS = {
+    "tilores": lambda: os.getenv("TILORES_GRAPHQL_API_URL"),
+    "tilores_oauth": lambda: os.getenv("TILORES_OAUTH_TOKEN_URL"),
+    "openai": lambda: "https://api.openai.com" if os.getenv("OPENAI_API_KEY") else None,
+    "groq": lambda: "https://api.groq.com" if os.getenv("GROQ_API_KEY") else None,
+    "google": lambda: "https://generativelanguage.googleapis.com" if os.getenv("GOOGLE_API_KEY") else None,
+    "langfuse": lambda: os.getenv("LANGFUSE_HOST", "https://us.cloud.langfuse.com") if os.getenv("LANGFUSE_PUBLIC_KEY") else None,
+}
+
+
+class HTTPClientRegistry:
+    """
+    Hands out one pooled client per upstream so connections are reused
+
+    Async sessions (aiohttp) are bound to an event loop, so they are kept per
+    loop; the uvicorn loop and the async bridge loop each get their own pools.
+    Sync sessions (requests) are shared process-wide.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the registry
+
+        Args:
+            config: Optional pool configuration overriding HTTP_POOL_CONFIG
+        """
+        self.config = {**HTTP_POOL_CONFIG, **(config or {})}
+
+        self._async_sessions = weakref.WeakKeyDictionary()  # event loop -> {upstream: ClientSession}
+        self._sync_sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+        # Per-upstream statistics
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self.prewarm_results: Dict[str, Any] = {}
+
+        logger.info(
+            f"🌐 HTTP client registry initialized (pool: {self.config['pool_size']}, "
+            f"per host: {self.config['per_host_limit']}, keep-alive: {self.config['keepalive_timeout']}s)"
+        )
+
+    def _upstream_stats(self, upstream: str) -> Dict[str, Any]:
+        """Get (or create) the stats bucket for an upstream"""
+        if upstream not in self.stats:
+            self.stats[upstream] = {
+                "requests": 0,
+                "errors": 0,
+                "connections_created": 0,
+                "connections_reused": 0,
+                "dns_cache_hits": 0,
+                "dns_cache_misses": 0,
+            }
+        return self.stats[upstream]
+
+    def _build_trace_config(self, upstream: str) -> aiohttp.TraceConfig:
+        """Trace hooks that count requests and connection reuse per upstream"""
+        stats = self._upstream_stats(upstream)
+        trace_config = aiohttp.TraceConfig()
+
+        def counter(key: str):
+            async def increment(session, context, params):
+                stats[key] += 1
+            return increment
+
+        trace_config.on_request_start.append(counter("requests"))
+        trace_config.on_request_exception.append(counter("errors"))
+        trace_config.on_connection_create_end.append(counter("connections_created"))
+        trace_config.on_connection_reuseconn.append(counter("connections_reused"))
+        trace_config.on_dns_cache_hit.append(counter("dns_cache_hits"))
+        trace_config.on_dns_cache_miss.append(counter("dns_cache_misses"))
+        return trace_config
+
+    def get_async_session(self, upstream: str) -> aiohttp.ClientSession:
+        """
+        Get the pooled aiohttp session for an upstream on the running event loop
+
+        Args:
+            upstream: Upstream name (tilores, tilores_oauth, openai, groq, google, langfuse)
+
+        Returns:
+            Shared aiohttp.ClientSession (do not close it per request)
+        """
+        loop = asyncio.get_running_loop()
+        sessions = self._async_sessions.get(loop)
+        if sessions is None:
+            sessions = {}
+            self._async_sessions[loop] = sessions
+
+        session = sessions.get(upstream)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.config["pool_size"],
+                limit_per_host=self.config["per_host_limit"],
+                keepalive_timeout=self.config["keepalive_timeout"],
+                ttl_dns_cache=self.config["dns_cache_ttl"],
+                use_dns_cache=True,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                trace_configs=[self._build_trace_config(upstream)],
+            )
+            sessions[upstream] = session
+            logger.debug(f"🔌 Created pooled async session for {upstream}")
+        return session
+
+    def get_sync_session(self, upstream: str) -> requests.Session:
+        """
+        Get the pooled requests session for an upstream
+
+        Args:
+            upstream: Upstream name
+
+        Returns:
+            Shared requests.Session with keep-alive connection pooling
+        """
+        session = self._sync_sessions.get(upstream)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sync_sessions.get(upstream)
+            if session is None:
+                session = requests.Session()
+                # requests pools per host: pool_connections is how many host pools to keep,
+                # pool_maxsize the connections kept per host (there is no total cap)
+                adapter = HTTPAdapter(
+                    pool_connections=len(UPSTREAM_URLS),
+                    pool_maxsize=self.config["per_host_limit"],
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+
+                stats = self._upstream_stats(upstream)
+
+                def count_response(response, *args, **kwargs):
+                    stats["requests"] += 1
+                    if response.status_code >= 500:
+                        stats["errors"] += 1
+
+                session.hooks["response"].append(count_response)
+                self._sync_sessions[upstream] = session
+                logger.debug(f"🔌 Created pooled sync session for {upstream}")
+        return session
+
+    def _prewarm_targets(self, upstreams: Optional[Iterable[str]]) -> Dict[str, str]:
+        """Resolve configured upstream base URLs for pre-warming"""
+        names = list(upstreams) if upstreams else list(UPSTREAM_URLS)
+        targets = {}
+        for name in names:
+            resolver = UPSTREAM_URLS.get(name)
+            url = resolver() if resolver else None
+            if url:
+                parts = urlsplit(url)
+                targets[name] = f"{parts.scheme}://{parts.netloc}/"
+        return targets
+
+    async def prewarm(self, upstreams: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Open a keep-alive connection (DNS + TCP + TLS) to each configured upstream
+
+        Args:
+            upstreams: Optional subset of upstream names (default: all configured)
+
+        Returns:
+            Dictionary of upstream -> warm-up time in ms or error string
+        """
+        targets = self._prewarm_targets(upstreams)
+        timeout = aiohttp.ClientTimeout(total=self.config["prewarm_timeout"])
+
+        async def warm(name: str, url: str):
+            start_time = time.time()
+            try:
+                session = self.get_async_session(name)
+                async with session.head(url, timeout=timeout, allow_redirects=False) as response:
+                    await response.read()
+                return name, round((time.time() - start_time) * 1000, 1)
+            except Exception as e:
+                return name, f"error: {e}"
+
+        results = dict(await asyncio.gather(*[warm(name, url) for name, url in targets.items()]))
+        self.prewarm_results.update(results)
+        if results:
+            logger.info(f"🔥 Pre-warmed HTTP connections: {results}")
+        return results
+
+    def prewarm_sync(self, upstreams: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Pre-warm the pooled sync sessions (for requests-based callers)"""
+        results = {}
+        for name, url in self._prewarm_targets(upstreams).items():
+            start_time = time.time()
+            try:
+                self.get_sync_session(name).head(url, timeout=self.config["prewarm_timeout"], allow_redirects=False)
+                results[name] = round((time.time() - start_time) * 1000, 1)
+            except Exception as e:
+                results[name] = f"error: {e}"
+        self.prewarm_results.update(results)
+        return results
+
+    async def close(self):
+        """Close the async sessions owned by the running event loop"""
+        sessions = self._async_sessions.pop(asyncio.get_running_loop(), {})
+        for session in sessions.values():
+            if not session.closed:
+                await session.close()
+
+    def close_sync(self):
+        """Close the pooled sync sessions"""
+        with self._lock:
+            for session in self._sync_sessions.values():
+                session.close()
+            self._sync_sessions.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool configuration and per-upstream usage statistics"""
+        upstreams = {}
+        for name, stats in self.stats.items():
+            created = stats["connections_created"]
+            reused = stats["connections_reused"]
+            upstreams[name] = {
+                **stats,
+                "connection_reuse_rate": round(reused / max(1, created + reused) * 100, 1),
+            }
+
+        return {
+            "config": dict(self.config),
+            "event_loops": len(self._async_sessions),
+            "async_sessions": sum(len(sessions) for sessions in self._async_sessions.values()),
+            "sync_sessions": len(self._sync_sessions),
+            "upstreams": upstreams,
+            "prewarm": dict(self.prewarm_results),
+        }
+
+
+# Global instance
+_http_client_registry = None
+
+
+def get_http_client_registry() -> HTTPClientRegistry:
+    """Get or create the global HTTP client registry"""
+    global _http_client_registry
+    if _http_client_registry is None:
+        _http_client_registry = HTTPClientRegistry()
+    return _http_client_registry
@@ -0,0 +1,249 @@
+"""
+LLM Request Hedging for Tilores_X
+Sends a backup request to a second provider when the primary is slower than its
+observed latency percentile, keeps the first answer and fails over on hard errors
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from utils.model_router import ModelRouter, get_model_router
+
+logger = logging.getLogger(__name__)
+
+HEDGING_CONFIG = {
+    "enabled": os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true",
+    "failover": os.getenv("LLM_FAILOVER_ENABLED", "true").lower() == "true",  # Retry elsewhere on hard errors
+    "percentile": float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95")),  # Hedge once the primary is slower than this
+    "min_delay_ms": float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "500")),
+    "default_delay_ms": float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_MS", "8000")),  # Before the primary has samples
+    "max_hedge_rate": float(os.getenv("LLM_HEDGE_MAX_RATE", "0.2")),  # Cap on the share of hedged requests
+}
+
+CallFn = Callable[[str], Awaitable[str]]
+StreamFn = Callable[[str], AsyncIterator[str]]
+
+
+class LLMHedger:
+    """
+    Hedges and fails over LLM calls between two models on different providers
+
+    The hedge delay is the primary model's observed latency percentile (time to
+    first token for streams). Whichever request produces a result (or first
+    chunk) first wins and the other is cancelled. Hard errors from the primary
+    fail over immediately when a secondary is available.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, router: Optional[ModelRouter] = None):
+        """
+        Initialize the hedger
+
+        Args:
+            config: Optional configuration overriding HEDGING_CONFIG
+            router: Model router providing latency percentiles
+        """
+        self.config = {**HEDGING_CONFIG, **(config or {})}
+        self.router = router or get_model_router()
+
+        # Statistics
+        self.stats = {
+            "requests": 0,
+            "hedged": 0,
+            "hedge_wins": 0,  # Secondary answered first
+            "primary_wins": 0,  # Primary answered first after a hedge was sent
+            "hedges_skipped_budget": 0,
+            "failovers": 0,
+            "failover_successes": 0,
+            "wasted_prompt_tokens": 0,  # Estimated prompt tokens of cancelled/failed losers
+        }
+
+    def hedge_delay(self, model: str, stream: bool = False) -> float:
+        """Seconds to wait for the primary before hedging"""
+        observed = self.router.latency_percentile(model, self.config["percentile"], ttft=stream)
+        if observed is None and stream:
+            observed = self.router.latency_percentile(model, self.config["percentile"])
+        delay_ms = observed if observed is not None else self.config["default_delay_ms"]
+        return max(delay_ms, self.config["min_delay_ms"]) / 1000
+
+    def _may_hedge(self, secondary: Optional[str]) -> bool:
+        if not self.config["enabled"] or not secondary:
+            return False
+        if self.stats["hedged"] >= self.config["max_hedge_rate"] * self.stats["requests"]:
+            self.stats["hedges_skipped_budget"] += 1
+            return False
+        return True
+
+    def _waste(self, prompt_tokens: int):
+        self.stats["wasted_prompt_tokens"] += prompt_tokens
+
+    async def _failover(self, primary: str, secondary: Optional[str], error: BaseException, call: CallFn,
+                        prompt_tokens: int) -> str:
+        if not self.config["failover"] or not secondary:
+            raise error
+        self.stats["failovers"] += 1
+        self._waste(prompt_tokens)
+        logger.warning(f"⚠️ {primary} failed ({error}) - failing over to {secondary}")
+        result = await call(secondary)
+        self.stats["failover_successes"] += 1
+        return result
+
+    async def call(self, primary: str, secondary: Optional[str], call: CallFn, prompt_tokens: int = 0) -> str:
+        """
+        Run a completion with hedging and failover
+
+        Args:
+            primary: Routed model
+            secondary: Model on another provider (None disables hedging/failover)
+            call: Coroutine function performing the completion for a model; raises on errors
+            prompt_tokens: Estimated prompt tokens (for wasted-token accounting)
+
+        Returns:
+            Completion text from whichever model answered first
+        """
+        self.stats["requests"] += 1
+        primary_task = asyncio.ensure_future(call(primary))
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=self.hedge_delay(primary))
+        except asyncio.CancelledError:
+            primary_task.cancel()
+            raise
+
+        if done:
+            try:
+                return primary_task.result()
+            except Exception as e:
+                return await self._failover(primary, secondary, e, call, prompt_tokens)
+
+        if not self._may_hedge(secondary):
+            try:
+                return await primary_task
+            except Exception as e:
+                return await self._failover(primary, secondary, e, call, prompt_tokens)
+
+        self.stats["hedged"] += 1
+        logger.info(f"🏁 Hedging {primary} with {secondary}")
+        secondary_task = asyncio.ensure_future(call(secondary))
+        pending = {primary_task, secondary_task}
+        last_error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        self._waste(prompt_tokens)
+                        continue
+                    self.stats["hedge_wins" if task is secondary_task else "primary_wins"] += 1
+                    if pending:
+                        self._waste(prompt_tokens)
+                    return task.result()
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, primary: str, secondary: Optional[str], stream: StreamFn,
+                     prompt_tokens: int = 0) -> AsyncIterator[str]:
+        """
+        Stream a completion, hedging on time to first chunk
+
+        Args:
+            primary: Routed model
+            secondary: Model on another provider (None disables hedging/failover)
+            stream: Returns an async iterator of content deltas for a model; raises on errors
+            prompt_tokens: Estimated prompt tokens (for wasted-token accounting)
+
+        Yields:
+            Content deltas from whichever model produced the first chunk
+        """
+        self.stats["requests"] += 1
+        streams = {primary: stream(primary).__aiter__()}
+        firsts = {asyncio.ensure_future(streams[primary].__anext__()): primary}
+        winner: Optional[str] = None
+        first_chunk: Optional[str] = None
+        hedged = failed_over = False
+        last_error: Optional[BaseException] = None
+
+        def start_secondary():
+            streams[secondary] = stream(secondary).__aiter__()
+            firsts[asyncio.ensure_future(streams[secondary].__anext__())] = secondary
+
+        try:
+            timeout: Optional[float] = self.hedge_delay(primary, stream=True)
+            while firsts and winner is None:
+                done, _ = await asyncio.wait(set(firsts), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                timeout = None
+                if not done:
+                    # Primary is slow to start - hedge if allowed, otherwise keep waiting
+                    if self._may_hedge(secondary):
+                        hedged = True
+                        self.stats["hedged"] += 1
+                        logger.info(f"🏁 Hedging stream {primary} with {secondary}")
+                        start_secondary()
+                    continue
+                for task in done:
+                    model = firsts.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        winner, first_chunk = model, task.result()
+                        break
+                    if isinstance(error, StopAsyncIteration):
+                        error = RuntimeError(f"{model} returned an empty stream")
+                    last_error = error
+                    self._waste(prompt_tokens)
+                    # Hard error before any output from the primary: fail over immediately
+                    if model == primary and not hedged and self.config["failover"] and secondary:
+                        failed_over = True
+                        self.stats["failovers"] += 1
+                        logger.warning(f"⚠️ {primary} stream failed ({error}) - failing over to {secondary}")
+                        start_secondary()
+        finally:
+            for task in firsts:
+                task.cancel()
+                if winner is not None:
+                    self._waste(prompt_tokens)
+            # Let cancelled reads unwind before closing their generators (releases the connections)
+            await asyncio.gather(*firsts, return_exceptions=True)
+            for model, iterator in streams.items():
+                if model != winner:
+                    try:
+                        await iterator.aclose()
+                    except Exception:
+                        pass
+
+        if winner is None:
+            raise last_error or RuntimeError("No stream produced output")
+        if hedged:
+            self.stats["hedge_wins" if winner == secondary else "primary_wins"] += 1
+        elif failed_over:
+            self.stats["failover_successes"] += 1
+
+        yield first_chunk
+        async for delta in streams[winner]:
+            yield delta
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hedging statistics"""
+        requests = max(1, self.stats["requests"])
+        hedged = max(1, self.stats["hedged"])
+        return {
+            **self.stats,
+            "enabled": self.config["enabled"],
+            "failover_enabled": self.config["failover"],
+            "hedge_rate": round(self.stats["hedged"] / requests * 100, 1),
+            "hedge_win_rate": round(self.stats["hedge_wins"] / hedged * 100, 1),
+        }
+
+
+# Global instance
+_llm_hedger = None
+
+
+def get_llm_hedger() -> LLMHedger:
+    """Get or create the global LLM hedger"""
+    global _llm_hedger
+    if _llm_hedger is None:
+        _llm_hedger = LLMHedger()
+    return _llm_hedger
@@ -0,0 +1,248 @@
+"""
+Model Client Pool for Tilores_X
+Reuses LangChain chat model clients (and their HTTP connection pools) and
+pre-bound tool runnables across requests, with warmup and idle eviction
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODEL_POOL_CONFIG = {
+    "enabled": os.getenv("MODEL_POOL_ENABLED", "true").lower() == "true",
+    "idle_ttl": float(os.getenv("MODEL_POOL_IDLE_TTL", "1800")),  # Evict clients unused this long (s)
+    "max_entries": int(os.getenv("MODEL_POOL_MAX_ENTRIES", "32")),
+    "warm_models": [
+        name.strip()
+        for name in os.getenv("MODEL_POOL_WARM_MODELS", "llama-3.3-70b-versatile,gpt-4o-mini").split(",")
+        if name.strip()
+    ],
+}
+
+# Per-call objects that must not be shared between requests
+UNPOOLABLE_KWARGS = ("callbacks", "callback_manager", "http_client", "http_async_client")
+
+PoolKey = Tuple[str, str, str]  # (provider, model, serialized kwargs)
+
+
+def tool_set_version(tools: Iterable[Any]) -> str:
+    """Version of a tool list; changes whenever the tools are rebuilt"""
+    identity = [(getattr(tool, "name", type(tool).__name__), id(tool)) for tool in tools]
+    return hashlib.sha1(json.dumps(identity).encode()).hexdigest()[:12]
+
+
+@dataclass
+class PooledModel:
+    """A cached client and the tool-bound runnables built from it"""
+
+    client: Any
+    construction_ms: float
+    last_used: float
+    uses: int = 0
+    bound: Dict[str, Any] = field(default_factory=dict)  # tool-set version -> runnable
+
+
+class ModelClientPool:
+    """
+    Keyed pool of chat model clients
+
+    Keys are (provider, model, kwargs such as temperature/max_tokens); each
+    entry also keeps its bind_tools() runnable per tool-set version so tool
+    schemas are converted once, not on every request.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the pool
+
+        Args:
+            config: Optional configuration overriding MODEL_POOL_CONFIG
+        """
+        self.config = {**MODEL_POOL_CONFIG, **(config or {})}
+        self._entries: Dict[PoolKey, PooledModel] = {}
+        self._lock = threading.RLock()
+        self._usage: Counter = Counter()
+
+        # Statistics
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "unpooled": 0,
+            "bind_hits": 0,
+            "binds": 0,
+            "evictions": 0,
+            "warmed": 0,
+            "total_construction_ms": 0.0,
+            "total_bind_ms": 0.0,
+        }
+
+    @staticmethod
+    def make_key(provider: str, model: str, kwargs: Dict[str, Any]) -> PoolKey:
+        return provider, model, json.dumps(kwargs, sort_keys=True, default=str)
+
+    @staticmethod
+    def is_poolable(kwargs: Dict[str, Any]) -> bool:
+        return not any(name in kwargs for name in UNPOOLABLE_KWARGS)
+
+    def _evict_idle(self, now: float):
+        """Drop idle entries, then the least recently used ones beyond max_entries"""
+        idle = [key for key, entry in self._entries.items() if now - entry.last_used > self.config["idle_ttl"]]
+        overflow = len(self._entries) - len(idle) - self.config["max_entries"]
+        if overflow > 0:
+            remaining = sorted((entry.last_used, key) for key, entry in self._entries.items() if key not in idle)
+            idle.extend(key for _, key in remaining[:overflow])
+        for key in idle:
+            del self._entries[key]
+            self.stats["evictions"] += 1
+            logger.info(f"♻️ Evicted model client {key[0]}/{key[1]}")
+
+    def _entry(self, key: PoolKey, factory: Callable[[], Any]) -> PooledModel:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                start_time = time.time()
+                client = factory()
+                elapsed_ms = (time.time() - start_time) * 1000
+                entry = PooledModel(client=client, construction_ms=round(elapsed_ms, 1), last_used=now)
+                self._entries[key] = entry
+                self.stats["misses"] += 1
+                self.stats["total_construction_ms"] += elapsed_ms
+                logger.info(f"🧠 Model client {key[0]}/{key[1]} constructed in {elapsed_ms:.0f}ms")
+            else:
+                self.stats["hits"] += 1
+            entry.last_used = now
+            entry.uses += 1
+            self._usage[key[1]] += 1
+            self._evict_idle(now)
+        return entry
+
+    def get_client(self, provider: str, model: str, kwargs: Dict[str, Any], factory: Callable[[], Any]) -> Any:
+        """
+        Get a pooled client, constructing it with factory() on first use
+
+        Args:
+            provider: Provider name
+            model: Model name
+            kwargs: Client kwargs that distinguish instances (temperature, max_tokens, ...)
+            factory: Builds the client
+
+        Returns:
+            Chat model client
+        """
+        if not self.config["enabled"] or not self.is_poolable(kwargs):
+            self.stats["unpooled"] += 1
+            return factory()
+        return self._entry(self.make_key(provider, model, kwargs), factory).client
+
+    def get_bound(self, provider: str, model: str, kwargs: Dict[str, Any], factory: Callable[[], Any],
+                  tools: List[Any], tools_version: str) -> Any:
+        """
+        Get a pooled client with tools bound, binding once per tool-set version
+
+        Args:
+            provider: Provider name
+            model: Model name
+            kwargs: Client kwargs that distinguish instances
+            factory: Builds the client
+            tools: Tools to bind
+            tools_version: tool_set_version(tools)
+
+        Returns:
+            Tool-bound runnable
+        """
+        if not self.config["enabled"] or not self.is_poolable(kwargs):
+            self.stats["unpooled"] += 1
+            return factory().bind_tools(tools)
+
+        entry = self._entry(self.make_key(provider, model, kwargs), factory)
+        with self._lock:
+            bound = entry.bound.get(tools_version)
+            if bound is not None:
+                self.stats["bind_hits"] += 1
+                return bound
+            start_time = time.time()
+            bound = entry.client.bind_tools(tools)
+            self.stats["binds"] += 1
+            self.stats["total_bind_ms"] += (time.time() - start_time) * 1000
+            # Older tool versions are never requested again
+            entry.bound = {tools_version: bound}
+        return bound
+
+    def warm(self, models: Iterable[str], builder: Callable[[str], Any]) -> int:
+        """
+        Construct clients ahead of the first request
+
+        Args:
+            models: Model names to warm
+            builder: Called with a model name; should go through this pool
+
+        Returns:
+            Number of models warmed
+        """
+        warmed = 0
+        for model in models:
+            try:
+                builder(model)
+                warmed += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Model warmup failed for {model}: {e}")
+        self.stats["warmed"] += warmed
+        if warmed:
+            print(f"🔥 Warmed {warmed} model client(s)")
+        return warmed
+
+    def most_used(self, limit: int = 5) -> List[Tuple[str, int]]:
+        """Most requested models since startup"""
+        return self._usage.most_common(limit)
+
+    def clear(self):
+        """Drop every pooled client"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        with self._lock:
+            entries = [
+                {
+                    "provider": key[0],
+                    "model": key[1],
+                    "uses": entry.uses,
+                    "construction_ms": entry.construction_ms,
+                    "idle_s": round(time.time() - entry.last_used, 1),
+                    "bound_tool_sets": len(entry.bound),
+                }
+                for key, entry in self._entries.items()
+            ]
+        requests = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "enabled": self.config["enabled"],
+            "size": len(entries),
+            "total_construction_ms": round(self.stats["total_construction_ms"], 1),
+            "total_bind_ms": round(self.stats["total_bind_ms"], 1),
+            "hit_rate": round(self.stats["hits"] / max(1, requests) * 100, 1),
+            "most_used": self.most_used(),
+            "entries": entries,
+        }
+
+
+# Global instance
+_model_pool = None
+
+
+def get_model_pool() -> ModelClientPool:
+    """Get or create the global model client pool"""
+    global _model_pool
+    if _model_pool is None:
+        _model_pool = ModelClientPool()
+    return _model_pool
@@ -0,0 +1,335 @@
+"""
+Latency-Aware Model Router for Tilores_X
+Routes each LLM request to the fastest healthy model that meets its capability
+needs, using live latency, time-to-first-token and error-rate statistics
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MODEL_ROUTER_CONFIG = {
+    "enabled": os.getenv("MODEL_ROUTER_ENABLED", "true").lower() == "true",
+    "default_model": os.getenv("MODEL_ROUTER_DEFAULT_MODEL", "llama-3.3-70b-versatile"),
+    "exploration": float(os.getenv("MODEL_ROUTER_EXPLORATION", "0.05")),  # Share of requests sent to a non-best model
+    "sticky_seconds": float(os.getenv("MODEL_ROUTER_STICKY_SECONDS", "300")),  # Keep a session on one model
+    "ewma_alpha": float(os.getenv("MODEL_ROUTER_EWMA_ALPHA", "0.2")),
+    "p95_weight": float(os.getenv("MODEL_ROUTER_P95_WEIGHT", "0.3")),  # Tail latency share of the score
+    "window": int(os.getenv("MODEL_ROUTER_WINDOW", "100")),  # Samples kept for p95 / error rate
+    "max_error_rate": float(os.getenv("MODEL_ROUTER_MAX_ERROR_RATE", "0.5")),  # Unhealthy above this
+    "min_error_samples": int(os.getenv("MODEL_ROUTER_MIN_ERROR_SAMPLES", "4")),
+    "cooldown": float(os.getenv("MODEL_ROUTER_COOLDOWN", "60")),  # Unhealthy models retried after (s)
+    "probe_interval": float(os.getenv("MODEL_ROUTER_PROBE_INTERVAL", "0")),  # 0 disables background probes
+}
+
+# Static capabilities; prior_ms seeds the latency estimate until real samples arrive
+MODEL_CAPABILITIES: Dict[str, Dict[str, Any]] = {
+    "gemini-2.5-flash-lite": {"tools": True, "context": 1000000, "prior_ms": 3500},
+    "gemini-1.5-flash-002": {"tools": True, "context": 1000000, "prior_ms": 2300},
+    "llama-3.3-70b-versatile": {"tools": True, "context": 32768, "prior_ms": 5100},
+    "gemini-2.5-flash": {"tools": True, "context": 1000000, "prior_ms": 7200},
+    "gpt-4o-mini": {"tools": True, "context": 128000, "prior_ms": 7400},
+    "deepseek-r1-distill-llama-70b": {"tools": True, "context": 32768, "prior_ms": 8700},
+    "claude-3-haiku": {"tools": True, "context": 200000, "prior_ms": 4000},
+    "gpt-5-mini": {"tools": True, "context": 128000, "prior_ms": 9000},
+    "gpt-4o": {"tools": True, "context": 128000, "prior_ms": 9000},
+    "claude-3-sonnet": {"tools": True, "context": 200000, "prior_ms": 9500},
+    "gpt-4.1-mini": {"tools": True, "context": 128000, "prior_ms": 9500},
+    "gpt-3.5-turbo": {"tools": False, "context": 16385, "prior_ms": 6000},
+    "gemini-1.5-pro": {"tools": True, "context": 1000000, "prior_ms": 9000},
+}
+UNKNOWN_MODEL_CAPABILITIES = {"tools": False, "context": 8192, "prior_ms": 10000}
+
+
+class ModelStats:
+    """Live latency and health statistics for one model"""
+
+    def __init__(self, model: str, window: int, alpha: float):
+        self.model = model
+        self.alpha = alpha
+        self.ewma_ms: Optional[float] = None
+        self.ttft_ewma_ms: Optional[float] = None
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.ttfts: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.probes = 0
+        self.cancelled = 0  # Calls abandoned before finishing (e.g. hedge losers) - not latency samples
+        self.last_sample_at = 0.0
+        self.last_error_at = 0.0
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        return value if current is None else self.alpha * value + (1 - self.alpha) * current
+
+    def record(self, latency_ms: Optional[float], success: bool, ttft_ms: Optional[float] = None,
+               probe: bool = False):
+        self.requests += 1
+        self.probes += probe
+        self.last_sample_at = time.time()
+        self.outcomes.append(success)
+        if not success:
+            self.errors += 1
+            self.last_error_at = self.last_sample_at
+            return
+        if latency_ms is not None:
+            self.ewma_ms = self._ewma(self.ewma_ms, latency_ms)
+            self.latencies.append(latency_ms)
+        if ttft_ms is not None:
+            self.ttft_ewma_ms = self._ewma(self.ttft_ewma_ms, ttft_ms)
+            self.ttfts.append(ttft_ms)
+
+    def percentile(self, q: float, ttft: bool = False) -> Optional[float]:
+        """Latency (or time-to-first-token) percentile over the sample window, q in [0, 1]"""
+        samples = self.ttfts if ttft else self.latencies
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    @property
+    def p95_ms(self) -> Optional[float]:
+        return self.percentile(0.95)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        p95 = self.p95_ms
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "probes": self.probes,
+            "cancelled": self.cancelled,
+            "ewma_ms": round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            "p95_ms": round(p95, 1) if p95 is not None else None,
+            "ttft_ewma_ms": round(self.ttft_ewma_ms, 1) if self.ttft_ewma_ms is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "samples": len(self.latencies),
+        }
+
+
+class ModelRouter:
+    """
+    Picks the model for each request from live statistics
+
+    Score = (1 - p95_weight) * EWMA latency + p95_weight * p95 latency, with the
+    static prior standing in until a model has samples. Models whose recent
+    error rate exceeds max_error_rate are skipped until their cooldown passes.
+    A session keeps its model for sticky_seconds, and a small exploration share
+    of requests goes to another eligible model so estimates stay current.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None,
+                 capabilities: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Initialize the router
+
+        Args:
+            config: Optional configuration overriding MODEL_ROUTER_CONFIG
+            capabilities: Optional capabilities overriding MODEL_CAPABILITIES
+        """
+        self.config = {**MODEL_ROUTER_CONFIG, **(config or {})}
+        self.capabilities = {**MODEL_CAPABILITIES, **(capabilities or {})}
+        self._models: Dict[str, ModelStats] = {}
+        self._sticky: Dict[str, tuple] = {}  # session key -> (model, expires at)
+        self._decisions: Deque[Dict[str, Any]] = deque(maxlen=100)
+        self._probe_task: Optional[asyncio.Task] = None
+
+        # Statistics
+        self.stats = {
+            "decisions": 0,
+            "sticky": 0,
+            "explored": 0,
+            "fallbacks": 0,
+            "unhealthy_skips": 0,
+        }
+
+    def _stats_for(self, model: str) -> ModelStats:
+        if model not in self._models:
+            self._models[model] = ModelStats(model, self.config["window"], self.config["ewma_alpha"])
+        return self._models[model]
+
+    def capability(self, model: str) -> Dict[str, Any]:
+        return self.capabilities.get(model, UNKNOWN_MODEL_CAPABILITIES)
+
+    def score(self, model: str) -> float:
+        """Expected latency (ms) used for ranking"""
+        stats = self._models.get(model)
+        if stats is None or stats.ewma_ms is None:
+            return float(self.capability(model)["prior_ms"])
+        weight = self.config["p95_weight"]
+        return (1 - weight) * stats.ewma_ms + weight * (stats.p95_ms or stats.ewma_ms)
+
+    def latency_percentile(self, model: str, q: float, ttft: bool = False) -> Optional[float]:
+        """Observed latency percentile for a model, or None without samples"""
+        stats = self._models.get(model)
+        return stats.percentile(q, ttft) if stats is not None else None
+
+    def is_healthy(self, model: str) -> bool:
+        stats = self._models.get(model)
+        if stats is None or len(stats.outcomes) < self.config["min_error_samples"]:
+            return True
+        if stats.error_rate <= self.config["max_error_rate"]:
+            return True
+        # Let one request through after the cooldown to find out whether it recovered
+        return time.time() - stats.last_error_at > self.config["cooldown"]
+
+    def eligible(self, candidates: Iterable[str], needs_tools: bool = False, min_context: int = 0) -> List[str]:
+        """Candidates meeting the capability needs, fastest first"""
+        matching = [
+            model for model in candidates
+            if (not needs_tools or self.capability(model)["tools"]) and self.capability(model)["context"] >= min_context
+        ]
+        return sorted(matching, key=self.score)
+
+    def route(self, candidates: Iterable[str], needs_tools: bool = False, min_context: int = 0,
+              session_key: Optional[str] = None) -> str:
+        """
+        Choose a model for one request
+
+        Args:
+            candidates: Models that are configured (API key present)
+            needs_tools: Request requires tool calling
+            min_context: Estimated prompt + completion tokens
+            session_key: Optional key keeping a conversation on one model
+
+        Returns:
+            Model name
+        """
+        candidates = list(candidates)
+        matching = self.eligible(candidates, needs_tools, min_context)
+        healthy = [model for model in matching if self.is_healthy(model)]
+        self.stats["unhealthy_skips"] += len(matching) - len(healthy)
+        self.stats["decisions"] += 1
+
+        default_model = self.config["default_model"]
+        if not self.config["enabled"]:
+            model = default_model if default_model in candidates or not candidates else candidates[0]
+            return self._decide(model, "disabled", matching, session_key, remember=False)
+        if not healthy:
+            # Everything matching is unhealthy (or nothing matches) - least bad option
+            self.stats["fallbacks"] += 1
+            return self._decide((matching or candidates or [default_model])[0], "fallback", matching, session_key)
+
+        now = time.time()
+        if session_key:
+            sticky = self._sticky.get(session_key)
+            if sticky and sticky[1] > now and sticky[0] in healthy:
+                self.stats["sticky"] += 1
+                return self._decide(sticky[0], "sticky", healthy, session_key, remember=False)
+
+        if len(healthy) > 1 and random.random() < self.config["exploration"]:
+            self.stats["explored"] += 1
+            return self._decide(random.choice(healthy[1:]), "explore", healthy, session_key)
+        return self._decide(healthy[0], "fastest", healthy, session_key)
+
+    def _decide(self, model: str, reason: str, eligible: List[str], session_key: Optional[str],
+                remember: bool = True) -> str:
+        if session_key and remember:
+            self._sticky[session_key] = (model, time.time() + self.config["sticky_seconds"])
+            if len(self._sticky) > 10000:
+                now = time.time()
+                self._sticky = {key: value for key, value in self._sticky.items() if value[1] > now}
+        self._decisions.append({
+            "timestamp": time.time(),
+            "model": model,
+            "reason": reason,
+            "ranking": [(name, round(self.score(name), 1)) for name in eligible[:5]],
+        })
+        logger.debug(f"🧭 Routed to {model} ({reason})")
+        return model
+
+    def record(self, model: str, latency_ms: Optional[float], success: bool = True,
+               ttft_ms: Optional[float] = None, probe: bool = False):
+        """
+        Record the outcome of one LLM call
+
+        Args:
+            model: Model name
+            latency_ms: Total latency (ignored for failures)
+            success: Whether the call succeeded
+            ttft_ms: Time to first token for streamed calls
+            probe: Whether this was a background probe
+        """
+        self._stats_for(model).record(latency_ms, success, ttft_ms, probe)
+
+    def record_cancelled(self, model: str):
+        """
+        Count a call that was cancelled before finishing (e.g. the losing side of a hedge)
+
+        Its elapsed time is only a lower bound on the model's latency, so it is not a
+        sample: recording it would pull a slow model's EWMA and p95 down.
+        """
+        self._stats_for(model).cancelled += 1
+
+    def start_probes(self, candidates: Callable[[], Iterable[str]], probe: Callable[[str], Awaitable[Any]]):
+        """
+        Periodically probe models that real traffic hasn't sampled recently
+
+        Args:
+            candidates: Returns the models to consider
+            probe: Coroutine function making a minimal call (it must record its own outcome)
+        """
+        interval = self.config["probe_interval"]
+        if interval <= 0 or (self._probe_task is not None and not self._probe_task.done()):
+            return
+
+        async def probe_loop():
+            while True:
+                await asyncio.sleep(interval)
+                now = time.time()
+                for model in candidates():
+                    stats = self._models.get(model)
+                    if stats is not None and now - stats.last_sample_at < interval:
+                        continue
+                    try:
+                        await probe(model)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Probe failed for {model}: {e}")
+
+        self._probe_task = asyncio.create_task(probe_loop())
+        logger.info(f"🩺 Model probes every {interval}s")
+
+    async def stop_probes(self):
+        """Cancel the background probe task"""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing statistics, per-model stats and recent decisions"""
+        return {
+            **self.stats,
+            "config": {key: self.config[key] for key in ("enabled", "exploration", "sticky_seconds", "probe_interval")},
+            "models": {
+                model: {**stats.to_dict(), "score_ms": round(self.score(model), 1), "healthy": self.is_healthy(model)}
+                for model, stats in self._models.items()
+            },
+            "recent_decisions": list(self._decisions)[-20:],
+        }
+
+
+# Global instance
+_model_router = None
+
+
+def get_model_router() -> ModelRouter:
+    """Get or create the global model router"""
+    global _model_router
+    if _model_router is None:
+        _model_router = ModelRouter()
+    return _model_router
@@ -0,0 +1,220 @@
+"""
+Request Coalescing (Single-Flight) for Tilores_X
+Concurrent identical requests wait for one leader instead of repeating upstream calls
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Delete the lock only if we still own it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def make_flight_key(*parts: Any) -> str:
+    """Build a stable coalescing key from JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution
+
+    In-process, followers await the leader's future. With a Redis client and
+    cross_worker enabled, the in-process leader also takes a Redis lock; leaders
+    in other workers publish their (JSON-serializable) result on a channel.
+    """
+
+    def __init__(self, name: str, cross_worker: bool = False, lock_ttl: float = 30.0, result_ttl: float = 5.0):
+        """
+        Initialize a single-flight group
+
+        Args:
+            name: Group name (used in Redis keys and metrics)
+            cross_worker: Coalesce across workers when a Redis client is supplied
+            lock_ttl: Seconds a cross-worker leader may hold the lock
+            result_ttl: Seconds a published result stays readable for late followers
+        """
+        self.name = name
+        self.cross_worker = cross_worker
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+
+        self._inflight = weakref.WeakKeyDictionary()  # event loop -> {key: Future}
+
+        # Statistics
+        self.stats = {
+            "calls": 0,
+            "leaders": 0,
+            "collapsed": 0,
+            "remote_leaders": 0,
+            "remote_collapsed": 0,
+            "remote_timeouts": 0,
+            "errors": 0,
+        }
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]], redis_client: Optional[Any] = None) -> Any:
+        """
+        Run factory() once per key among concurrent callers
+
+        Args:
+            key: Coalescing key (see make_flight_key)
+            factory: Zero-argument callable returning the awaitable to execute
+            redis_client: Optional redis.asyncio client for cross-worker coalescing
+
+        Returns:
+            The leader's result (shared by all followers)
+        """
+        self.stats["calls"] += 1
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.get(loop)
+        if inflight is None:
+            inflight = {}
+            self._inflight[loop] = inflight
+
+        future = inflight.get(key)
+        if future is not None:
+            self.stats["collapsed"] += 1
+            logger.debug(f"🔗 [{self.name}] Collapsed duplicate request {key[:8]}")
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # This caller was cancelled, not the leader
+                # Leader was cancelled (e.g. its client disconnected) - run our own call
+                return await factory()
+
+        future = loop.create_future()
+        inflight[key] = future
+        self.stats["leaders"] += 1
+        try:
+            if self.cross_worker and redis_client is not None:
+                result = await self._do_cross_worker(key, factory, redis_client)
+            else:
+                result = await factory()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.stats["errors"] += 1
+            future.set_exception(e)
+            # Mark retrieved so a future without followers doesn't log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            inflight.pop(key, None)
+
+    def result_key(self, key: str) -> str:
+        """Redis key of a cross-worker leader's published result"""
+        return f"tilores:flight:{self.name}:result:{key}"
+
+    async def forget(self, key: str, redis_client: Optional[Any] = None):
+        """Drop a published cross-worker result so the next call for key runs again"""
+        if redis_client is None:
+            return
+        try:
+            await redis_client.delete(self.result_key(key))
+        except Exception as e:
+            logger.warning(f"⚠️ [{self.name}] Failed to drop single-flight result: {e}")
+
+    async def _do_cross_worker(self, key: str, factory: Callable[[], Awaitable[Any]], redis_client: Any) -> Any:
+        """Coalesce with other workers through a Redis lock and result channel"""
+        lock_key = f"tilores:flight:{self.name}:lock:{key}"
+        result_key = self.result_key(key)
+        channel = f"tilores:flight:{self.name}:done:{key}"
+
+        try:
+            cached = await redis_client.get(result_key)
+            if cached is not None:
+                self.stats["remote_collapsed"] += 1
+                return json.loads(cached)
+
+            token = uuid.uuid4().hex
+            acquired = await redis_client.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+        except Exception as e:
+            logger.warning(f"⚠️ [{self.name}] Redis single-flight unavailable: {e}")
+            return await factory()
+
+        if acquired:
+            self.stats["remote_leaders"] += 1
+            try:
+                result = await factory()
+                try:
+                    await redis_client.set(result_key, json.dumps(result), px=int(self.result_ttl * 1000))
+                    await redis_client.publish(channel, "done")
+                except (TypeError, ValueError):
+                    pass  # Result not JSON-serializable - followers will run their own call
+                except Exception as e:
+                    logger.warning(f"⚠️ [{self.name}] Failed to publish single-flight result: {e}")
+                return result
+            finally:
+                try:
+                    await redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except Exception:
+                    pass  # Lock expires on its own
+
+        result = await self._wait_for_remote_result(redis_client, result_key, channel)
+        if result is not _MISSING:
+            self.stats["remote_collapsed"] += 1
+            return result
+
+        # Leader failed or timed out - do the work ourselves
+        self.stats["remote_timeouts"] += 1
+        return await factory()
+
+    async def _wait_for_remote_result(self, redis_client: Any, result_key: str, channel: str) -> Any:
+        """Wait for another worker's leader to publish its result"""
+        deadline = time.monotonic() + self.lock_ttl
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+
+            # The leader may have finished between our lock attempt and subscribing
+            cached = await redis_client.get(result_key)
+            if cached is not None:
+                return json.loads(cached)
+
+            while time.monotonic() < deadline:
+                remaining = max(0.0, deadline - time.monotonic())
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=min(1.0, remaining))
+                if message is None:
+                    continue
+                cached = await redis_client.get(result_key)
+                return json.loads(cached) if cached is not None else _MISSING
+            return _MISSING
+        except Exception as e:
+            logger.warning(f"⚠️ [{self.name}] Waiting for remote single-flight result failed: {e}")
+            return _MISSING
+        finally:
+            try:
+                await pubsub.unsubscribe(channel)
+                await pubsub.reset()
+            except Exception:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        total_collapsed = self.stats["collapsed"] + self.stats["remote_collapsed"]
+        return {
+            **self.stats,
+            "cross_worker": self.cross_worker,
+            "in_flight": sum(len(inflight) for inflight in self._inflight.values()),
+            "collapse_rate": round(total_collapsed / max(1, self.stats["calls"]) * 100, 1),
+        }
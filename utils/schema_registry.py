@@ -0,0 +1,257 @@
+"""
+GraphQL Schema Registry for Tilores_X
+Introspects the Tilores schema once, persists it (Redis + local file snapshot),
+refreshes it in the background and serves precompiled selection sets
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.request_coalescing import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_REDIS_KEY = "tilores:graphql_schema"
+SCHEMA_REDIS_TTL = 7 * 24 * 3600  # Refreshed in the background long before this expires
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache",
+                                     "tilores_schema.json")
+
+SchemaFetcher = Callable[[], Awaitable[dict]]
+
+
+class GraphQLSchemaRegistry:
+    """
+    Single source of the introspected Tilores schema and artifacts compiled from it
+
+    Load order: memory -> Redis -> file snapshot -> live introspection. Compilers
+    registered by name (e.g. the CREDIT_RESPONSE selection set) run once per
+    schema version and their output is shared by all callers.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None, refresh_interval: Optional[float] = None,
+                 failure_backoff: float = 60.0):
+        """
+        Initialize the registry
+
+        Args:
+            snapshot_path: Local JSON snapshot location (TILORES_SCHEMA_SNAPSHOT)
+            refresh_interval: Seconds between background refreshes (TILORES_SCHEMA_REFRESH_SECONDS)
+            failure_backoff: Seconds to wait before retrying a failed introspection
+        """
+        self.snapshot_path = snapshot_path or os.getenv("TILORES_SCHEMA_SNAPSHOT", DEFAULT_SNAPSHOT_PATH)
+        self.refresh_interval = refresh_interval or float(os.getenv("TILORES_SCHEMA_REFRESH_SECONDS", "3600"))
+        self.failure_backoff = failure_backoff
+
+        self.schema: Optional[dict] = None
+        self.schema_hash: Optional[str] = None
+        self.loaded_from: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+
+        self._compilers: Dict[str, Callable[[dict], Any]] = {}
+        self._compiled: Dict[str, Any] = {}
+        self._compiled_hash: Optional[str] = None
+
+        self._load_flight = SingleFlight("schema")
+        self._last_failure = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        # Statistics
+        self.stats = {"introspections": 0, "introspection_failures": 0, "schema_changes": 0, "compilations": 0}
+
+    @staticmethod
+    def compute_hash(schema: dict) -> str:
+        """Stable content hash of an introspection result"""
+        return hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()
+
+    def register_compiler(self, name: str, compiler: Callable[[dict], Any]):
+        """
+        Register a function that turns the schema into a reusable artifact
+
+        Args:
+            name: Artifact name
+            compiler: Function taking the introspection result
+        """
+        self._compilers[name] = compiler
+        self._compiled.pop(name, None)
+
+    def get_compiled(self, name: str) -> Any:
+        """Get a compiled artifact for the current schema version (compiling on first use)"""
+        if self.schema is None:
+            return None
+        if self._compiled_hash != self.schema_hash:
+            self._compiled = {}
+            self._compiled_hash = self.schema_hash
+        if name not in self._compiled:
+            self._compiled[name] = self._compilers[name](self.schema)
+            self.stats["compilations"] += 1
+        return self._compiled[name]
+
+    def _install(self, schema: dict, source: str, schema_hash: Optional[str] = None) -> bool:
+        """Make a schema current; returns True when the version changed"""
+        schema_hash = schema_hash or self.compute_hash(schema)
+        changed = schema_hash != self.schema_hash
+        if changed and self.schema_hash is not None:
+            self.stats["schema_changes"] += 1
+            logger.info(f"🔄 Tilores schema changed ({self.schema_hash[:8]} -> {schema_hash[:8]})")
+        self.schema = schema
+        self.schema_hash = schema_hash
+        self.loaded_from = source
+        self.loaded_at = time.time()
+        return changed
+
+    def _read_snapshot(self) -> Optional[dict]:
+        """Read the local schema snapshot"""
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Schema snapshot unreadable ({self.snapshot_path}): {e}")
+            return None
+
+    def _write_snapshot(self, entry: dict):
+        """Atomically write the local schema snapshot"""
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            tmp_path = f"{self.snapshot_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write schema snapshot: {e}")
+
+    async def _persist(self, redis_client: Optional[Any]):
+        """Persist the current schema to Redis and the file snapshot"""
+        entry = {"hash": self.schema_hash, "schema": self.schema, "saved_at": time.time()}
+        if redis_client is not None:
+            try:
+                await redis_client.setex(SCHEMA_REDIS_KEY, SCHEMA_REDIS_TTL, json.dumps(entry))
+            except Exception as e:
+                logger.warning(f"⚠️ Could not persist schema to Redis: {e}")
+        await asyncio.to_thread(self._write_snapshot, entry)
+
+    async def _introspect(self, fetcher: SchemaFetcher, redis_client: Optional[Any]) -> bool:
+        """Run a live introspection and install it; returns True if the version changed"""
+        self.stats["introspections"] += 1
+        schema = await fetcher()
+        if not schema or "data" not in schema:
+            self.stats["introspection_failures"] += 1
+            self._last_failure = time.time()
+            return False
+        changed = self._install(schema, "introspection")
+        if changed:
+            await self._persist(redis_client)
+        return changed
+
+    async def _load(self, fetcher: SchemaFetcher, redis_client: Optional[Any]):
+        """Load the schema from the cheapest available source"""
+        if redis_client is not None:
+            try:
+                cached = await redis_client.get(SCHEMA_REDIS_KEY)
+                if cached:
+                    entry = json.loads(cached)
+                    self._install(entry["schema"], "redis", entry.get("hash"))
+                    logger.info(f"🗂️ Tilores schema loaded from Redis ({self.schema_hash[:8]})")
+                    return
+            except Exception as e:
+                logger.warning(f"⚠️ Schema Redis read failed: {e}")
+
+        entry = await asyncio.to_thread(self._read_snapshot)
+        if entry and entry.get("schema"):
+            self._install(entry["schema"], "snapshot", entry.get("hash"))
+            logger.info(f"🗂️ Tilores schema loaded from snapshot ({self.schema_hash[:8]})")
+            return
+
+        if time.time() - self._last_failure < self.failure_backoff:
+            return
+        await self._introspect(fetcher, redis_client)
+        if self.schema is not None:
+            logger.info(f"🗂️ Tilores schema introspected ({self.schema_hash[:8]})")
+
+    async def get_schema_async(self, fetcher: SchemaFetcher, redis_client: Optional[Any] = None) -> Optional[dict]:
+        """
+        Get the schema, loading it once per process
+
+        Args:
+            fetcher: Coroutine function performing a live introspection
+            redis_client: Optional redis.asyncio client for the shared copy
+
+        Returns:
+            Introspection result, or None if no source is available
+        """
+        if self.schema is None:
+            await self._load_flight.do("load", lambda: self._load(fetcher, redis_client))
+        return self.schema
+
+    def get_cached_schema(self) -> Optional[dict]:
+        """Get the schema from memory or the file snapshot without any network call (for sync callers)"""
+        if self.schema is None:
+            entry = self._read_snapshot()
+            if entry and entry.get("schema"):
+                self._install(entry["schema"], "snapshot", entry.get("hash"))
+        return self.schema
+
+    def start_background_refresh(self, fetcher: SchemaFetcher, redis_client_factory: Callable[[], Any] = lambda: None):
+        """
+        Periodically re-introspect and recompile when the schema hash changes
+
+        Args:
+            fetcher: Coroutine function performing a live introspection
+            redis_client_factory: Returns the redis.asyncio client for the running loop
+        """
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+
+        async def refresh_loop():
+            while True:
+                try:
+                    changed = await self._introspect(fetcher, redis_client_factory())
+                    if changed:
+                        logger.info("🗂️ Tilores schema refreshed - compiled selections will rebuild")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.stats["introspection_failures"] += 1
+                    logger.warning(f"⚠️ Background schema refresh failed: {e}")
+                await asyncio.sleep(self.refresh_interval)
+
+        self._refresh_task = asyncio.create_task(refresh_loop())
+
+    async def stop_background_refresh(self):
+        """Cancel the background refresh task"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get registry statistics"""
+        return {
+            **self.stats,
+            "schema_hash": self.schema_hash,
+            "loaded_from": self.loaded_from,
+            "loaded_at": self.loaded_at,
+            "compiled": sorted(self._compiled),
+            "refresh_interval": self.refresh_interval,
+        }
+
+
+# Global instance
+_schema_registry = None
+
+
+def get_schema_registry() -> GraphQLSchemaRegistry:
+    """Get or create the global schema registry"""
+    global _schema_registry
+    if _schema_registry is None:
+        _schema_registry = GraphQLSchemaRegistry()
+    return _schema_registry
@@ -0,0 +1,223 @@
+"""
+Service Container for Tilores_X
+Creates long-lived services (credit API, LLM engine, Tilores tools, HTTP clients,
+caches) once per process with defined startup/shutdown hooks
+"""
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ServiceFactory = Callable[["ServiceContainer"], Any]
+ShutdownHook = Callable[[Any], Any]
+
+
+class ServiceContainer:
+    """
+    Lazily constructed process-wide singletons
+
+    Each service is built at most once; concurrent first access from threads
+    blocks on a per-service lock and async callers build it off the event loop.
+    Shutdown hooks run in reverse creation order.
+    """
+
+    def __init__(self):
+        """Initialize an empty container"""
+        self._factories: Dict[str, ServiceFactory] = {}
+        self._shutdown_hooks: Dict[str, ShutdownHook] = {}
+        self._eager: List[str] = []
+        self._instances: Dict[str, Any] = {}
+        self._creation_order: List[str] = []
+        self._locks: Dict[str, threading.RLock] = {}
+        self._registry_lock = threading.Lock()
+
+        # Statistics
+        self.stats = {"gets": 0, "constructions": 0, "construction_ms": {}, "shutdown_errors": 0}
+
+    def register(self, name: str, factory: ServiceFactory, shutdown: Optional[ShutdownHook] = None,
+                 eager: bool = False):
+        """
+        Register a service factory
+
+        Args:
+            name: Service name
+            factory: Callable receiving the container and returning the service
+            shutdown: Optional hook receiving the instance on shutdown (sync or async)
+            eager: Construct during startup() instead of on first use
+        """
+        with self._registry_lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.RLock())
+            if shutdown is not None:
+                self._shutdown_hooks[name] = shutdown
+            if eager and name not in self._eager:
+                self._eager.append(name)
+
+    def provide(self, name: str, instance: Any, shutdown: Optional[ShutdownHook] = None):
+        """Register an already constructed instance (e.g. a module-level singleton)"""
+        with self._registry_lock:
+            self._locks.setdefault(name, threading.RLock())
+            self._factories.setdefault(name, lambda c: instance)
+            if shutdown is not None:
+                self._shutdown_hooks[name] = shutdown
+            if name not in self._instances:
+                self._creation_order.append(name)
+            self._instances[name] = instance
+
+    def has(self, name: str) -> bool:
+        """Whether a service has been constructed"""
+        return name in self._instances
+
+    def get(self, name: str) -> Any:
+        """
+        Get a service, constructing it on first use (thread-safe)
+
+        Args:
+            name: Service name
+
+        Returns:
+            The shared service instance
+        """
+        self.stats["gets"] += 1
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        if name not in self._factories:
+            raise KeyError(f"Unknown service: {name}")
+
+        # RLock: factories may resolve their own dependencies through the container
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is None:
+                start_time = time.time()
+                instance = self._factories[name](self)
+                elapsed_ms = round((time.time() - start_time) * 1000, 1)
+                self._instances[name] = instance
+                self._creation_order.append(name)
+                self.stats["constructions"] += 1
+                self.stats["construction_ms"][name] = elapsed_ms
+                logger.info(f"🧩 Service '{name}' constructed in {elapsed_ms}ms")
+        return instance
+
+    async def aget(self, name: str) -> Any:
+        """Get a service from async code without blocking the event loop on first construction"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            self.stats["gets"] += 1
+            return instance
+        return await asyncio.to_thread(self.get, name)
+
+    def startup(self):
+        """Construct all eagerly registered services"""
+        for name in list(self._eager):
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.warning(f"⚠️ Service '{name}' failed to start: {e}")
+
+    async def startup_async(self):
+        """Construct eager services from async code (off the event loop)"""
+        await asyncio.to_thread(self.startup)
+
+    async def shutdown_async(self):
+        """Run shutdown hooks in reverse creation order and forget the instances"""
+        for name in reversed(self._creation_order):
+            hook = self._shutdown_hooks.get(name)
+            if hook is None:
+                continue
+            try:
+                result = hook(self._instances[name])
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.stats["shutdown_errors"] += 1
+                logger.warning(f"⚠️ Service '{name}' shutdown failed: {e}")
+        self._instances.clear()
+        self._creation_order.clear()
+        logger.info("🛑 Service container shut down")
+
+    def shutdown(self):
+        """Run shutdown hooks from synchronous code"""
+        asyncio.run(self.shutdown_async())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get container statistics"""
+        return {
+            **self.stats,
+            "registered": sorted(self._factories),
+            "constructed": list(self._creation_order),
+        }
+
+
+def _build_credit_api(container: ServiceContainer) -> Any:
+    # The FastAPI module provides its instance when loaded; importing it builds that instance
+    import direct_credit_api_fixed
+
+    return direct_credit_api_fixed.api
+
+
+def _build_llm_engine(container: ServiceContainer) -> Any:
+    import core_app
+
+    core_app.initialize_engine()
+    return core_app.engine
+
+
+def _build_tilores_tools(container: ServiceContainer) -> Any:
+    engine = container.get("llm_engine")
+    return getattr(engine, "tilores_tools", None)
+
+
+def register_default_services(container: ServiceContainer):
+    """Register the Tilores_X services"""
+    from utils.answer_cache import get_answer_cache
+    from utils.async_bridge import get_async_bridge
+    from utils.entity_cache import get_entity_cache
+    from utils.entity_resolution import get_resolution_cache
+    from utils.graphql_queries import get_query_catalog
+    from utils.http_clients import get_http_client_registry
+    from utils.model_pool import get_model_pool
+    from utils.schema_registry import get_schema_registry
+    from utils.tilores_token import get_token_manager
+    from utils.tool_prefetch import get_prefetch_manager
+    from utils.tool_runtime import get_tool_runtime
+
+    container.register("async_bridge", lambda c: get_async_bridge(), shutdown=lambda bridge: bridge.shutdown())
+    container.register("http_clients", lambda c: get_http_client_registry(),
+                       shutdown=lambda registry: registry.close_sync())
+    container.register("token_manager", lambda c: get_token_manager())
+    container.register("tool_runtime", lambda c: get_tool_runtime(), shutdown=lambda runtime: runtime.shutdown())
+    container.register("tool_prefetch", lambda c: get_prefetch_manager())
+    container.register("schema_registry", lambda c: get_schema_registry(),
+                       shutdown=lambda registry: registry.stop_background_refresh())
+    container.register("query_catalog", lambda c: get_query_catalog())
+    container.register("entity_cache", lambda c: get_entity_cache())
+    container.register("resolution_cache", lambda c: get_resolution_cache())
+    container.register("answer_cache", lambda c: get_answer_cache())
+    container.register("model_pool", lambda c: get_model_pool(), shutdown=lambda pool: pool.clear())
+    container.register("credit_api", _build_credit_api)
+    container.register("llm_engine", _build_llm_engine)
+    container.register("tilores_tools", _build_tilores_tools)
+
+
+# Global instance
+_service_container = None
+_service_container_lock = threading.Lock()
+
+
+def get_service_container() -> ServiceContainer:
+    """Get or create the global service container"""
+    global _service_container
+    if _service_container is None:
+        with _service_container_lock:
+            if _service_container is None:
+                container = ServiceContainer()
+                register_default_services(container)
+                _service_container = container
+    return _service_container
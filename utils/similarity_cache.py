@@ -0,0 +1,231 @@
+"""
+Similarity Cache Index for Tilores_X
+Finds earlier questions that are near-duplicates of a new one (same entity and
+data version) using MinHash fingerprints over normalized tokens and LSH buckets
+"""
+
+import hashlib
+import logging
+import os
+import random
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_CACHE_CONFIG = {
+    "enabled": os.getenv("SIMILARITY_CACHE_ENABLED", "false").lower() == "true",
+    "threshold": float(os.getenv("SIMILARITY_CACHE_THRESHOLD", "0.8")),  # Minimum token Jaccard similarity
+    "num_perm": int(os.getenv("SIMILARITY_CACHE_NUM_PERM", "64")),  # MinHash signature length
+    "bands": int(os.getenv("SIMILARITY_CACHE_BANDS", "16")),  # LSH bands (num_perm must divide evenly)
+    "max_entries": int(os.getenv("SIMILARITY_CACHE_MAX_ENTRIES", "2000")),
+}
+
+# Identifiers become placeholders, which are left out of the token set: the scope already pins the entity
+IDENTIFIER_PATTERNS = [
+    (re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b"), " _email_ "),
+    (re.compile(r"\b003[A-Za-z0-9]{12,15}\b"), " _salesforce_id_ "),
+    (re.compile(r"\+?1?[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b"), " _phone_ "),
+    (re.compile(r"\b\d{7,10}\b"), " _client_id_ "),
+]
+
+CONTRACTIONS = {"whats": "what", "hows": "how", "whos": "who", "wheres": "where", "whys": "why", "whens": "when"}
+
+# Filler words that don't change what is being asked
+STOPWORDS = frozenset("""
+a an the this that these those is are was were be been am of for to in on at by with about from
+me my i you your he she his her him they them their it its customer customers client clients user
+please can could would will do does did tell show give let know get see current currently
+what which any have has there some
+""".split())
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def normalize_tokens(question: str) -> FrozenSet[str]:
+    """Normalized token set: identifiers and fillers dropped, contractions expanded, light plural stemming"""
+    text = question
+    for pattern, placeholder in IDENTIFIER_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    text = text.lower().replace("'s", "s").replace("'", "")
+    tokens = set()
+    for token in _TOKEN_PATTERN.findall(text):
+        token = CONTRACTIONS.get(token, token)
+        if token in STOPWORDS or token.startswith("_"):
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.add(token)
+    return frozenset(tokens)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures from seeded universal hash permutations (deterministic across processes)"""
+
+    def __init__(self, num_perm: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)
+        ]
+
+    @staticmethod
+    def _token_hash(token: str) -> int:
+        return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+
+    def signature(self, tokens: FrozenSet[str]) -> Tuple[int, ...]:
+        hashes = [self._token_hash(token) for token in tokens]
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._permutations)
+
+
+@dataclass
+class SimilarityEntry:
+    """One indexed question and the answer-cache key it points to"""
+
+    scope: str
+    tokens: FrozenSet[str]
+    bands: Tuple[Tuple[int, ...], ...]
+    target: str
+
+
+class SimilarityIndex:
+    """
+    In-memory LSH index of answered questions per scope
+
+    A scope is the agent, model, prompt version and entity data version, so a
+    match never crosses customers or data changes. LSH bands select candidates;
+    the exact Jaccard similarity of the token sets decides a match.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the index
+
+        Args:
+            config: Optional configuration overriding SIMILARITY_CACHE_CONFIG
+        """
+        self.config = {**SIMILARITY_CACHE_CONFIG, **(config or {})}
+        if self.config["num_perm"] % self.config["bands"]:
+            raise ValueError("SIMILARITY_CACHE_NUM_PERM must be a multiple of SIMILARITY_CACHE_BANDS")
+        self._rows = self.config["num_perm"] // self.config["bands"]
+        self._hasher = MinHasher(self.config["num_perm"])
+        self._entries: "OrderedDict[int, SimilarityEntry]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[int]] = {}
+        self._next_id = 0
+
+        # Statistics
+        self.stats = {
+            "lookups": 0,
+            "matches": 0,
+            "candidates_checked": 0,
+            "below_threshold": 0,
+            "indexed": 0,
+            "evictions": 0,
+        }
+
+    def _bands(self, tokens: FrozenSet[str]) -> Tuple[Tuple[int, ...], ...]:
+        signature = self._hasher.signature(tokens)
+        rows = self._rows
+        return tuple(signature[i:i + rows] for i in range(0, len(signature), rows))
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        for band_index, band in enumerate(entry.bands):
+            bucket_key = (entry.scope, band_index, band)
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[bucket_key]
+
+    def add(self, scope: str, question: str, target: str):
+        """
+        Index an answered question
+
+        Args:
+            scope: Agent/model/prompt/data-version scope
+            question: Question as asked
+            target: Key of the cached answer
+        """
+        tokens = normalize_tokens(question)
+        if not tokens:
+            return
+        entry_id = self._next_id
+        self._next_id += 1
+        entry = SimilarityEntry(scope, tokens, self._bands(tokens), target)
+        self._entries[entry_id] = entry
+        for band_index, band in enumerate(entry.bands):
+            self._buckets.setdefault((scope, band_index, band), set()).add(entry_id)
+        self.stats["indexed"] += 1
+        while len(self._entries) > self.config["max_entries"]:
+            self._remove(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    def find(self, scope: str, question: str) -> Optional[Tuple[str, float]]:
+        """
+        Most similar indexed question in the scope at or above the threshold
+
+        Returns:
+            Tuple of (target key, similarity), or None
+        """
+        self.stats["lookups"] += 1
+        tokens = normalize_tokens(question)
+        if not tokens:
+            return None
+        candidates: Set[int] = set()
+        for band_index, band in enumerate(self._bands(tokens)):
+            candidates |= self._buckets.get((scope, band_index, band), set())
+
+        best: Optional[Tuple[str, float]] = None
+        best_id = None
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            self.stats["candidates_checked"] += 1
+            similarity = jaccard(tokens, entry.tokens)
+            if best is None or similarity > best[1]:
+                best, best_id = (entry.target, similarity), entry_id
+        if best is None:
+            return None
+        if best[1] < self.config["threshold"]:
+            self.stats["below_threshold"] += 1
+            return None
+        self._entries.move_to_end(best_id)
+        self.stats["matches"] += 1
+        logger.debug(f"🧬 Similar question matched ({best[1]:.2f})")
+        return best
+
+    def clear(self):
+        self._entries.clear()
+        self._buckets.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        return {
+            **self.stats,
+            "enabled": self.config["enabled"],
+            "threshold": self.config["threshold"],
+            "entries": len(self._entries),
+            "buckets": len(self._buckets),
+            "match_rate": round(self.stats["matches"] / max(1, self.stats["lookups"]) * 100, 1),
+        }
+
+
+# Global instance
+_similarity_index = None
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """Get or create the global similarity index"""
+    global _similarity_index
+    if _similarity_index is None:
+        _similarity_index = SimilarityIndex()
+    return _similarity_index
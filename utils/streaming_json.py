@@ -0,0 +1,255 @@
+"""
+Streaming JSON Projection for Tilores_X
+Incremental decoding of large responses that keeps only the fields of a selection tree;
+everything else is scanned past without building Python objects or holding the whole body
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from utils.field_projection import build_field_tree, project_value
+
+# Selection trees are build_field_tree() output: a name maps to its selected children,
+# and an empty tree keeps the whole value. Lists apply the tree to each element.
+Tree = Dict[str, Any]
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_SCALAR = re.compile(r"[^\s,\]}]*")
+# Everything up to the next bracket (strings included), then the bracket; a lone quote
+# means the string is cut off at the end of the buffer
+_UNTIL_BRACKET = re.compile(r'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*(.)?', re.S)
+
+# Parser states
+_VALUE, _KEY, _KEY_OR_END, _COLON, _VALUE_OR_END, _COMMA_OR_END, _SKIP, _DECODE, _DONE = range(9)
+
+_COMPACT_AT = 1 << 16  # Drop consumed input once this many characters are behind the cursor
+_DECODE_LIMIT = 1 << 16  # Selected containers up to this size are decoded in one call, then projected
+
+
+def response_tree(prefix: str, paths: Iterable[str], *extra: str) -> Tree:
+    """Selection tree of record `paths` under `prefix` (e.g. "data.entity.entity.records") plus extra full paths"""
+    return build_field_tree([f"{prefix}.{path}" for path in paths] + list(extra))
+
+
+class JsonProjector:
+    """
+    Push parser for one JSON document, reduced to a selection tree while it is fed
+
+    The result equals field_projection.project_value(json.loads(document), tree).
+    Unselected values are skipped bracket by bracket and their input dropped.
+    Selected containers are decoded by the C decoder once their text is complete
+    (then projected) when kept whole or under _DECODE_LIMIT characters; larger
+    ones are opened and projected field by field. Memory stays at the projected
+    result plus the largest container decoded at once.
+    """
+
+    def __init__(self, tree: Tree):
+        self.tree = tree
+        self.result: Any = None
+        self.bytes_read = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._state = _VALUE
+        self._node: Optional[Tree] = tree  # Tree of the next value; None skips it
+        self._stack: List[list] = []  # [container, tree, pending key (None in lists)] per opened container
+        self._start = 0  # Start of the container being skipped or decoded
+        self._scan_pos = 0
+        self._scan_depth = 0
+        self._retry_at = 0  # Characters of the container needed before decoding is tried again
+        self._closed = False
+
+    def feed(self, chunk: Union[bytes, str]):
+        """Consume the next piece of the document"""
+        self.bytes_read += len(chunk)
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        if not chunk:
+            return
+        keep = {_SKIP: self._scan_pos, _DECODE: self._start}.get(self._state, self._pos)
+        if keep >= _COMPACT_AT or keep == len(self._buffer):
+            self._buffer = self._buffer[keep:] + chunk
+            self._pos -= keep
+            self._start -= keep
+            self._scan_pos -= keep
+        else:
+            self._buffer += chunk
+        self._parse()
+
+    def close(self) -> Any:
+        """Finish the document and return the projected value (ValueError when it's incomplete or malformed)"""
+        self._buffer += self._decoder.decode(b"", final=True)
+        self._closed = True
+        self._retry_at = 0
+        self._parse()
+        if self._state != _DONE:
+            raise ValueError(f"Incomplete JSON document ({self.bytes_read} bytes)")
+        if _WHITESPACE.match(self._buffer, self._pos).end() != len(self._buffer):
+            raise ValueError(f"Extra data after JSON document at offset {self._pos}")
+        return self.result
+
+    def _store(self, value: Any):
+        if not self._stack:
+            self.result = value
+            return
+        container, _, key = self._stack[-1]
+        if key is None:
+            container.append(value)
+        else:
+            container[key] = value
+
+    def _after_value(self):
+        self._state = _COMMA_OR_END if self._stack else _DONE
+
+    def _error(self, expected: str):
+        raise ValueError(f"Expected {expected} at offset {self._pos} of the JSON document")
+
+    def _parse(self):
+        buffer = self._buffer
+        end = len(buffer)
+        while self._state != _DONE:
+            state = self._state
+            if state == _SKIP or state == _DECODE:
+                if not (self._skip() if state == _SKIP else self._decode()):
+                    return
+                continue
+            pos = _WHITESPACE.match(buffer, self._pos).end()
+            self._pos = pos
+            if pos == end:
+                return
+            char = buffer[pos]
+
+            if state == _VALUE:
+                node = self._node
+                if char in "{[":
+                    self._state = _SKIP if node is None else _DECODE
+                    self._start = self._scan_pos = pos
+                    self._scan_depth = self._retry_at = 0
+                    continue
+                match = (_STRING if char == '"' else _SCALAR).match(buffer, pos)
+                if match is None or (match.end() == end and not self._closed):
+                    return  # Cut off (a number may continue in the next chunk)
+                if match.end() == pos:
+                    self._error("a value")
+                if node is not None:
+                    try:
+                        value, _ = _DECODER.raw_decode(buffer, pos)
+                    except json.JSONDecodeError:
+                        self._error("a value")
+                    self._store(value)
+                self._pos = match.end()
+                self._after_value()
+
+            elif state == _KEY or state == _KEY_OR_END:
+                if char == "}" and state == _KEY_OR_END:
+                    self._stack.pop()
+                    self._pos = pos + 1
+                    self._after_value()
+                    continue
+                if char != '"':
+                    self._error("an object key")
+                match = _STRING.match(buffer, pos)
+                if match is None:
+                    return
+                key = match.group()[1:-1]
+                if "\\" in key:
+                    key = json.loads(match.group())
+                frame = self._stack[-1]
+                frame[2] = key
+                self._node = frame[1].get(key)
+                self._pos = match.end()
+                self._state = _COLON
+
+            elif state == _COLON:
+                if char != ":":
+                    self._error("':'")
+                self._pos = pos + 1
+                self._state = _VALUE
+
+            elif state == _VALUE_OR_END:
+                if char == "]":
+                    self._stack.pop()
+                    self._pos = pos + 1
+                    self._after_value()
+                else:
+                    self._node = self._stack[-1][1]
+                    self._state = _VALUE
+
+            else:  # _COMMA_OR_END
+                container, node, key = self._stack[-1]
+                if char == ",":
+                    self._pos = pos + 1
+                    if key is None:
+                        self._node = node
+                        self._state = _VALUE
+                    else:
+                        self._state = _KEY
+                elif char == ("]" if key is None else "}"):
+                    self._stack.pop()
+                    self._pos = pos + 1
+                    self._after_value()
+                else:
+                    self._error("',' or the end of a container")
+
+    def _skip(self) -> bool:
+        """Scan past the unselected container at _start; False while its end hasn't arrived"""
+        buffer, pos, depth = self._buffer, self._scan_pos, self._scan_depth
+        while True:
+            match = _UNTIL_BRACKET.match(buffer, pos)
+            bracket = match.group(1)
+            if bracket is None or bracket == '"':
+                self._scan_pos, self._scan_depth = (match.start(1) if bracket else match.end()), depth
+                if self._closed:
+                    self._pos = self._scan_pos
+                    self._error("the end of a container")
+                return False
+            pos = match.end()
+            depth += 1 if bracket in "[{" else -1
+            if depth == 0:
+                self._pos = pos
+                self._after_value()
+                return True
+
+    def _decode(self) -> bool:
+        """Decode the selected container at _start; False while its text is incomplete"""
+        available = len(self._buffer) - self._start
+        if available < self._retry_at:
+            return False
+        try:
+            value, end = _DECODER.raw_decode(self._buffer, self._start)
+        except json.JSONDecodeError as error:
+            if self._closed:
+                self._pos = error.pos
+                self._error("a complete value")
+            if self._node and available > _DECODE_LIMIT:
+                self._open()
+                return True
+            self._retry_at = 2 * available  # Each retry re-reads the container: wait for it to double
+            return False
+        self._store(project_value(value, self._node))
+        self._pos = end
+        self._after_value()
+        return True
+
+    def _open(self):
+        """Project the container at _start field by field"""
+        char = self._buffer[self._start]
+        container: Any = {} if char == "{" else []
+        self._store(container)
+        self._stack.append([container, self._node, "" if char == "{" else None])
+        self._state = _KEY_OR_END if char == "{" else _VALUE_OR_END
+        self._pos = self._start + 1
+
+
+def project_json(chunks: Iterable[Union[bytes, str]], tree: Tree) -> Any:
+    """Project a JSON document given as a sequence of chunks (or one str/bytes) to a selection tree"""
+    projector = JsonProjector(tree)
+    if isinstance(chunks, (bytes, str)):
+        chunks = (chunks,)
+    for chunk in chunks:
+        projector.feed(chunk)
+    return projector.close()
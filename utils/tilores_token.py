@@ -0,0 +1,227 @@
+"""
+Tilores OAuth Token Manager for Tilores_X
+Process-wide client_credentials token with refresh-ahead, a single refresher
+and cross-worker sharing through Redis
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from utils.http_clients import get_http_client_registry
+from utils.request_coalescing import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+TOKEN_REDIS_KEY = "tilores:oauth_token"
+
+TOKEN_CONFIG = {
+    "refresh_ahead": float(os.getenv("TILORES_TOKEN_REFRESH_AHEAD", "300")),  # Refresh this early (s)
+    "refresh_ahead_fraction": 0.5,  # ... but no earlier than this fraction of the token lifetime
+    "expiry_margin": float(os.getenv("TILORES_TOKEN_EXPIRY_MARGIN", "60")),  # Treat as expired this early (s)
+    "timeout": float(os.getenv("TILORES_TOKEN_TIMEOUT", "10")),  # Token request timeout (s)
+}
+
+
+class TiloresTokenManager:
+    """
+    Shares one Tilores OAuth token across every caller in the process
+
+    Tokens close to expiry are refreshed in the background while the current
+    one keeps being served; only one refresh runs at a time (across workers too
+    when Redis is available, via the same lock/publish protocol as SingleFlight).
+    """
+
+    def __init__(self, token_url: Optional[str] = None, client_id: Optional[str] = None,
+                 client_secret: Optional[str] = None, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the token manager
+
+        Args:
+            token_url: OAuth token endpoint (default TILORES_OAUTH_TOKEN_URL)
+            client_id: OAuth client ID (default TILORES_CLIENT_ID)
+            client_secret: OAuth client secret (default TILORES_CLIENT_SECRET)
+            config: Optional configuration overriding TOKEN_CONFIG
+        """
+        self.token_url = token_url or os.getenv("TILORES_OAUTH_TOKEN_URL")
+        self.client_id = client_id or os.getenv("TILORES_CLIENT_ID")
+        self.client_secret = client_secret or os.getenv("TILORES_CLIENT_SECRET")
+        self.config = {**TOKEN_CONFIG, **(config or {})}
+
+        self._token: Optional[str] = None
+        self._expires_at = 0.0  # Epoch seconds (comparable across workers)
+        self._lifetime: Optional[float] = None  # expires_in of the current token (s)
+        self._refresh_flight = SingleFlight("tilores_token", cross_worker=True, lock_ttl=self.config["timeout"] + 5)
+        self._background_refresh: Optional[asyncio.Task] = None
+
+        # Statistics
+        self.stats = {
+            "requests": 0,
+            "memory_hits": 0,
+            "redis_hits": 0,
+            "refreshes": 0,
+            "refresh_ahead": 0,
+            "refresh_failures": 0,
+            "last_refresh_ms": None,
+            "total_refresh_ms": 0.0,
+        }
+
+    def _valid(self, now: float) -> bool:
+        return self._token is not None and now < self._expires_at - self.config["expiry_margin"]
+
+    def _refresh_ahead(self, lifetime: Optional[float]) -> float:
+        """Refresh-ahead window, capped for short-lived tokens so they aren't refreshed on every call"""
+        if not lifetime:
+            return self.config["refresh_ahead"]
+        return min(self.config["refresh_ahead"], self.config["refresh_ahead_fraction"] * lifetime)
+
+    def _due_for_refresh(self, now: float) -> bool:
+        return now >= self._expires_at - self._refresh_ahead(self._lifetime)
+
+    def _install(self, token_data: Dict[str, Any]):
+        self._token = token_data["access_token"]
+        self._expires_at = token_data["expires_at"]
+        self._lifetime = token_data.get("expires_in")
+
+    async def _read_shared(self, redis_client: Optional[Any]) -> Optional[Dict[str, Any]]:
+        """Token another worker already fetched, if it isn't due for refresh"""
+        if redis_client is None:
+            return None
+        try:
+            raw = await redis_client.get(TOKEN_REDIS_KEY)
+            if raw:
+                token_data = json.loads(raw)
+                if time.time() < token_data["expires_at"] - self._refresh_ahead(token_data.get("expires_in")):
+                    return token_data
+        except Exception as e:
+            logger.warning(f"⚠️ Shared Tilores token read failed: {e}")
+        return None
+
+    async def _request_token(self) -> Dict[str, Any]:
+        """Perform the client_credentials exchange"""
+        session = get_http_client_registry().get_async_session("tilores_oauth")
+        async with session.post(
+            self.token_url,
+            timeout=aiohttp.ClientTimeout(total=self.config["timeout"]),
+            data={
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+            },
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        ) as response:
+            response.raise_for_status()
+            token_data = await response.json(content_type=None)
+        expires_in = float(token_data.get("expires_in", 3600))
+        return {
+            "access_token": token_data["access_token"],
+            "expires_at": time.time() + expires_in,
+            "expires_in": expires_in,
+        }
+
+    async def _refresh(self, redis_client: Optional[Any]) -> Dict[str, Any]:
+        """Fetch a new token (or adopt one a peer worker just published)"""
+        shared = await self._read_shared(redis_client)
+        if shared is not None:
+            self.stats["redis_hits"] += 1
+            return shared
+
+        start_time = time.time()
+        try:
+            token_data = await self._request_token()
+        except Exception:
+            self.stats["refresh_failures"] += 1
+            raise
+        elapsed_ms = (time.time() - start_time) * 1000
+        self.stats["refreshes"] += 1
+        self.stats["last_refresh_ms"] = round(elapsed_ms, 1)
+        self.stats["total_refresh_ms"] += elapsed_ms
+        logger.info(f"🔐 Tilores token refreshed in {elapsed_ms:.0f}ms")
+
+        if redis_client is not None:
+            ttl = int(token_data["expires_at"] - time.time() - self.config["expiry_margin"])
+            if ttl > 0:
+                try:
+                    await redis_client.setex(TOKEN_REDIS_KEY, ttl, json.dumps(token_data))
+                except Exception as e:
+                    logger.warning(f"⚠️ Shared Tilores token write failed: {e}")
+        return token_data
+
+    async def _refresh_and_install(self, redis_client: Optional[Any]):
+        token_data = await self._refresh_flight.do("refresh", lambda: self._refresh(redis_client), redis_client)
+        self._install(token_data)
+
+    def _start_background_refresh(self, redis_client: Optional[Any]):
+        if self._background_refresh is not None and not self._background_refresh.done():
+            return
+        self.stats["refresh_ahead"] += 1
+
+        async def refresh():
+            try:
+                await self._refresh_and_install(redis_client)
+            except Exception as e:
+                logger.warning(f"⚠️ Background Tilores token refresh failed: {e}")
+
+        self._background_refresh = asyncio.create_task(refresh())
+
+    async def get_token(self, redis_client: Optional[Any] = None) -> str:
+        """
+        Get a valid access token
+
+        Args:
+            redis_client: Optional redis.asyncio client for cross-worker sharing
+
+        Returns:
+            Bearer token string
+        """
+        self.stats["requests"] += 1
+        now = time.time()
+        if self._valid(now):
+            self.stats["memory_hits"] += 1
+            if self._due_for_refresh(now):
+                self._start_background_refresh(redis_client)
+            return self._token
+
+        await self._refresh_and_install(redis_client)
+        return self._token
+
+    async def invalidate(self, redis_client: Optional[Any] = None):
+        """Drop the cached token here and in Redis (e.g. after a 401)"""
+        self._token = None
+        self._expires_at = 0.0
+        self._lifetime = None
+        if redis_client is not None:
+            try:
+                await redis_client.delete(TOKEN_REDIS_KEY)
+            except Exception as e:
+                logger.warning(f"⚠️ Shared Tilores token delete failed: {e}")
+        # A refresh published in the last few seconds may carry the revoked token too
+        await self._refresh_flight.forget("refresh", redis_client)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get token manager statistics"""
+        refreshes = self.stats["refreshes"]
+        return {
+            **self.stats,
+            "total_refresh_ms": round(self.stats["total_refresh_ms"], 1),
+            "avg_refresh_ms": round(self.stats["total_refresh_ms"] / refreshes, 1) if refreshes else None,
+            "has_token": self._token is not None,
+            "expires_in": round(self._expires_at - time.time(), 1) if self._token else None,
+        }
+
+
+# Global instance
+_token_manager = None
+
+
+def get_token_manager() -> TiloresTokenManager:
+    """Get or create the global Tilores token manager"""
+    global _token_manager
+    if _token_manager is None:
+        _token_manager = TiloresTokenManager()
+    return _token_manager
@@ -0,0 +1,181 @@
+"""
+Speculative Tool Prefetch for Tilores_X
+Starts the customer search as soon as routing finds an identifier, then injects
+the result as a synthetic tool call or hands it to the model's own tool call
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional
+
+from utils.tool_runtime import get_tool_runtime
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_CONFIG = {
+    "enabled": os.getenv("TOOL_PREFETCH_ENABLED", "true").lower() == "true",
+    "tool": os.getenv("TOOL_PREFETCH_TOOL", "tilores_search"),
+    "inject_wait": float(os.getenv("TOOL_PREFETCH_INJECT_WAIT", "3.0")),  # Wait before the first LLM call (s)
+}
+
+
+class ToolPrefetch:
+    """One speculative tool call for one request"""
+
+    def __init__(self, manager: "ToolPrefetchManager", tool_name: str, identifier: str, future: Future):
+        self.manager = manager
+        self.tool_name = tool_name
+        self.identifier = identifier
+        self.future = future
+        self.tool_call_id = f"prefetch_{uuid.uuid4().hex[:12]}"
+        self.consumed = False
+        self.finished = False
+        self._failed = False
+
+    def matches(self, tool_call: Dict[str, Any]) -> bool:
+        """Whether the model asked for the same lookup (its query contains our identifier)"""
+        if self.consumed or tool_call.get("name") != self.tool_name:
+            return False
+        args = tool_call.get("args")
+        query = args.get("query", "") if isinstance(args, dict) else args
+        return self.identifier.lower() in str(query).lower()
+
+    def _result(self) -> Optional[str]:
+        if self._failed:
+            return None
+        try:
+            return str(self.future.result(timeout=0))
+        except Exception as e:
+            self._failed = True
+            self.manager.stats["errors"] += 1
+            logger.warning(f"⚠️ Prefetched {self.tool_name} failed: {e}")
+            return None
+
+    def inject(self, timeout: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Synthetic assistant tool call plus tool result, if the prefetch finishes in time
+
+        Args:
+            timeout: Seconds to wait (default TOOL_PREFETCH_INJECT_WAIT)
+
+        Returns:
+            Messages to append before the first LLM call, or None
+        """
+        try:
+            self.future.exception(timeout=self.manager.config["inject_wait"] if timeout is None else timeout)
+        except FutureTimeoutError:
+            return None
+        content = self._result()
+        if content is None:
+            return None
+        self.consumed = True
+        self.manager.stats["injected"] += 1
+        return [
+            {
+                "role": "assistant",
+                "content": "",
+                "tool_calls": [{"name": self.tool_name, "args": {"query": self.identifier}, "id": self.tool_call_id}],
+            },
+            {"role": "tool", "content": content, "tool_call_id": self.tool_call_id},
+        ]
+
+    async def claim(self, tool_call: Dict[str, Any]) -> Optional[str]:
+        """Result for a matching model tool call (awaited if still running), else None"""
+        if not self.matches(tool_call):
+            return None
+        try:
+            await asyncio.wrap_future(self.future)
+        except Exception:
+            pass
+        content = self._result()
+        if content is None:
+            return None
+        self.consumed = True
+        self.manager.stats["handed_over"] += 1
+        return content
+
+    def finish(self):
+        """Record a prefetch the model never used"""
+        if self.finished:
+            return
+        self.finished = True
+        if not self.consumed:
+            self.manager.stats["unused"] += 1
+            self.future.cancel()
+
+
+class ToolPrefetchManager:
+    """
+    Starts speculative tool calls on the shared tool runtime
+
+    A prefetch counts as a hit when its result is injected before the first
+    LLM call (saving the tool-decision round trip) or handed to the model's
+    own matching tool call; otherwise it is a miss.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the manager
+
+        Args:
+            config: Optional configuration overriding PREFETCH_CONFIG
+        """
+        self.config = {**PREFETCH_CONFIG, **(config or {})}
+
+        # Statistics
+        self.stats = {
+            "started": 0,
+            "injected": 0,
+            "handed_over": 0,
+            "unused": 0,
+            "errors": 0,
+        }
+
+    def start(self, tools: List[Any], identifier: Optional[str]) -> Optional[ToolPrefetch]:
+        """
+        Start the prefetch tool for a customer identifier
+
+        Args:
+            tools: Available LangChain tools
+            identifier: Email, client ID, Salesforce ID or phone found by routing
+
+        Returns:
+            ToolPrefetch handle, or None when disabled/not applicable
+        """
+        if not self.config["enabled"] or not identifier:
+            return None
+        tool = next((tool for tool in tools if tool.name == self.config["tool"]), None)
+        if tool is None:
+            return None
+        self.stats["started"] += 1
+        logger.info(f"🚀 Prefetching {tool.name} for identifier")
+        future = get_tool_runtime().submit(tool, {"query": identifier})
+        return ToolPrefetch(self, tool.name, identifier, future)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get prefetch statistics"""
+        hits = self.stats["injected"] + self.stats["handed_over"]
+        return {
+            **self.stats,
+            "enabled": self.config["enabled"],
+            "hits": hits,
+            "misses": self.stats["started"] - hits,
+            "hit_ratio": round(hits / max(1, self.stats["started"]) * 100, 1),
+            "saved_round_trips": self.stats["injected"],
+        }
+
+
+# Global instance
+_prefetch_manager = None
+
+
+def get_prefetch_manager() -> ToolPrefetchManager:
+    """Get or create the global tool prefetch manager"""
+    global _prefetch_manager
+    if _prefetch_manager is None:
+        _prefetch_manager = ToolPrefetchManager()
+    return _prefetch_manager
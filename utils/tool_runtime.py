@@ -0,0 +1,312 @@
+"""
+Tool Runtime for Tilores_X
+Executes LLM tool calls on the shared async bridge loop with a bounded worker pool,
+per-tool concurrency limits, parallel execution and timeouts that stop the work
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from utils.async_bridge import get_async_bridge
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_limits(raw: str) -> Dict[str, int]:
+    """Parse "tool=limit,tool=limit" into a dict"""
+    limits = {}
+    for item in raw.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            limits[name.strip()] = int(value)
+    return limits
+
+
+TOOL_RUNTIME_CONFIG = {
+    "max_workers": int(os.getenv("TOOL_RUNTIME_MAX_WORKERS", "16")),  # Threads for sync tools
+    "io_workers": int(os.getenv("TOOL_RUNTIME_IO_WORKERS", "16")),  # Threads for blocking calls inside tools
+    "default_limit": int(os.getenv("TOOL_RUNTIME_DEFAULT_LIMIT", "8")),  # Concurrent calls per tool
+    "tool_limits": _parse_limits(
+        os.getenv("TOOL_RUNTIME_TOOL_LIMITS", "tilores_search=6,get_customer_credit_report=6")
+    ),
+    "timeout": float(os.getenv("TOOL_CALL_TIMEOUT", "30")),  # Per tool call (s)
+}
+
+# Set while a tool call runs; flipped when the caller gives up on it
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "tool_cancel_event", default=None
+)
+
+
+class ToolCancelledError(Exception):
+    """Raised inside a tool whose call was abandoned by the runtime"""
+
+
+def is_cancelled() -> bool:
+    """Whether the tool call running in this context has timed out"""
+    event = _cancel_event.get()
+    return event is not None and event.is_set()
+
+
+def raise_if_cancelled():
+    """Stop a sync tool before it starts more upstream work for an abandoned call"""
+    if is_cancelled():
+        raise ToolCancelledError("Tool call was cancelled")
+
+
+class ToolRuntime:
+    """
+    Long-lived executor for tool calls
+
+    Async tools run as tasks on the async bridge loop and are cancelled on
+    timeout. Sync tools run on a bounded thread pool; a timed-out call is
+    dequeued if it hasn't started, and is signalled through is_cancelled()
+    otherwise. Its concurrency slot stays held until the thread actually
+    finishes, so a burst of timeouts cannot pile up unbounded threads.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the runtime
+
+        Args:
+            config: Optional configuration overriding TOOL_RUNTIME_CONFIG
+        """
+        self.config = {**TOOL_RUNTIME_CONFIG, **(config or {})}
+        self._executor = ThreadPoolExecutor(max_workers=self.config["max_workers"], thread_name_prefix="tool")
+        self._io_executor = ThreadPoolExecutor(max_workers=self.config["io_workers"], thread_name_prefix="tool-io")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._io_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.stats = {
+            "calls": 0,
+            "batches": 0,
+            "parallel_batches": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "cancelled_before_start": 0,
+            "not_found": 0,
+            "blocking_calls": 0,
+            "blocking_timeouts": 0,
+            "total_ms": 0.0,
+            "by_tool": {},
+        }
+
+    def _limit(self, name: str) -> int:
+        return self.config["tool_limits"].get(name, self.config["default_limit"])
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        # Only touched from the bridge loop, so no lock is needed
+        if name not in self._semaphores:
+            self._semaphores[name] = asyncio.Semaphore(self._limit(name))
+        return self._semaphores[name]
+
+    def _record(self, name: str, elapsed_ms: float, outcome: str):
+        self.stats["total_ms"] += elapsed_ms
+        tool_stats = self.stats["by_tool"].setdefault(name, {"calls": 0, "errors": 0, "timeouts": 0, "total_ms": 0.0})
+        tool_stats["calls"] += 1
+        tool_stats["total_ms"] += elapsed_ms
+        if outcome in ("errors", "timeouts"):
+            tool_stats[outcome] += 1
+            self.stats[outcome] += 1
+
+    async def _run_sync_tool(self, tool: Any, args: Any, timeout: float) -> Any:
+        """Run tool.invoke on the bounded pool, holding the tool's slot until the thread is done"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore(tool.name)
+        deadline = loop.time() + timeout
+        # Waiting for a slot counts against the call's timeout
+        await asyncio.wait_for(semaphore.acquire(), timeout)
+
+        cancel_event = threading.Event()
+        context = contextvars.copy_context()
+        context.run(_cancel_event.set, cancel_event)
+        future: Future = self._executor.submit(context.run, tool.invoke, args)
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(semaphore.release))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            cancel_event.set()
+            if future.cancel():
+                self.stats["cancelled_before_start"] += 1
+            raise
+
+    async def _run_async_tool(self, tool: Any, args: Any, timeout: float) -> Any:
+        async def run():
+            async with self._semaphore(tool.name):
+                return await tool.ainvoke(args)
+
+        return await asyncio.wait_for(run(), timeout)
+
+    async def execute_async(self, tool: Any, args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Execute one tool with its concurrency limit and a timeout
+
+        Args:
+            tool: LangChain tool
+            args: Tool arguments
+            timeout: Seconds before the call is abandoned (default TOOL_CALL_TIMEOUT)
+
+        Returns:
+            The tool result
+        """
+        timeout = timeout or self.config["timeout"]
+        self.stats["calls"] += 1
+        start_time = time.time()
+        outcome = "ok"
+        try:
+            if getattr(tool, "coroutine", None) is not None:
+                return await self._run_async_tool(tool, args, timeout)
+            return await self._run_sync_tool(tool, args, timeout)
+        except asyncio.TimeoutError:
+            outcome = "timeouts"
+            raise
+        except Exception:
+            outcome = "errors"
+            raise
+        finally:
+            self._record(tool.name, (time.time() - start_time) * 1000, outcome)
+
+    def submit(self, tool: Any, args: Any, timeout: Optional[float] = None) -> Future:
+        """Start a tool call in the background; returns a concurrent.futures.Future"""
+        return get_async_bridge().submit(self.execute_async(tool, args, timeout))
+
+    async def _execute_tool_call(self, tools_by_name: Dict[str, Any], tool_call: Dict[str, Any],
+                                 timeout: Optional[float],
+                                 on_result: Optional[Callable[[str, bool], None]],
+                                 prefetch: Optional[Any] = None) -> Dict[str, Any]:
+        tool_name = tool_call["name"]
+        tool_id = tool_call.get("id", f"call_{tool_name}")
+        tool = tools_by_name.get(tool_name)
+        success = False
+        prefetched = await prefetch.claim(tool_call) if prefetch is not None else None
+        if prefetched is not None:
+            content = prefetched
+            success = True
+        elif tool is None:
+            self.stats["not_found"] += 1
+            content = f"Tool {tool_name} not found"
+        else:
+            try:
+                content = str(await self.execute_async(tool, tool_call["args"], timeout))
+                success = True
+            except asyncio.TimeoutError:
+                logger.warning(f"⏰ Tool {tool_name} timed out after {timeout or self.config['timeout']}s")
+                content = f"Error executing {tool_name}: timed out"
+            except Exception as tool_error:
+                logger.warning(f"⚠️ Tool {tool_name} failed: {tool_error}")
+                content = f"Error executing {tool_name}: {str(tool_error)}"
+        if on_result is not None:
+            on_result(tool_name, success)
+        return {"role": "tool", "content": content, "tool_call_id": tool_id}
+
+    async def execute_tool_calls_async(self, tools: Iterable[Any], tool_calls: List[Dict[str, Any]],
+                                       timeout: Optional[float] = None,
+                                       on_result: Optional[Callable[[str, bool], None]] = None,
+                                       prefetch: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """Execute all tool calls of one model turn concurrently, preserving order"""
+        tools_by_name = {tool.name: tool for tool in tools}
+        self.stats["batches"] += 1
+        if len(tool_calls) > 1:
+            self.stats["parallel_batches"] += 1
+        return list(await asyncio.gather(*[
+            self._execute_tool_call(tools_by_name, tool_call, timeout, on_result, prefetch) for tool_call in tool_calls
+        ]))
+
+    def execute_tool_calls(self, tools: Iterable[Any], tool_calls: List[Dict[str, Any]],
+                           timeout: Optional[float] = None,
+                           on_result: Optional[Callable[[str, bool], None]] = None,
+                           prefetch: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """
+        Execute tool calls from synchronous code on the shared bridge loop
+
+        Args:
+            tools: Available LangChain tools
+            tool_calls: Tool calls from the model response
+            timeout: Per-call timeout in seconds (default TOOL_CALL_TIMEOUT)
+            on_result: Optional callback(tool_name, success) for monitoring
+            prefetch: Optional ToolPrefetch whose result answers a matching call
+
+        Returns:
+            Tool messages ({"role": "tool", ...}) in tool-call order
+        """
+        return get_async_bridge().run(self.execute_tool_calls_async(tools, tool_calls, timeout, on_result, prefetch))
+
+    def run_blocking(self, key: str, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run a blocking call (e.g. a Tilores request inside a sync tool) with a timeout
+
+        The call runs on a separate bounded pool so tools never wait on their own
+        workers. Raises concurrent.futures.TimeoutError when it takes too long.
+
+        Args:
+            key: Concurrency-limit key (tool limits apply when it matches a tool name)
+            fn: Blocking callable
+            *args: Arguments for fn
+            timeout: Seconds to wait (default TOOL_CALL_TIMEOUT)
+
+        Returns:
+            The callable's result
+        """
+        raise_if_cancelled()
+        timeout = timeout or self.config["timeout"]
+        with self._lock:
+            if key not in self._io_semaphores:
+                self._io_semaphores[key] = threading.BoundedSemaphore(self._limit(key))
+            semaphore = self._io_semaphores[key]
+        if not semaphore.acquire(timeout=timeout):
+            self.stats["blocking_timeouts"] += 1
+            raise FutureTimeoutError(f"No free slot for {key} within {timeout}s")
+
+        self.stats["blocking_calls"] += 1
+        future = self._io_executor.submit(contextvars.copy_context().run, fn, *args)
+        future.add_done_callback(lambda _: semaphore.release())
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.stats["blocking_timeouts"] += 1
+            future.cancel()
+            raise
+
+    def shutdown(self):
+        """Stop accepting work and drop queued calls"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._io_executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("🛑 Tool runtime shut down")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get runtime statistics"""
+        return {
+            **self.stats,
+            "total_ms": round(self.stats["total_ms"], 1),
+            "avg_ms": round(self.stats["total_ms"] / max(1, self.stats["calls"]), 1),
+            "by_tool": {
+                name: {**tool_stats, "total_ms": round(tool_stats["total_ms"], 1)}
+                for name, tool_stats in self.stats["by_tool"].items()
+            },
+            "limits": {name: self._limit(name) for name in self.stats["by_tool"]},
+        }
+
+
+# Global instance
+_tool_runtime = None
+_tool_runtime_lock = threading.Lock()
+
+
+def get_tool_runtime() -> ToolRuntime:
+    """Get or create the global tool runtime"""
+    global _tool_runtime
+    if _tool_runtime is None:
+        with _tool_runtime_lock:
+            if _tool_runtime is None:
+                _tool_runtime = ToolRuntime()
+    return _tool_runtime